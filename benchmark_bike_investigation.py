@@ -0,0 +1,266 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import (load_data, time_stats, station_stats, trip_duration_stats, user_stats,
+                                count_null_values, compute_stats)
+
+# Columns of each city file; Washington has no 'Gender' and 'Birth Year' columns
+BASE_COLUMNS = ["", "Start Time", "End Time", "Trip Duration", "Start Station", "End Station", "User Type"]
+LAYOUTS = {
+    "chicago": BASE_COLUMNS + ["Gender", "Birth Year"],
+    "new york city": BASE_COLUMNS + ["Gender", "Birth Year"],
+    "washington": BASE_COLUMNS,
+}
+
+# Default numbers of trips benchmarked; sizes up to 50M rows are supported (generated in chunks)
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# Number of trips generated at a time, which bounds the memory used by the generator
+GENERATOR_CHUNK_ROWS = 1_000_000
+# Relative slowdown above which a benchmark counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+def generate_trips(path, rows, layout="chicago", seed=0, stations=600):
+    """
+    Writes a synthetic city file with realistic trip distributions.
+
+    Start times cover January to June 2017 with more trips at rush hours, durations follow a
+    log-normal distribution (with a few trips over one day), station popularity follows a Zipf
+    law and a small share of user values are missing or invalid, to exercise the cleaning.
+
+    Args:
+        (str) path - Path of the CSV file to write
+        (int) rows - Number of trips to generate
+        (str) layout - City whose column layout is used, among LAYOUTS
+        (int) seed - Seed of the random generator, the same seed giving the same file
+        (int) stations - Number of distinct stations
+    """
+    rng = np.random.default_rng(seed)
+    columns = LAYOUTS[layout]
+    station_names = np.array([f"Station {index} & {index % 97} St" for index in range(stations)], dtype=object)
+    popularity = 1 / np.arange(1, stations + 1)
+    popularity /= popularity.sum()
+    hour_weights = np.array([1, 1, 1, 1, 1, 2, 4, 8, 10, 6, 5, 5, 6, 6, 5, 6, 8, 10, 8, 5, 4, 3, 2, 1], dtype=float)
+    hour_weights /= hour_weights.sum()
+    first_day = np.datetime64('2017-01-01T00:00:00')
+
+    with open(path, 'w', newline='') as file:
+        for offset in range(0, rows, GENERATOR_CHUNK_ROWS):
+            size = min(GENERATOR_CHUNK_ROWS, rows - offset)
+            seconds = (rng.integers(0, 181, size) * 86400 + rng.choice(24, size, p=hour_weights) * 3600
+                       + rng.integers(0, 3600, size))
+            start = first_day + seconds.astype('timedelta64[s]')
+            duration = np.round(rng.lognormal(6.5, 0.8, size))
+            duration[rng.random(size) < 0.001] = 90000  # Unrealistic trips removed by the cleaning
+            chunk = pd.DataFrame({
+                "": np.arange(offset, offset + size),
+                "Start Time": start.astype(str),
+                "End Time": (start + duration.astype('timedelta64[s]')).astype(str),
+                "Trip Duration": duration,
+                "Start Station": rng.choice(station_names, size, p=popularity),
+                "End Station": rng.choice(station_names, size, p=popularity),
+                "User Type": rng.choice(["Subscriber", "Customer", "Dependent", None], size, p=[0.79, 0.19, 0.01, 0.01]),
+            })
+            if "Gender" in columns:
+                chunk["Gender"] = rng.choice(["Male", "Female", None], size, p=[0.6, 0.25, 0.15])
+                birth_year = rng.normal(1981, 11, size).round()
+                birth_year[rng.random(size) < 0.15] = np.nan
+                chunk["Birth Year"] = birth_year
+            chunk["Start Time"] = chunk["Start Time"].str.replace('T', ' ')
+            chunk["End Time"] = chunk["End Time"].str.replace('T', ' ')
+            chunk[columns].to_csv(file, index=False, header=offset == 0)
+
+@contextlib.contextmanager
+def use_city_file(city, path, cache_dir):
+    """
+    Points the analysis at a generated file for the duration of a benchmark.
+
+    Args:
+        (str) city - Name of the city whose file is replaced
+        (str) path - Path of the generated CSV file
+        (str) cache_dir - Directory used for the Parquet cache
+    """
+    previous = bike_investigation.CITY_DATA.get(city), bike_investigation.CACHE_DIR
+    bike_investigation.CITY_DATA[city] = path
+    bike_investigation.CACHE_DIR = cache_dir
+    try:
+        yield
+    finally:
+        bike_investigation.CITY_DATA[city], bike_investigation.CACHE_DIR = previous
+
+def measure(function, track_memory=True):
+    """
+    Times a call and measures its peak memory in a second, traced call.
+
+    Args:
+        function (callable) - Function called without arguments
+        (bool) track_memory - False to skip the traced call
+
+    Returns:
+        dict - 'seconds' taken by the call and 'peak_memory_bytes' allocated during it (None if
+               not tracked)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+
+        peak = None
+        if track_memory:
+            tracemalloc.start()
+            try:
+                function()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return {'seconds': seconds, 'peak_memory_bytes': peak}
+
+def benchmark_city(city, rows, track_memory=True):
+    """
+    Times load_data and every stat function on the current file of a city.
+
+    Args:
+        (str) city - Name of the city, whose file is set with use_city_file
+        (int) rows - Number of trips in the file, used to compute the throughput
+        (bool) track_memory - False to skip the peak memory measurements
+
+    Returns:
+        list - One record per operation with its 'seconds', 'rows_per_second' and 'peak_memory_bytes'
+    """
+    def load_cold(month='all', day='all'):
+        # Drop the DataFrames kept in memory, to time the reads from disk
+        bike_investigation.FRAME_CACHE.clear()
+        return load_data(city, month, day)
+
+    def load_csv():
+        use_cache = bike_investigation.USE_CACHE
+        bike_investigation.USE_CACHE = False
+        try:
+            return load_cold()
+        finally:
+            bike_investigation.USE_CACHE = use_cache
+
+    load_data(city, 'all', 'all')  # Build the caches before timing their reads
+    df = load_data(city, 'all', 'all')
+    operations = [
+        ('load_data (memory, friday)', lambda: load_data(city, 'all', 'friday')),
+        ('load_data (csv)', load_csv),
+        ('load_data (cache)', load_cold),
+        ('load_data (june, friday)', lambda: load_cold('june', 'friday')),
+    ]
+    for name, function in [('time_stats', time_stats), ('station_stats', station_stats),
+                           ('trip_duration_stats', trip_duration_stats), ('user_stats', user_stats),
+                           ('count_null_values', count_null_values), ('compute_stats', compute_stats)]:
+        operations.append((name, lambda function=function: function(df)))
+
+    records = []
+    for name, function in operations:
+        record = dict(operation=name, rows=rows, **measure(function, track_memory))
+        record['rows_per_second'] = rows / record['seconds'] if record['seconds'] else None
+        records.append(record)
+    bike_investigation.FRAME_CACHE.clear()  # Release the trips of this file before the next one
+    return records
+
+def run_benchmarks(sizes=DEFAULT_SIZES, layouts=tuple(LAYOUTS), workdir=None, track_memory=True):
+    """
+    Benchmarks the hot paths of the analysis on synthetic files of increasing size.
+
+    Args:
+        (list) sizes - Numbers of trips to generate
+        (tuple) layouts - Cities whose column layout is benchmarked
+        (str) workdir - Directory keeping the generated files between runs, temporary by default
+        (bool) track_memory - False to skip the peak memory measurements
+
+    Returns:
+        dict - The environment ('environment') and one record per layout, size and operation
+               ('results')
+    """
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+
+        results = []
+        for layout in layouts:
+            for rows in sizes:
+                path = os.path.join(workdir, f"{layout.replace(' ', '_')}_{rows}.csv")
+                if not os.path.exists(path):
+                    generate_trips(path, rows, layout)
+                with use_city_file(layout, path, os.path.join(workdir, 'cache')):
+                    for record in benchmark_city(layout, rows, track_memory):
+                        results.append(dict(layout=layout, **record))
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'pyarrow': bike_investigation.pa.__version__ if bike_investigation.pa is not None else None,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares benchmark results with a previous run.
+
+    Args:
+        (dict) results - Output of run_benchmarks
+        (dict) baseline - Output of a previous run_benchmarks
+        (float) tolerance - Relative slowdown allowed before reporting a regression
+
+    Returns:
+        list - Records of the operations slower than the baseline, with the baseline 'seconds'
+               under 'baseline_seconds'
+    """
+    previous = {(record['layout'], record['rows'], record['operation']): record['seconds']
+                for record in baseline['results']}
+    regressions = []
+    for record in results['results']:
+        baseline_seconds = previous.get((record['layout'], record['rows'], record['operation']))
+        if baseline_seconds is not None and record['seconds'] > baseline_seconds * (1 + tolerance):
+            regressions.append(dict(record, baseline_seconds=baseline_seconds))
+    return regressions
+
+def main():
+    """Runs the benchmarks from the command line and writes the results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark the bike share analysis on synthetic data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="numbers of trips to generate")
+    parser.add_argument('--layouts', nargs='+', default=list(LAYOUTS), choices=list(LAYOUTS),
+                        help="city column layouts to benchmark")
+    parser.add_argument('--workdir', help="directory keeping the generated files between runs")
+    parser.add_argument('--output', default='bench_results.json', help="JSON file receiving the results")
+    parser.add_argument('--baseline', help="JSON results of a previous run to compare with")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory measurements")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.layouts, args.workdir, not args.no_memory)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    for record in results['results']:
+        print(f"{record['layout']:>14} {record['rows']:>10} {record['operation']:<26} "
+              f"{record['seconds']:9.4f} s {record['rows_per_second'] or 0:14,.0f} rows/s")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for record in regressions:
+            print(f"Regression: {record['layout']} {record['rows']} {record['operation']} "
+                  f"{record['baseline_seconds']:.4f} s -> {record['seconds']:.4f} s")
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
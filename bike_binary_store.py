@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Extension of the trip store directories, which CITY_DATA can point to instead of a CSV file
+TRIP_STORE_SUFFIX = ".trips"
+# Version of the trip store layout, bumped whenever it changes
+TRIP_STORE_VERSION = 1
+# Columns sharing the station-name dictionary
+STATION_COLUMNS = ["Start Station", "End Station"]
+
+def is_trip_store(path):
+    """
+    Tells whether a path is a trip store written by write_trip_store.
+
+    Args:
+        (str) path - Path of a city source
+
+    Returns:
+        (bool) - True if the path is a trip store directory
+    """
+    return path.endswith(TRIP_STORE_SUFFIX) and os.path.isdir(path)
+
+def _codes_dtype(size):
+    """Gives the smallest signed integer type holding the codes of a dictionary, -1 included."""
+    return np.int8 if size < 2 ** 7 else np.int16 if size < 2 ** 15 else np.int32
+
+def write_trip_store(df, path):
+    """
+    Writes trips as a trip store: one fixed-width numpy file per column and a metadata file.
+
+    Datetimes are stored as int64 epoch seconds (sub-second parts are dropped), the station
+    columns as integer IDs into a shared station-name dictionary (stations.json), the other
+    text columns as integer codes into their own dictionary, and the numbers as they are.
+    Missing values are stored as NaT, -1 codes and NaN. An existing store is replaced.
+
+    Args:
+        df (DataFrame) - Trips with parsed datetimes, e.g. returned by read_city_csv
+        (str) path - Path of the store directory, ending with TRIP_STORE_SUFFIX
+    """
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    stations = set()
+    for column in STATION_COLUMNS:
+        if column in df.columns:
+            stations.update(pd.unique(df[column].dropna()))
+    stations = pd.Index(sorted(stations), dtype=object)
+
+    columns = []
+    for index, (name, values) in enumerate(df.items()):
+        file_name = f"column_{index}.npy"
+        entry = {'name': name, 'file': file_name}
+        if pd.api.types.is_datetime64_any_dtype(values):
+            entry['kind'] = 'datetime'
+            array = values.to_numpy(dtype='datetime64[s]').view(np.int64)
+        elif name in STATION_COLUMNS:
+            entry['kind'] = 'station'
+            array = stations.get_indexer(values.astype(object)).astype(_codes_dtype(len(stations)))
+        elif pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            entry['kind'] = 'number'
+            array = values.to_numpy(dtype=np.float64, na_value=np.nan) if values.hasnans else values.to_numpy()
+        else:
+            entry['kind'] = 'category'
+            codes, categories = pd.factorize(values.astype(object), sort=True)
+            entry['categories'] = [str(category) for category in categories]
+            array = codes.astype(_codes_dtype(len(categories)))
+        np.save(os.path.join(tmp_path, file_name), np.ascontiguousarray(array))
+        columns.append(entry)
+
+    with open(os.path.join(tmp_path, 'stations.json'), 'w') as file:
+        json.dump(list(stations), file)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as file:
+        json.dump({'version': TRIP_STORE_VERSION, 'rows': len(df), 'columns': columns}, file)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+def open_trip_store(path):
+    """
+    Opens a trip store as a DataFrame whose columns are read-only views of memory-mapped files.
+
+    Nothing is parsed or copied: the pages of a column are only read from disk when it is used,
+    so opening a city takes milliseconds whatever its size.
+
+    Args:
+        (str) path - Path of the store directory
+
+    Returns:
+        df - Pandas DataFrame with the columns of the stored trips, datetimes as datetime64[s]
+             and the text columns as categories
+
+    Raises:
+        FileNotFoundError - If the store does not exist
+        ValueError - If the store was written with another layout version
+    """
+    with open(os.path.join(path, 'meta.json')) as file:
+        metadata = json.load(file)
+    if metadata.get('version') != TRIP_STORE_VERSION:
+        raise ValueError(f"The trip store {path} has an unsupported version: {metadata.get('version')}.")
+    with open(os.path.join(path, 'stations.json')) as file:
+        stations = pd.Index(json.load(file), dtype=object)
+
+    data = {}
+    for entry in metadata['columns']:
+        array = np.load(os.path.join(path, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'datetime':
+            data[entry['name']] = array.view('datetime64[s]')
+        elif entry['kind'] in ('station', 'category'):
+            categories = stations if entry['kind'] == 'station' else pd.Index(entry['categories'], dtype=object)
+            # The codes were written by write_trip_store, so they are not validated again
+            data[entry['name']] = pd.Categorical.from_codes(array, categories=categories, validate=False)
+        else:
+            data[entry['name']] = array
+    return pd.DataFrame(data, copy=False)
+
+def main():
+    """Converts the CSV file of a city into a trip store from the command line."""
+    import bike_investigation  # Imported here, as bike_investigation reads the trip stores of this module
+
+    parser = argparse.ArgumentParser(description="Convert a city CSV file into a memory-mapped trip store.")
+    parser.add_argument('city', choices=list(bike_investigation.CITY_DATA), help="city to convert")
+    parser.add_argument('--output', help="path of the store (default: the CSV path with the .trips extension)")
+    args = parser.parse_args()
+
+    source_path = bike_investigation.CITY_DATA[args.city]
+    output = args.output or os.path.splitext(source_path)[0] + TRIP_STORE_SUFFIX
+    write_trip_store(bike_investigation.read_city_csv(source_path), output)
+    print(f"Wrote {output}; point CITY_DATA['{args.city}'] at it to load the city from the store.")
+
+if __name__ == "__main__":
+    main()
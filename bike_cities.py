@@ -0,0 +1,224 @@
+import argparse
+from collections import Counter
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import (CITY_DATA, DAY_NAMES, MONTH_NAMES, _calendar_columns, _echo, _name_codes,
+                                _prepare_data, _to_counter, calendar_code, clean_data, load_city_data,
+                                summarize_stats)
+from bike_report import DAY_FILTERS, MONTH_FILTERS, flatten, to_serializable
+
+# Column holding the city of each trip in the unified dataset
+CITY_COLUMN = "city"
+
+def _categorical(values):
+    """Converts text values into a categorical with object categories, so that every city shares one dtype."""
+    values = values.array if isinstance(values.dtype, pd.CategoricalDtype) else pd.Categorical(values)
+    return pd.Categorical.from_codes(values.codes, categories=values.categories.astype(object), validate=False)
+
+def _unify_column(parts, lengths):
+    """
+    Concatenates the values of one column across cities, with explicit nulls where it is missing.
+
+    Args:
+        (list) parts - Series of the column in each city, None for the cities without the column
+        (list) lengths - Number of trips of each city
+
+    Returns:
+        Values of the column for all the trips: a categorical with the union of the categories
+        for text columns, otherwise an array of the dtype of the first city having the column
+    """
+    template = next(part for part in parts if part is not None)
+    if pd.api.types.is_numeric_dtype(template.dtype) or pd.api.types.is_datetime64_any_dtype(template.dtype):
+        # Series without values are all missing: NaN, NA or NaT depending on the dtype
+        return pd.concat([part.reset_index(drop=True) if part is not None else pd.Series(index=range(length),
+                                                                                          dtype=template.dtype)
+                          for part, length in zip(parts, lengths)], ignore_index=True).array
+    empty = pd.Index([], dtype=object)
+    return pd.api.types.union_categoricals(
+        [_categorical(part) if part is not None else pd.Categorical.from_codes(np.full(length, -1), categories=empty)
+         for part, length in zip(parts, lengths)])
+
+def _load_city(city, month, day, compact):
+    """Loads and prepares the trips of a city like load_data, without keeping them in FRAME_CACHE."""
+    try:
+        df = load_city_data(city, calendar_code(MONTH_NAMES, month))
+    except FileNotFoundError:
+        _echo(f"Error: The file for {city} does not exist.")
+        return pd.DataFrame()
+    return _prepare_data(df, month, day, compact)
+
+def load_cities(cities=None, month='all', day='all', compact=True):
+    """
+    Loads the trips of several cities into a single DataFrame with a unified schema.
+
+    Every column of any city is present: the cities without it get explicit nulls, and text
+    columns are categoricals over the union of the values of all the cities, so the station
+    names are stored once. The cities are read without going through FRAME_CACHE, so the merged
+    DataFrame is the only copy of their trips kept in memory.
+
+    Args:
+        (list) cities - Names of the cities to load, all of CITY_DATA by default
+        (str) month - Name of the month to filter by, or "all" to apply no month filter
+        (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+        (bool) compact - True to load the memory-optimized profile (see optimize_dtypes)
+
+    Returns:
+        df - Pandas DataFrame with a categorical CITY_COLUMN and the columns of the cities,
+             validated (see validate_data), with the columns missing from each city listed
+             under 'missing_columns' in its attrs
+    """
+    cities = list(CITY_DATA) if cities is None else list(cities)
+    frames = [_load_city(city, month, day, compact) for city in cities]
+    lengths = [len(frame) for frame in frames]
+    columns = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+
+    data = {CITY_COLUMN: pd.Categorical.from_codes(np.repeat(np.arange(len(cities)), lengths), categories=cities)}
+    for column in columns:
+        data[column] = _unify_column([frame[column] if column in frame.columns else None for frame in frames], lengths)
+    unified = pd.DataFrame(data, copy=False)
+    unified.attrs['validated'] = True  # _prepare_data validated every city
+    unified.attrs['missing_columns'] = {city: [column for column in columns if column not in frame.columns]
+                                        for city, frame in zip(cities, frames)}
+    return unified
+
+def _codes(values):
+    """Gives the int64 codes (-1 for missing values) and the distinct values of a column."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64, copy=False), pd.Index(uniques)
+
+def _grouped_counts(group_codes, groups, codes, size):
+    """Counts the codes of each group in one bincount, as a (groups, size) array; -1 codes are skipped."""
+    valid = codes >= 0
+    return np.bincount(group_codes[valid] * size + codes[valid], minlength=groups * size).reshape(groups, size)
+
+def aggregate_by_city(df, key=CITY_COLUMN):
+    """
+    Computes the aggregates of aggregate_stats for every city at once, with grouped counts.
+
+    Each column is counted once for all the cities: the city code and the value code of every
+    trip are combined into one integer and counted with a single bincount, instead of counting
+    the column once per city.
+
+    Args:
+        df (DataFrame) - Unified DataFrame returned by load_cities
+        (str) key - Column identifying the city of each trip
+
+    Returns:
+        dict - Aggregates of each city (see aggregate_stats), keyed by city name; the counters of
+               the columns missing from a city are None, as if it had been aggregated on its own
+    """
+    city_codes, groups = _codes(df[key])
+    missing = df.attrs.get('missing_columns', {})
+    cleaned = clean_data(df)
+    rows = np.bincount(city_codes, minlength=len(groups))
+    aggregates = {group: {'rows': int(rows[index])} for index, group in enumerate(groups)}
+
+    def count(values):
+        codes, uniques = _codes(values)
+        counts = _grouped_counts(city_codes, len(groups), codes, len(uniques))
+        return [_to_counter(pd.Series(group_counts, index=uniques)) for group_counts in counts]
+
+    def assign(name, counters, columns):
+        for index, group in enumerate(groups):
+            absent = set(columns) & set(missing.get(group, ()))
+            aggregates[group][name] = None if absent else counters[index]
+
+    # Time statistics, named like aggregate_stats does
+    if 'Start Time' in df.columns:
+        months, days, hours = (count(column) for column in _calendar_columns(df))
+        assign('month', [_name_codes(counts, MONTH_NAMES, 1) for counts in months], ['Start Time'])
+        assign('day_of_week', [_name_codes(counts, DAY_NAMES, 0) for counts in days], ['Start Time'])
+        assign('hour', hours, ['Start Time'])
+
+    # Station statistics; the trips are the distinct (city, start, end) codes, missing stations included
+    if 'Start Station' in df.columns and 'End Station' in df.columns:
+        columns = ['Start Station', 'End Station']
+        (starts, start_names), (ends, end_names) = _codes(df['Start Station']), _codes(df['End Station'])
+        assign('start_station', count(df['Start Station']), columns)
+        assign('end_station', count(df['End Station']), columns)
+        pairs, pair_counts = np.unique((city_codes * (len(start_names) + 1) + starts + 1)
+                                       * (len(end_names) + 1) + ends + 1, return_counts=True)
+        pair_ends = pairs % (len(end_names) + 1) - 1
+        pair_starts = pairs // (len(end_names) + 1) % (len(start_names) + 1) - 1
+        pair_cities = pairs // (len(end_names) + 1) // (len(start_names) + 1)
+        complete = (pair_starts >= 0) & (pair_ends >= 0)
+        pair_starts, pair_ends, pair_counts = pair_starts[complete], pair_ends[complete], pair_counts[complete]
+        # The city is the most significant part of the sorted codes, so the trips of a city are contiguous
+        bounds = np.searchsorted(pair_cities[complete], np.arange(len(groups) + 1))
+        trips = [Counter(dict(zip(zip(start_names[pair_starts[low:high]], end_names[pair_ends[low:high]]),
+                                  pair_counts[low:high].tolist())))
+                 for low, high in zip(bounds, bounds[1:])]
+        assign('trip', trips, columns)
+
+    # Duration sums, in float64 like aggregate_stats
+    if 'Trip Duration' in cleaned:
+        durations = cleaned['Trip Duration'].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(durations)
+        sums = np.bincount(city_codes[valid], weights=durations[valid], minlength=len(groups))
+        counts = np.bincount(city_codes[valid], minlength=len(groups))
+        assign('duration_sum', sums.tolist(), ['Trip Duration'])
+        assign('duration_count', counts.tolist(), ['Trip Duration'])
+
+    for name, column in (('user_type', 'User Type'), ('gender', 'Gender'), ('birth_year', 'Birth Year')):
+        if column in cleaned:
+            assign(name, count(cleaned[column]), [column])
+
+    # Null counts of the columns of each city, with the cleaned columns in place of the raw ones;
+    # the zero counts are kept, like aggregate_stats
+    null_counts = [Counter() for _ in groups]
+    for column in df.columns.drop(key):
+        nulls = (cleaned[column] if column in cleaned else df[column]).isnull().to_numpy()
+        for index, null_count in enumerate(np.bincount(city_codes[nulls], minlength=len(groups)).tolist()):
+            if column not in missing.get(groups[index], ()):
+                null_counts[index][column] = null_count
+    assign('null_counts', null_counts, [])
+    return aggregates
+
+def compare_cities(df):
+    """
+    Computes the statistics of every city of a unified DataFrame.
+
+    Args:
+        df (DataFrame) - Unified DataFrame returned by load_cities
+
+    Returns:
+        dict - Statistics (see summarize_stats) of each city, keyed by city name
+    """
+    return {city: summarize_stats(aggregate) for city, aggregate in aggregate_by_city(df).items()}
+
+def comparison_table(stats):
+    """
+    Lays out the statistics of several cities side by side.
+
+    Args:
+        (dict) stats - Statistics of each city, returned by compare_cities
+
+    Returns:
+        DataFrame - One row per statistic (dotted names, see bike_report.flatten) and one column per city,
+                    with empty cells for the statistics a city does not have
+    """
+    return pd.DataFrame({city: pd.Series(flatten(to_serializable(city_stats)), dtype=object)
+                         for city, city_stats in stats.items()})
+
+def main(argv=None):
+    """Prints the statistics of several cities side by side from the command line."""
+    parser = argparse.ArgumentParser(description="Compare the bike share statistics of several cities.")
+    parser.add_argument('--cities', nargs='+', default=list(CITY_DATA), choices=list(CITY_DATA),
+                        help="cities to compare (default: every city)")
+    parser.add_argument('--month', default="all", choices=MONTH_FILTERS, help="month filter (default: all)")
+    parser.add_argument('--day', default="all", choices=DAY_FILTERS, help="day filter (default: all)")
+    args = parser.parse_args(argv)
+
+    quiet = bike_investigation.QUIET
+    bike_investigation.QUIET = True
+    try:
+        table = comparison_table(compare_cities(load_cities(args.cities, args.month, args.day)))
+    finally:
+        bike_investigation.QUIET = quiet
+    print(table.fillna('').to_string())
+
+if __name__ == "__main__":
+    main()
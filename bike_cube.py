@@ -0,0 +1,261 @@
+import json
+import os
+import time
+from collections import Counter
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import (CITY_DATA, DAY_NAMES, MONTH_NAMES, calendar_code, calendar_codes, clean_data,
+                                summarize_stats)
+
+# Version of the persisted cube layout, bumped whenever its content changes
+CUBE_VERSION = 1
+# Number of (month, day of the week, hour) cells; one more cell holds the trips without a start time
+CELLS = 12 * 7 * 24
+UNDATED = CELLS
+
+# Month (0-11), day of the week (0-6) and hour (0-23) of each cell, -1 for the undated cell
+CELL_MONTHS, CELL_DAYS, CELL_HOURS = [np.append(axis.ravel(), -1) for axis in np.indices((12, 7, 24))]
+
+class CityCube:
+    """
+    Trip aggregates of a city per (month, day of the week, hour), answering any month/day filter.
+
+    Every array has one row per cell of the cube plus a last row for the trips without a start
+    time, which only count when no filter is applied (like in load_data).
+
+    Attributes:
+        trips (ndarray) - Number of trips per cell
+        duration_sum (ndarray) - Sum of the valid trip durations per cell, in seconds
+        duration_count (ndarray) - Number of valid trip durations per cell
+        user_types (ndarray) - Count of each valid user type per cell, or None without 'User Type'
+        genders (ndarray) - Count of each valid gender per cell, or None without 'Gender'
+        birth_years (ndarray) - Count of each valid birth year per cell, or None without 'Birth Year'
+        (dict) metadata - Names of the user types and genders, first birth year, validation
+                          schema and state of the source file
+    """
+
+    def __init__(self, trips, duration_sum, duration_count, user_types=None, genders=None,
+                 birth_years=None, metadata=None):
+        self.trips = trips
+        self.duration_sum = duration_sum
+        self.duration_count = duration_count
+        self.user_types = user_types
+        self.genders = genders
+        self.birth_years = birth_years
+        self.metadata = metadata or {}
+
+    @classmethod
+    def from_trips(cls, df, schema=None):
+        """
+        Builds the cube of a set of trips.
+
+        Args:
+            df (DataFrame) - Pandas DataFrame returned by load_data with no month or day filter
+            (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+        Returns:
+            CityCube - Aggregates of the trips
+
+        Raises:
+            ValueError - If the trips have no 'Start Time' column
+        """
+        if 'Start Time' not in df.columns:
+            raise ValueError("The cube requires the `Start Time` column.")
+        schema = schema or bike_investigation.VALIDATION_SCHEMA
+        months, days, hours = (codes.astype(np.int64) for codes in calendar_codes(df['Start Time']))
+        cells = np.where(months > 0, ((months - 1) * 7 + days) * 24 + hours, UNDATED)
+        cleaned = clean_data(df, schema)
+        metadata = {'schema': json.loads(json.dumps(schema))}
+
+        # Sum the durations of each cell in a single bincount
+        durations = cleaned.get('Trip Duration', pd.Series(np.nan, index=df.index))
+        durations = durations.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(durations)
+        duration_sum = np.bincount(cells[valid], weights=durations[valid], minlength=CELLS + 1)
+        duration_count = np.bincount(cells[valid], minlength=CELLS + 1)
+
+        # Count the validated user types and genders, whose categories are the schema vocabulary
+        vocabularies = {}
+        for key, column in (('user_types', 'User Type'), ('genders', 'Gender')):
+            vocabularies[key] = None
+            if column in cleaned:
+                values = cleaned[column].astype(pd.CategoricalDtype(schema[key]))
+                metadata[key] = list(schema[key])
+                vocabularies[key] = _count_codes(cells, values.cat.codes.to_numpy(), len(schema[key]))
+
+        birth_years = None
+        if 'Birth Year' in cleaned:
+            earliest, latest = schema['birth_year_range']
+            latest = time.localtime().tm_year if latest is None else latest
+            years = cleaned['Birth Year'].to_numpy(dtype=np.float64, na_value=np.nan)
+            codes = np.where(np.isnan(years), -1, years - earliest).astype(np.int64)
+            metadata['first_birth_year'] = int(earliest)
+            birth_years = _count_codes(cells, codes, int(latest - earliest + 1))
+
+        return cls(np.bincount(cells, minlength=CELLS + 1), duration_sum, duration_count,
+                   vocabularies['user_types'], vocabularies['genders'], birth_years, metadata)
+
+    def aggregate(self, month='all', day='all'):
+        """
+        Gives the aggregates of the trips matching a month and day filter, by slicing the cube.
+
+        Args:
+            (str) month - Name of the month to filter by, or "all" to apply no month filter
+            (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+
+        Returns:
+            dict - Time, duration and user aggregates, in the format of aggregate_stats
+        """
+        month_code = calendar_code(MONTH_NAMES, month)
+        day_code = calendar_code(DAY_NAMES, day)
+
+        # Select the cells of the filter; the undated trips only match when nothing is filtered
+        selected = CELL_MONTHS >= 0
+        if month_code is not None:
+            selected &= CELL_MONTHS == month_code - 1
+        if day_code is not None:
+            selected &= CELL_DAYS == day_code
+        every_trip = selected.copy()
+        every_trip[UNDATED] = month_code is None and day_code is None
+
+        trips = self.trips[selected]
+        aggregate = {
+            'rows': int(self.trips[every_trip].sum()),
+            'month': _name_counts(np.bincount(CELL_MONTHS[selected], weights=trips, minlength=12), MONTH_NAMES),
+            'day_of_week': _name_counts(np.bincount(CELL_DAYS[selected], weights=trips, minlength=7), DAY_NAMES),
+            'hour': _name_counts(np.bincount(CELL_HOURS[selected], weights=trips, minlength=24), range(24)),
+            'duration_sum': float(self.duration_sum[every_trip].sum()),
+            'duration_count': int(self.duration_count[every_trip].sum()),
+            'user_type': None,
+            'gender': None,
+            'birth_year': None,
+        }
+        if self.user_types is not None:
+            aggregate['user_type'] = _name_counts(self.user_types[every_trip].sum(axis=0), self.metadata['user_types'])
+        if self.genders is not None:
+            aggregate['gender'] = _name_counts(self.genders[every_trip].sum(axis=0), self.metadata['genders'])
+        if self.birth_years is not None:
+            first_year = self.metadata['first_birth_year']
+            years = range(first_year, first_year + self.birth_years.shape[1])
+            aggregate['birth_year'] = _name_counts(self.birth_years[every_trip].sum(axis=0), years)
+        return aggregate
+
+    def query(self, month='all', day='all'):
+        """
+        Answers the time, trip duration and user statistics of a month and day filter.
+
+        Args:
+            (str) month - Name of the month to filter by, or "all" to apply no month filter
+            (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+
+        Returns:
+            dict - 'time_stats', 'trip_duration_stats' and 'user_stats', as returned by
+                   compute_stats on load_data(city, month, day)
+        """
+        return summarize_stats(self.aggregate(month, day))
+
+    def save(self, path):
+        """
+        Writes the cube to a compressed numpy file.
+
+        Args:
+            (str) path - Path of the file to write
+        """
+        arrays = {name: getattr(self, name) for name in ('trips', 'duration_sum', 'duration_count',
+                                                          'user_types', 'genders', 'birth_years')
+                  if getattr(self, name) is not None}
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, metadata=np.array(json.dumps(self.metadata)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a cube written by save.
+
+        Args:
+            (str) path - Path of the file to read
+
+        Returns:
+            CityCube - The persisted cube
+        """
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files if name != 'metadata'}
+            return cls(metadata=json.loads(str(data['metadata'])), **arrays)
+
+def _count_codes(cells, codes, size):
+    """Counts the (cell, code) pairs into a cells x size array, ignoring the negative codes."""
+    valid = (codes >= 0) & (codes < size)
+    counts = np.bincount(cells[valid] * size + codes[valid], minlength=(CELLS + 1) * size)
+    return counts.reshape(CELLS + 1, size)
+
+def _name_counts(counts, names):
+    """Converts an array of counts indexed by code into a Counter keyed by name, without zeros."""
+    return Counter({name: int(count) for name, count in zip(names, counts) if count > 0})
+
+def cube_path(city):
+    """
+    Gives the location of the persisted cube of a city, next to its Parquet cache.
+
+    Args:
+        (str) city - Name of the city
+
+    Returns:
+        (str) - Path of the cube file
+    """
+    return os.path.join(bike_investigation.CACHE_DIR, f"{city.replace(' ', '_')}.cube.npz")
+
+def load_city_cube(city):
+    """
+    Loads the cube of a city, building and persisting it when it is missing or out of date.
+
+    The cube is rebuilt when the source file or the validation schema changes. When the source
+    file was only touched, the cube is saved again with its new modification time, so the next
+    loads do not hash the file again.
+
+    Args:
+        (str) city - Name of the city
+
+    Returns:
+        CityCube - Aggregates of all the trips of the city
+
+    Raises:
+        FileNotFoundError - If the source file of the city does not exist
+    """
+    source_path = CITY_DATA[city]
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(source_path)
+    path = cube_path(city)
+    schema = json.loads(json.dumps(bike_investigation.VALIDATION_SCHEMA))
+
+    if os.path.exists(path):
+        cube = CityCube.load(path)
+        metadata = cube.metadata
+        if (metadata.get('version') == CUBE_VERSION and metadata.get('schema') == schema
+                and bike_investigation.source_unchanged(source_path, metadata.setdefault('source', {}),
+                                                        save=lambda: cube.save(path))):
+            return cube
+
+    cube = CityCube.from_trips(bike_investigation.load_data(city, 'all', 'all'))
+    cube.metadata.update(version=CUBE_VERSION, source=bike_investigation.source_metadata(source_path))
+    try:
+        os.makedirs(bike_investigation.CACHE_DIR, exist_ok=True)
+        cube.save(path)
+    except OSError:
+        pass  # The cache directory is not writable, the cube is simply rebuilt next time
+    return cube
+
+def query_cube(city, month='all', day='all'):
+    """
+    Answers the time, trip duration and user statistics of a city for a month and day filter.
+
+    Args:
+        (str) city - Name of the city to analyze
+        (str) month - Name of the month to filter by, or "all" to apply no month filter
+        (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+
+    Returns:
+        dict - See CityCube.query
+    """
+    return load_city_cube(city).query(month, day)
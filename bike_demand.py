@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+from bike_od_matrix import station_ids, station_index
+
+# Kinds of demand a StationDemand answers: trips leaving, trips reaching, or both
+DEMAND_KINDS = ("departures", "arrivals", "total")
+
+def _trip_hours(times):
+    """Gives the number of hours since the epoch of each datetime, -1 for the missing ones."""
+    hours = times.to_numpy().astype('datetime64[h]')
+    return np.where(np.isnat(hours), -1, hours.view(np.int64))
+
+class StationDemand:
+    """
+    Departures and arrivals of every station per hour, stored as dense stations x hours arrays.
+
+    Row i is the station of ID i (see bike_od_matrix.station_index) and column j the hour
+    starting j hours after the first hour. Trips without a station or a time are not counted
+    on that side. The arrays grow with extend, so the series can be kept up to date as new
+    hours of trips arrive.
+
+    Attributes:
+        stations (Index) - Station names, the position of a name being its row
+        (int) first_hour - Hours since the epoch of the first column, None while empty
+    """
+
+    def __init__(self, stations=None, first_hour=None, departures=None, arrivals=None):
+        self.stations = pd.Index([], dtype=object, name='station') if stations is None else stations
+        self.first_hour = first_hour
+        empty = np.zeros((len(self.stations), 0), dtype=np.int64)
+        # The arrays may have spare columns for the next hours; only the first _width are used
+        self._departures = empty if departures is None else departures
+        self._arrivals = empty.copy() if arrivals is None else arrivals
+        self._width = self._departures.shape[1]
+
+    @property
+    def departures(self):
+        """(ndarray) - Number of trips starting at each station in each hour."""
+        return self._departures[:, :self._width]
+
+    @property
+    def arrivals(self):
+        """(ndarray) - Number of trips ending at each station in each hour."""
+        return self._arrivals[:, :self._width]
+
+    @classmethod
+    def from_trips(cls, df):
+        """
+        Builds the hourly demand of a set of trips.
+
+        Args:
+            df (DataFrame) - Pandas DataFrame with 'Start Time', 'End Time', 'Start Station' and
+                             'End Station' columns, e.g. returned by load_data
+
+        Returns:
+            StationDemand - Departures and arrivals per station and hour
+        """
+        demand = cls()
+        demand.extend(df)
+        return demand
+
+    @property
+    def hours(self):
+        """(DatetimeIndex) - Start of the hour of each column."""
+        first = 0 if self.first_hour is None else self.first_hour
+        return pd.DatetimeIndex(np.arange(first, first + self.departures.shape[1]).astype('datetime64[h]'),
+                                name='hour')
+
+    def _resize(self, stations, first_hour, last_hour):
+        """Grows the arrays to new stations and hours, the counts of the old ones being kept."""
+        width = 0 if first_hour is None else last_hour - first_hour + 1
+        offset = 0 if self.first_hour is None else self.first_hour - first_hour
+        capacity = self._departures.shape[1]
+        if len(stations) > len(self.stations) or offset > 0 or width > capacity:
+            # Keep spare columns when the series grows, so that extending it hour by hour does
+            # not copy the arrays every time
+            capacity = max(width, 2 * capacity if width > capacity else capacity)
+            for name in ('_departures', '_arrivals'):
+                resized = np.zeros((len(stations), capacity), dtype=np.int64)
+                resized[:len(self.stations), offset:offset + self._width] = getattr(self, name)[:, :self._width]
+                setattr(self, name, resized)
+        self.stations, self.first_hour, self._width = stations, first_hour, width
+
+    def extend(self, df):
+        """
+        Adds trips to the series, e.g. the trips of the hours that arrived since the last call.
+
+        New stations are appended after the existing ones (in alphabetical order) and the hours
+        before or after the current range are added; trips of hours already in the series are
+        added to their counts.
+
+        Args:
+            df (DataFrame) - Pandas DataFrame with 'Start Time', 'End Time', 'Start Station' and
+                             'End Station' columns
+        """
+        new_stations = station_index(df).difference(self.stations, sort=False)
+        stations = self.stations.append(new_stations.sort_values()).rename('station')
+        sides = [(_trip_hours(df['Start Time']), station_ids(df['Start Station'], stations), 'departures'),
+                 (_trip_hours(df['End Time']), station_ids(df['End Station'], stations), 'arrivals')]
+
+        # Grow the arrays once to cover every new station and hour
+        first_hour = self.first_hour
+        last_hour = None if first_hour is None else first_hour + self.departures.shape[1] - 1
+        known = np.concatenate([hours[hours >= 0] for hours, _, _ in sides])
+        if len(known):
+            first_hour = int(known.min()) if first_hour is None else min(first_hour, int(known.min()))
+            last_hour = int(known.max()) if last_hour is None else max(last_hour, int(known.max()))
+        self._resize(stations, first_hour, last_hour)
+
+        # Bin every trip into its (station, hour) cell with one unbuffered addition per side
+        for hours, ids, name in sides:
+            counts = getattr(self, '_' + name)
+            valid = (hours >= 0) & (ids >= 0)
+            np.add.at(counts, (ids[valid], hours[valid] - first_hour), 1)
+
+    def series(self, kind="departures"):
+        """
+        Gives the demand of one kind as an array.
+
+        Args:
+            (str) kind - Demand among DEMAND_KINDS, "total" adding departures and arrivals
+
+        Returns:
+            ndarray - Demand of each station (rows) in each hour (columns)
+
+        Raises:
+            ValueError - If the kind is unknown
+        """
+        if kind not in DEMAND_KINDS:
+            raise ValueError(f"Unknown demand kind: {kind}. Use one of {', '.join(DEMAND_KINDS)}.")
+        if kind == "total":
+            return self.departures + self.arrivals
+        return getattr(self, kind)
+
+    def net_flow(self):
+        """
+        Gives the bikes each station gains per hour, e.g. to plan rebalancing.
+
+        Returns:
+            ndarray - Arrivals minus departures of each station in each hour; a negative value
+                      means the station loses bikes
+        """
+        return self.arrivals - self.departures
+
+    def rolling(self, window, kind="departures"):
+        """
+        Sums the demand over a rolling window of hours, using cumulative sums.
+
+        Args:
+            (int) window - Number of hours of the window, e.g. 1 or 24
+            (str) kind - Demand among DEMAND_KINDS, or "net" for the net flow
+
+        Returns:
+            ndarray - Demand of each station over the window ending with each hour (inclusive);
+                      the first hours sum the available hours only
+
+        Raises:
+            ValueError - If the window is shorter than one hour or the kind is unknown
+        """
+        if window < 1:
+            raise ValueError(f"The window must be at least 1 hour, got {window}.")
+        counts = self.net_flow() if kind == "net" else self.series(kind)
+        cumulative = np.zeros((counts.shape[0], counts.shape[1] + 1), dtype=np.int64)
+        np.cumsum(counts, axis=1, out=cumulative[:, 1:])
+        starts = np.maximum(np.arange(counts.shape[1]) + 1 - window, 0)
+        return cumulative[:, 1:] - cumulative[:, starts]
+
+    def hour_of_day_profile(self, kind="departures"):
+        """
+        Sums the demand of each station by hour of the day, over all the days of the series.
+
+        Args:
+            (str) kind - Demand among DEMAND_KINDS
+
+        Returns:
+            DataFrame - Demand of each station (rows) for each hour of the day 0-23 (columns)
+        """
+        counts = self.series(kind)
+        # Pad the series to whole days starting at midnight, then sum over the days
+        before = (self.first_hour or 0) % 24
+        after = -(before + counts.shape[1]) % 24
+        padded = np.pad(counts, ((0, 0), (before, after)))
+        profile = padded.reshape(len(counts), -1, 24).sum(axis=1)
+        return pd.DataFrame(profile, index=self.stations, columns=pd.RangeIndex(24, name='hour'))
+
+    def peak_hours(self, window=1, kind="departures"):
+        """
+        Finds the busiest window of each station.
+
+        Args:
+            (int) window - Number of hours of the window, e.g. 1 or 24
+            (str) kind - Demand among DEMAND_KINDS
+
+        Returns:
+            DataFrame - Per station, the first hour of its busiest window ('peak_start', the
+                        earliest on ties), the demand over it ('peak_demand') and the hour of the
+                        day with the most demand overall ('peak_hour_of_day')
+
+        Raises:
+            ValueError - If the window is shorter than one hour or the kind is unknown
+        """
+        rolling = self.rolling(window, kind)
+        if not rolling.shape[1]:
+            return pd.DataFrame(columns=['peak_start', 'peak_demand', 'peak_hour_of_day'],
+                                index=self.stations)
+        ends = rolling.argmax(axis=1)
+        return pd.DataFrame({
+            'peak_start': self.hours[np.maximum(ends + 1 - window, 0)],
+            'peak_demand': rolling[np.arange(len(ends)), ends],
+            'peak_hour_of_day': self.hour_of_day_profile(kind).to_numpy().argmax(axis=1),
+        }, index=self.stations)
+
+    def to_frame(self, kind="departures"):
+        """
+        Converts the demand of one kind into a DataFrame.
+
+        Args:
+            (str) kind - Demand among DEMAND_KINDS
+
+        Returns:
+            DataFrame - Demand of each station (rows) in each hour (columns, see hours)
+        """
+        return pd.DataFrame(self.series(kind), index=self.stations, columns=self.hours)
@@ -0,0 +1,227 @@
+import math
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import clean_trip_duration
+
+# Largest relative error of the quantiles read from a histogram
+DURATION_RELATIVE_ERROR = 0.01
+# Default quantiles of the duration profiles
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+# Trips shorter than this are counted as short outliers (false starts, re-docked bikes), in seconds
+SHORT_TRIP_SECONDS = 60
+# Trips of at least this duration are counted as long outliers, in seconds
+LONG_TRIP_SECONDS = 3 * 3600
+
+def duration_bin_edges(max_duration, relative_error=DURATION_RELATIVE_ERROR):
+    """
+    Gives the edges of logarithmic duration bins, narrow enough for a given quantile accuracy.
+
+    Args:
+        (float) max_duration - Upper bound of the valid durations, in seconds
+        (float) relative_error - Largest relative error of a value read from its bin
+
+    Returns:
+        ndarray - Edges 0, 1, gamma, gamma^2, ... up to max_duration, with gamma = (1 + e) / (1 - e)
+    """
+    gamma = (1 + relative_error) / (1 - relative_error)
+    powers = math.ceil(math.log(max_duration) / math.log(gamma))
+    return np.concatenate([[0.0], gamma ** np.arange(powers + 1)])
+
+class DurationHistogram:
+    """
+    Mergeable histogram of valid trip durations, answering quantiles without sorting the durations.
+
+    The bins are logarithmic, so every quantile is within the relative error of the bin edges;
+    the count, sum, minimum and maximum are exact. Histograms with the same edges (same schema
+    and relative error) merge by adding their counts, e.g. across chunks, cities or time buckets.
+
+    Attributes:
+        edges (ndarray) - Edges of the bins, in seconds
+        counts (ndarray) - Number of valid durations in each bin
+        (float) total - Sum of the valid durations, in seconds
+        (float) minimum - Shortest valid duration, None if there is none
+        (float) maximum - Longest valid duration, None if there is none
+        (int) invalid - Number of missing or invalid durations (see clean_trip_duration)
+        (int) short_trips - Number of valid durations under SHORT_TRIP_SECONDS
+        (int) long_trips - Number of valid durations of at least LONG_TRIP_SECONDS
+    """
+
+    def __init__(self, edges, counts=None, total=0.0, minimum=None, maximum=None, invalid=0,
+                 short_trips=0, long_trips=0):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64) if counts is None else counts
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+        self.invalid = invalid
+        self.short_trips = short_trips
+        self.long_trips = long_trips
+
+    @property
+    def count(self):
+        """(int) - Number of valid durations."""
+        return int(self.counts.sum())
+
+    @classmethod
+    def from_durations(cls, durations, schema=None, relative_error=DURATION_RELATIVE_ERROR):
+        """
+        Builds the histogram of trip durations, cleaned like trip_duration_stats.
+
+        Args:
+            durations (Series) - 'Trip Duration' column, raw or validated
+            (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+            (float) relative_error - Largest relative error of the quantiles
+
+        Returns:
+            DurationHistogram - Distribution of the valid durations
+        """
+        return duration_histograms(pd.DataFrame({'Trip Duration': durations}), schema=schema,
+                                   relative_error=relative_error)[None]
+
+    def merge(self, other):
+        """
+        Combines two histograms, as if they had been built from all their durations.
+
+        Args:
+            other (DurationHistogram) - Histogram with the same edges
+
+        Returns:
+            DurationHistogram - Histogram of the durations of both inputs
+
+        Raises:
+            ValueError - If the histograms do not have the same edges
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only histograms with the same bin edges can be merged.")
+        extremes = [value for value in (self.minimum, other.minimum) if value is not None]
+        highest = [value for value in (self.maximum, other.maximum) if value is not None]
+        return DurationHistogram(self.edges, self.counts + other.counts, self.total + other.total,
+                                 min(extremes) if extremes else None, max(highest) if highest else None,
+                                 self.invalid + other.invalid, self.short_trips + other.short_trips,
+                                 self.long_trips + other.long_trips)
+
+    def quantile(self, q):
+        """
+        Gives a quantile of the valid durations (nearest rank), within the relative error of the bins.
+
+        Args:
+            (float) q - Quantile between 0 and 1, e.g. 0.9 for the 90th percentile
+
+        Returns:
+            (float) - Duration in seconds, None if there is no valid duration
+        """
+        count = self.count
+        if not count:
+            return None
+        rank = max(1, math.ceil(q * count))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        low, high = self.edges[index], self.edges[index + 1]
+        # The harmonic mean of the edges is within the relative error of every value of the bin
+        value = 2 * low * high / (low + high) if low > 0 else high / 2
+        return float(min(max(value, self.minimum), self.maximum))
+
+    def summary(self, quantiles=DEFAULT_QUANTILES):
+        """
+        Summarizes the distribution.
+
+        Args:
+            (tuple) quantiles - Quantiles to report, e.g. 0.5 for the median
+
+        Returns:
+            dict - 'count', 'mean', 'min', 'max', one 'p<percent>' entry per quantile (e.g.
+                   'p90'), 'short_trips', 'long_trips' and 'invalid'; durations in seconds
+        """
+        count = self.count
+        summary = {'count': count, 'mean': self.total / count if count else None,
+                   'min': self.minimum, 'max': self.maximum}
+        for q in quantiles:
+            summary[f"p{q * 100:g}"] = self.quantile(q)
+        summary.update(short_trips=self.short_trips, long_trips=self.long_trips, invalid=self.invalid)
+        return summary
+
+def duration_histograms(df, by=None, schema=None, relative_error=DURATION_RELATIVE_ERROR):
+    """
+    Builds one duration histogram per group of trips, in a single pass.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame with a 'Trip Duration' column and the column to group by
+        (str) by - Optional column to build one histogram per value of, e.g. 'hour' or 'Start Station'
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+        (float) relative_error - Largest relative error of the quantiles
+
+    Returns:
+        dict - DurationHistogram of each value of the group column (sharing the same edges), or a
+               single histogram under the key None when no group column is given
+    """
+    schema = schema or bike_investigation.VALIDATION_SCHEMA
+    edges = duration_bin_edges(schema['max_trip_duration'], relative_error)
+    durations = clean_trip_duration(df['Trip Duration'], schema).to_numpy(dtype=np.float64, na_value=np.nan)
+
+    if by is None:
+        group_codes, group_keys = np.zeros(len(df), dtype=np.int64), [None]
+    else:
+        group_codes, group_keys = pd.factorize(df[by], sort=True)
+    known = group_codes >= 0
+    valid = known & ~np.isnan(durations)
+
+    # Count every (group, bin) pair in one bincount
+    size, groups = len(edges) - 1, len(group_keys)
+    bins = np.clip(np.searchsorted(edges, durations[valid], side='right') - 1, 0, size - 1)
+    codes = group_codes[valid]
+    counts = np.bincount(codes * size + bins, minlength=groups * size).reshape(groups, size)
+    totals = np.bincount(codes, weights=durations[valid], minlength=groups)
+    short_trips = np.bincount(codes[durations[valid] < SHORT_TRIP_SECONDS], minlength=groups)
+    long_trips = np.bincount(codes[durations[valid] >= LONG_TRIP_SECONDS], minlength=groups)
+    invalid = np.bincount(group_codes[known & np.isnan(durations)], minlength=groups)
+    minimums = pd.Series(durations[valid]).groupby(codes).min().reindex(range(groups))
+    maximums = pd.Series(durations[valid]).groupby(codes).max().reindex(range(groups))
+
+    histograms = {}
+    for code, key in enumerate(group_keys):
+        histograms[key.item() if isinstance(key, np.generic) else key] = DurationHistogram(
+            edges, counts[code], float(totals[code]),
+            None if pd.isna(minimums[code]) else float(minimums[code]),
+            None if pd.isna(maximums[code]) else float(maximums[code]),
+            int(invalid[code]), int(short_trips[code]), int(long_trips[code]))
+    return histograms
+
+def merge_histograms(left, right):
+    """
+    Combines two sets of histograms returned by duration_histograms, group by group.
+
+    Args:
+        (dict) left - Histograms keyed by group
+        (dict) right - Histograms keyed by group, with the same edges
+
+    Returns:
+        dict - Histograms of the durations of both inputs, for every group of either
+    """
+    merged = dict(left)
+    for key, histogram in right.items():
+        merged[key] = merged[key].merge(histogram) if key in merged else histogram
+    return merged
+
+def duration_profile(df, by=None, quantiles=DEFAULT_QUANTILES, schema=None):
+    """
+    Tabulates the trip duration distribution of each group of trips.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data (e.g. returned by load_data), or
+                         an iterable of DataFrames to stream over
+        (str) by - Optional column to group by, e.g. 'hour' or 'Start Station'
+        (tuple) quantiles - Quantiles to report
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+    Returns:
+        DataFrame - One row per group (a single row without group column) with the summary of its
+                    histogram, see DurationHistogram.summary
+    """
+    chunks = [df] if isinstance(df, pd.DataFrame) else df
+    histograms = {}
+    for chunk in chunks:
+        histograms = merge_histograms(histograms, duration_histograms(chunk, by, schema))
+    table = pd.DataFrame.from_dict({key: histogram.summary(quantiles) for key, histogram in histograms.items()},
+                                   orient='index')
+    table.index.name = by
+    return table
@@ -1,6 +1,22 @@
+import hashlib
+import io
+import json
+import os
+import threading
 import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+from bike_binary_store import is_trip_store, open_trip_store
+from bike_metrics import instrument, measure
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # The columnar cache is optional, without pyarrow the CSV files are parsed on every load
+    pa = pc = pq = None
 
 # Dictionary mapping city names to their corresponding CSV file paths
 CITY_DATA = {
@@ -9,10 +25,64 @@ CITY_DATA = {
     "washington": "Bike_raw_data/washington.csv",
 }
 
-def get_filters():
+# Directory holding the columnar Parquet cache built from the CITY_DATA files
+CACHE_DIR = "Bike_raw_data/.cache"
+# Version of the cache layout, bumped whenever the content of the cached files changes
+CACHE_VERSION = 3
+# Number of trips per Parquet row group, the unit skipped by the month filter
+CACHE_ROW_GROUP_SIZE = 100_000
+# Number of CSV rows parsed at a time when a month filter is applied without the cache
+CSV_CHUNK_SIZE = 500_000
+# Set to False to always parse the CSV files instead of using the Parquet cache
+USE_CACHE = True
+# Memory budget of the loaded cities kept in memory between load_data calls, 0 to disable
+FRAME_CACHE_BYTES = 1 << 30
+# Repeated string columns stored dictionary-encoded (pandas category dtype)
+CATEGORICAL_COLUMNS = ["Start Station", "End Station", "User Type", "Gender"]
+
+# Rules applied by validate_data (and by the stat functions on data that was not validated):
+# values outside these vocabularies and ranges are replaced by nulls
+VALIDATION_SCHEMA = {
+    "user_types": ["subscriber", "customer"],
+    "genders": ["male", "female"],
+    "birth_year_range": (1900, None),  # None stands for the current year
+    "max_trip_duration": 86400,  # Trips of one day or longer are unrealistic
+}
+
+# Set to True to silence the console output of the analysis (results, timings and warnings);
+# the timings are still recorded in bike_metrics.REGISTRY
+QUIET = False
+
+# Layout of the timestamps of the city files, parsed without inferring the format; the pattern
+# selects the values in that layout for the fast pyarrow conversion, which accepts any ISO 8601
+# variant
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIMESTAMP_PATTERN = r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$"
+
+# Calendar names indexed by the integer codes of pandas (month - 1, dayofweek)
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Console output of the current thread held back while it is a list (see _prefetch)
+_ECHO_BUFFER = threading.local()
+
+def _echo(*args, **kwargs):
+    """Prints to the console unless the quiet mode (QUIET) is enabled."""
+    messages = getattr(_ECHO_BUFFER, 'messages', None)
+    if messages is not None:
+        messages.append((args, kwargs))
+    elif not QUIET:
+        print(*args, **kwargs)
+
+def get_filters(on_city=None):
     """
     Asks the user to specify a city, month, and day to analyze.
 
+    Args:
+        (callable) on_city - Optional function called with the city as soon as it is selected,
+                             e.g. prefetch_city to load it while the other prompts are answered
+
     Returns:
         (str) city - Name of the city to analyze
         (str) month - Name of the month to filter by, or "all" to apply no month filter
@@ -29,6 +99,8 @@ def get_filters():
         city = input("Select a city from Chicago, New York City, or Washington: ").lower()
         if city not in cities:
             print("Invalid input. Please choose from Chicago, New York City, or Washington.")
+    if on_city is not None:
+        on_city(city)
     
     # Define available months
     months = ["january", "february", "march", "april", "may", "june", "all"]
@@ -53,47 +125,1295 @@ def get_filters():
     print("-" * 40)  # Print a separator line for better readability
     return city, month, day
 
-def load_data(city, month, day):
+def file_fingerprint(path):
+    """
+    Describes the current state of a source file, used to invalidate the data derived from it.
+
+    Args:
+        (str) path - Path of the source file
+
+    Returns:
+        dict - The modification time (in nanoseconds) and the size (in bytes) of the file
+    """
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+def file_hash(path, block_size=1 << 20):
+    """
+    Computes the SHA-256 digest of a file, reading it block by block.
+
+    Args:
+        (str) path - Path of the file to hash
+        (int) block_size - Number of bytes read at a time
+
+    Returns:
+        (str) - Hexadecimal digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def calendar_code(names, value):
+    """
+    Converts a month or day name into the integer code used by pandas.
+
+    Args:
+        (list) names - MONTH_NAMES or DAY_NAMES
+        (str) value - Name to convert (case insensitive), or "all"
+
+    Returns:
+        (int) - 1-12 for a month, 0-6 for a day (Monday is 0), None for "all" and -1 for an
+                unknown name, which matches no trip
+    """
+    value = value.lower()
+    if value == 'all':
+        return None
+    lowered = [name.lower() for name in names]
+    if value not in lowered:
+        return -1
+    return lowered.index(value) + (1 if names is MONTH_NAMES else 0)
+
+def parse_timestamps(values):
+    """
+    Parses timestamps in the layout of the city files (TIMESTAMP_FORMAT) without inferring it.
+
+    The column is parsed in one vectorized pass: when pyarrow is installed, the values that follow
+    the layout (TIMESTAMP_PATTERN) are cast by pyarrow and only those that are not valid dates
+    (e.g. '2017-02-30 00:00:00') are handed to pandas; otherwise pandas parses the whole column
+    with TIMESTAMP_FORMAT. The values in another layout (e.g. '23/06/2017 15:09:32' or
+    '2017-06-23T15:09') and the invalid dates become NaT and are counted as invalid, so no
+    day/month order is guessed.
+
+    Args:
+        values (Series) - Raw timestamps
+
+    Returns:
+        (tuple) - Series of datetimes (NaT for the missing and invalid values) and number of
+                  invalid values
+    """
+    if pa is not None:
+        array = pa.array(values, from_pandas=True)
+        if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+            layout = pc.fill_null(pc.match_substring_regex(array, TIMESTAMP_PATTERN), False)
+            array = pc.if_else(layout, array, pa.scalar(None, array.type))
+            retry = None
+            try:
+                parsed = pc.cast(array, pa.timestamp('us'))
+            except pa.ArrowInvalid:
+                # Some dates do not exist: strptime rolls them over (February 30 becomes March 2)
+                # instead of failing, so the values whose day changed are left to pandas
+                parsed = pc.strptime(array, format=TIMESTAMP_FORMAT, unit='us', error_is_null=True)
+                days = pc.cast(pc.utf8_slice_codeunits(array, 8, 10), pa.int64())
+                retry = pc.and_(layout, pc.fill_null(pc.not_equal(pc.day(parsed), days), True))
+                retry = retry.to_numpy(zero_copy_only=False)
+            times = pd.Series(parsed.to_numpy(zero_copy_only=False), index=values.index, name=values.name)
+            if retry is not None and retry.any():
+                times[retry] = pd.to_datetime(values[retry], format=TIMESTAMP_FORMAT, errors='coerce').to_numpy()
+            return times, int((times.isna() & values.notna()).sum())
+
+    times = pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors='coerce')
+    return times, int((times.isna() & values.notna()).sum())
+
+def _report_invalid_timestamps(invalid):
+    """Warns about the invalid timestamps counted in each column, if there is any."""
+    if any(invalid.values()):
+        _echo("Warning: invalid timestamps were set to missing: "
+              + ", ".join(f"{count} in `{column}`" for column, count in invalid.items() if count))
+
+def _parse_times(df, report=True):
+    """
+    Converts 'Start Time' and 'End Time' to datetimes when both columns are present.
+
+    The number of invalid timestamps of each column is stored in df.attrs['invalid_timestamps']
+    and reported on the console, unless report is False (e.g. for a chunk of a larger file).
+    """
+    if 'Start Time' in df.columns and 'End Time' in df.columns:
+        with measure('load_data.parse_times', df):
+            invalid = {}
+            for column in ('Start Time', 'End Time'):
+                df[column], invalid[column] = parse_timestamps(df[column])
+        df.attrs['invalid_timestamps'] = invalid
+        if report:
+            _report_invalid_timestamps(invalid)
+    return df
+
+def calendar_codes(times):
+    """
+    Derives the month, day of the week and hour of datetimes as small integers, in one pass.
+
+    Args:
+        times (Series) - Datetimes, e.g. the 'Start Time' column
+
+    Returns:
+        (tuple) - int8 ndarrays of the month (1-12), day of the week (0-6, Monday as 0) and
+                  hour (0-23), -1 where the datetime is missing
+    """
+    values = times.to_numpy(dtype='datetime64[s]')
+    valid = ~np.isnat(values)
+    days, seconds = np.divmod(values.astype(np.int64), 86400)
+    hour = seconds // 3600
+    day_of_week = (days + 3) % 7  # 1970-01-01 was a Thursday
+
+    # Month of the civil date of each day since 1970-01-01 (Gregorian calendar)
+    shifted = days + 719468
+    day_of_era = shifted - (shifted // 146097) * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    month_from_march = (5 * day_of_year + 2) // 153
+    month = np.where(month_from_march < 10, month_from_march + 3, month_from_march - 9)
+
+    return tuple(np.where(valid, field, -1).astype(np.int8) for field in (month, day_of_week, hour))
+
+def iter_csv_chunks(path, chunksize, month=None):
+    """
+    Parses a city CSV file chunk by chunk.
+
+    Args:
+        (str) path - Path of the CSV file
+        (int) chunksize - Number of rows parsed at a time
+        (int) month - Optional month number (1-12) to keep
+
+    Yields:
+        df - Pandas DataFrame with the trips of the chunk (starting in the month, if given) and
+             'Start Time' and 'End Time' parsed as datetimes; the invalid timestamps of the chunk
+             are counted in its attrs, and one warning with the totals follows the last chunk
+    """
+    invalid = Counter()
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk = _parse_times(chunk, report=False)
+        invalid.update(chunk.attrs.get('invalid_timestamps', {}))
+        if month is not None and 'Start Time' in chunk.columns:
+            chunk = chunk[calendar_codes(chunk['Start Time'])[0] == month]
+        yield chunk
+    _report_invalid_timestamps(invalid)
+
+def source_metadata(path):
+    """
+    Records the state of a source file, to store alongside the data derived from it.
+
+    Args:
+        (str) path - Path of the source file
+
+    Returns:
+        dict - The fingerprint (see file_fingerprint) and the SHA-256 digest ('sha256') of the file
+    """
+    return dict(file_fingerprint(path), sha256=file_hash(path))
+
+def source_unchanged(path, metadata, save=None):
+    """
+    Checks whether a source file still matches the state recorded by source_metadata.
+
+    The file is unchanged when it has the same size and modification time. When only the
+    modification time differs, the content hash decides, so touching the file does not
+    invalidate the derived data; the new modification time is then stored in metadata and
+    persisted with save, so that the next checks do not hash the file again.
+
+    Args:
+        (str) path - Path of the source file
+        (dict) metadata - State recorded by source_metadata
+        (callable) save - Optional function writing the updated metadata back, called without
+                          arguments; an OSError it raises is ignored
+
+    Returns:
+        (bool) - True if the data derived from the file is still up to date
+    """
+    fingerprint = file_fingerprint(path)
+    if fingerprint['size'] != metadata.get('size'):
+        return False
+    if fingerprint['mtime_ns'] == metadata.get('mtime_ns'):
+        return True
+
+    # The file was touched, compare its content before discarding the derived data
+    if file_hash(path) != metadata.get('sha256'):
+        return False
+    metadata.update(fingerprint)
+    if save is not None:
+        try:
+            save()
+        except OSError:
+            pass  # The derived data stays usable, the hash is simply recomputed on the next check
+    return True
+
+@instrument('load_data.read_csv')
+def read_city_csv(path, month=None):
+    """
+    Parses a city CSV file into a typed DataFrame.
+
+    When a month is given, the file is parsed chunk by chunk and only the trips starting in that
+    month are kept, so the peak memory follows the size of the result rather than of the file.
+
+    Args:
+        (str) path - Path of the CSV file
+        (int) month - Optional month number (1-12) to keep
+
+    Returns:
+        df - Pandas DataFrame with 'Start Time' and 'End Time' parsed as datetimes and the
+             repeated string columns dictionary-encoded as categories
+    """
+    if month is None:
+        df = _parse_times(pd.read_csv(path))
+    else:
+        chunks = list(iter_csv_chunks(path, CSV_CHUNK_SIZE, month))
+        # pd.concat drops attrs that differ between chunks, so the counts are added up here
+        invalid = Counter()
+        for chunk in chunks:
+            invalid.update(chunk.attrs.get('invalid_timestamps', {}))
+        df = pd.concat(chunks, ignore_index=True)
+        if invalid:
+            df.attrs['invalid_timestamps'] = dict(invalid)
+
+    # Dictionary-encode the station and user columns
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    return df
+
+def cache_paths(city):
+    """
+    Gives the location of the cached data of a city.
+
+    Args:
+        (str) city - Name of the city
+
+    Returns:
+        (tuple) - Path of the Parquet file and path of its JSON metadata file
+    """
+    name = city.replace(' ', '_')
+    return (os.path.join(CACHE_DIR, f"{name}.parquet"),
+            os.path.join(CACHE_DIR, f"{name}.json"))
+
+def _read_cache_metadata(meta_path):
+    """Reads the metadata of a cached city, or returns None if it is missing or unreadable."""
+    try:
+        with open(meta_path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache_metadata(meta_path, metadata):
+    """Writes the metadata of a cached city atomically."""
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(metadata, file)
+    os.replace(tmp_path, meta_path)
+
+def is_cache_valid(city):
+    """
+    Checks whether the cached data of a city still matches its source file.
+
+    The cache is valid when it was written with the current CACHE_VERSION and the source file is
+    unchanged since (see source_unchanged), so touching the source file does not trigger a rebuild.
+
+    Args:
+        (str) city - Name of the city
+
+    Returns:
+        (bool) - True if the cached Parquet file can be used in place of the source file
+    """
+    parquet_path, meta_path = cache_paths(city)
+    metadata = _read_cache_metadata(meta_path)
+    if metadata is None or metadata.get('version') != CACHE_VERSION or not os.path.exists(parquet_path):
+        return False
+
+    return source_unchanged(CITY_DATA[city], metadata, save=lambda: _write_cache_metadata(meta_path, metadata))
+
+def sort_trips(df):
+    """
+    Orders trips by start time, the order in which the Parquet cache stores them.
+
+    Args:
+        df - Pandas DataFrame of trips
+
+    Returns:
+        df - The trips sorted by 'Start Time' (stable, missing times last) with a fresh index,
+             or df itself when it is already in that order or has no 'Start Time' column
+    """
+    if 'Start Time' not in df.columns:
+        return df
+    if df['Start Time'].is_monotonic_increasing and df.index.equals(pd.RangeIndex(len(df))):
+        return df
+    return df.sort_values('Start Time', kind='stable', ignore_index=True)
+
+def write_cache(city, df):
+    """
+    Stores the parsed data of a city in the Parquet cache.
+
+    The trips are stored sorted by start time (see sort_trips), so each row group covers a narrow
+    time range, which lets the month filter skip row groups from their min/max statistics.
+
+    Args:
+        (str) city - Name of the city
+        df - Pandas DataFrame returned by read_city_csv for the city
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    parquet_path, meta_path = cache_paths(city)
+    source_path = CITY_DATA[city]
+    metadata = dict(source_metadata(source_path), version=CACHE_VERSION)
+    df = sort_trips(df)
+
+    # Write to a temporary file first so a concurrent reader never sees a partial cache
+    tmp_path = parquet_path + '.tmp'
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path,
+                   row_group_size=CACHE_ROW_GROUP_SIZE)
+    os.replace(tmp_path, parquet_path)
+    _write_cache_metadata(meta_path, metadata)
+
+def month_row_groups(parquet_file, month):
+    """
+    Selects the row groups of a cached city file that can contain trips of a given month.
+
+    Args:
+        parquet_file (ParquetFile) - Cached city file
+        (int) month - Month number (1-12)
+
+    Returns:
+        list - Indices of the row groups whose 'Start Time' min/max statistics overlap the month
+               (in any year), or of all the row groups if the statistics are missing
+    """
+    metadata = parquet_file.metadata
+    every_group = list(range(metadata.num_row_groups))
+    if 'Start Time' not in parquet_file.schema_arrow.names:
+        return every_group
+    column = parquet_file.schema_arrow.names.index('Start Time')
+
+    selected = []
+    for index in every_group:
+        statistics = metadata.row_group(index).column(column).statistics
+        if statistics is None or not statistics.has_min_max:
+            return every_group
+        if statistics.min is None:
+            continue  # Only missing start times, which never match a month
+        first, last = pd.Timestamp(statistics.min), pd.Timestamp(statistics.max)
+        # Compare months counted from year 0, so row groups spanning a new year are handled
+        first_index = first.year * 12 + first.month - 1
+        last_index = last.year * 12 + last.month - 1
+        if any(first_index <= year * 12 + month - 1 <= last_index for year in range(first.year, last.year + 1)):
+            selected.append(index)
+    return selected
+
+@instrument('load_data.read_cache')
+def read_cache(city, month=None):
+    """
+    Reads the cached data of a city, skipping the row groups outside the month filter.
+
+    Args:
+        (str) city - Name of the city
+        (int) month - Optional month number (1-12) to keep
+
+    Returns:
+        df - Pandas DataFrame with the cached trips of the city (or of the row groups that can
+             contain the month)
+    """
+    parquet_file = pq.ParquetFile(cache_paths(city)[0])
+    if month is None:
+        return parquet_file.read().to_pandas()
+    return parquet_file.read_row_groups(month_row_groups(parquet_file, month)).to_pandas()
+
+def iter_city_chunks(city, chunksize, month=None):
+    """
+    Reads the trips of a city chunk by chunk, without ever loading the whole file.
+
+    The chunks come from the memory-mapped trip store when CITY_DATA points to one, from the
+    Parquet cache when it is up to date (skipping the row groups outside the month), otherwise
+    from the CSV file. The cache is never built here, since building it requires the whole file
+    in memory.
+
+    Args:
+        (str) city - Name of the city to load
+        (int) chunksize - Maximum number of trips per chunk
+        (int) month - Optional month number (1-12) to restrict the read to
+
+    Yields:
+        df - Pandas DataFrame with parsed datetimes for each chunk of trips
+    """
+    if is_trip_store(CITY_DATA[city]):
+        df = open_trip_store(CITY_DATA[city])
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    elif USE_CACHE and pq is not None and is_cache_valid(city):
+        parquet_file = pq.ParquetFile(cache_paths(city)[0])
+        row_groups = None if month is None else month_row_groups(parquet_file, month)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, row_groups=row_groups):
+            yield batch.to_pandas()
+    else:
+        yield from iter_csv_chunks(CITY_DATA[city], chunksize, month)
+
+def load_city_data(city, month=None):
+    """
+    Loads the trips of a city, reading the Parquet cache when it is up to date.
+
+    The first load parses the CSV file and writes the cache; later loads only read the cache,
+    until the source file changes. When a month is given, only the row groups (or CSV chunks)
+    that can contain trips of that month are read. When CITY_DATA points to a trip store (see
+    bike_binary_store), its memory-mapped columns are returned without any parsing or copy.
+
+    Args:
+        (str) city - Name of the city to load
+        (int) month - Optional month number (1-12) to restrict the read to
+
+    Returns:
+        df - Pandas DataFrame with parsed datetimes and dictionary-encoded string columns; with a
+             month, it contains at least every trip starting in that month. With the cache, the
+             trips are sorted by start time (see sort_trips), on the first load as on the next ones
+
+    Raises:
+        FileNotFoundError - If the source file of the city does not exist
+    """
+    source_path = CITY_DATA[city]
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(source_path)
+
+    if is_trip_store(source_path):
+        return open_trip_store(source_path)
+
+    if not USE_CACHE or pq is None:
+        return read_city_csv(source_path, month)
+
+    if is_cache_valid(city):
+        return read_cache(city, month)
+
+    # Sort the trips like the cache does, so the first load returns the same frame as the next ones
+    df = sort_trips(read_city_csv(source_path))
+    try:
+        write_cache(city, df)
+    except OSError:
+        pass  # The cache directory is not writable, the analysis still works from the CSV file
+    return df
+
+@instrument('load_data.filter')
+def filter_data(df, month, day, compact=False):
+    """
+    Filters trips by month and day and adds the 'month', 'day_of_week' and 'hour' columns.
+
+    The derived columns are kept as they are when df already has them (e.g. a DataFrame returned
+    by load_data), so a loaded city can be filtered again without deriving them a second time.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame with parsed 'Start Time' and 'End Time' columns
+        (str) month - Name of the month to filter by, or "all" to apply no month filter
+        (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+        (bool) compact - True to store the derived columns as small integers (month 1-12,
+                         day of the week 0-6 with Monday as 0) instead of names
+
+    Returns:
+        df - Pandas DataFrame with the matching trips, or df unchanged if it has no temporal columns
+    """
+    # Convert the filters into integer month (1-12) and day of the week (0-6) codes
+    month_code = calendar_code(MONTH_NAMES, month)
+    day_code = calendar_code(DAY_NAMES, day)
+
+    if 'Start Time' in df.columns and 'End Time' in df.columns:
+        derived = {'month', 'day_of_week', 'hour'}.issubset(df.columns)
+        if derived and month_code is None and day_code is None:
+            return df
+
+        # Filter by month and day on the integer codes, before building any derived column
+        months, days, hours = calendar_codes(df['Start Time'])
+        if month_code is not None or day_code is not None:
+            keep = np.ones(len(df), dtype=bool)
+            if month_code is not None:
+                keep &= months == month_code
+            if day_code is not None:
+                keep &= days == day_code
+            df, months, days, hours = df[keep], months[keep], days[keep], hours[keep]
+            if not derived:
+                df = df.copy()  # Detach the filtered rows before adding the derived columns
+
+        if derived:
+            return df
+
+        # Add month, day of the week, and hour from the codes of 'Start Time'
+        if compact:
+            df['month'] = pd.arrays.IntegerArray(months, months < 0)
+            df['day_of_week'] = pd.arrays.IntegerArray(days, days < 0)
+            df['hour'] = pd.arrays.IntegerArray(hours, hours < 0)
+        else:
+            df['month'] = _code_names(months, MONTH_NAMES, 1, df.index)
+            df['day_of_week'] = _code_names(days, DAY_NAMES, 0, df.index)
+            df['hour'] = pd.arrays.IntegerArray(hours.astype(np.int64), hours < 0)
+
+    return df
+
+def _code_names(codes, names, offset, index):
+    """Converts calendar codes (-1 for missing) into a Series of names, NaN for the missing ones."""
+    lookup = np.array(list(names) + [np.nan], dtype=object)
+    return pd.Series(lookup[np.where(codes >= 0, codes - offset, len(names))], index=index)
+
+@instrument('load_data.optimize_dtypes')
+def optimize_dtypes(df):
+    """
+    Converts the columns of a trip DataFrame to their most compact dtypes.
+
+    Repeated strings become categories, the derived calendar columns become Int8 codes (see
+    filter_data), 'Trip Duration' becomes float32, 'Birth Year' becomes Int16 and the other
+    integer columns are downcast. The statistics computed on the result are the same, except
+    for the float32 rounding of the durations.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data
+
+    Returns:
+        df - Pandas DataFrame sharing the columns that are already compact with df
+    """
+    compact = df.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        if column in compact.columns and not isinstance(compact[column].dtype, pd.CategoricalDtype):
+            compact[column] = compact[column].astype('category')
+
+    # Replace the month and day names with their codes
+    for column, names, offset in (('month', MONTH_NAMES, 1), ('day_of_week', DAY_NAMES, 0)):
+        if column in compact.columns and not pd.api.types.is_numeric_dtype(compact[column]):
+            compact[column] = compact[column].map({name: code for code, name in enumerate(names, offset)}).astype('Int8')
+    if 'hour' in compact.columns:
+        compact['hour'] = compact['hour'].astype('Int8')
+
+    if 'Trip Duration' in compact.columns:
+        compact['Trip Duration'] = pd.to_numeric(compact['Trip Duration'], errors='coerce').astype('float32')
+
+    if 'Birth Year' in compact.columns:
+        birth_years = pd.to_numeric(compact['Birth Year'], errors='coerce')
+        known = birth_years.dropna()
+        if (known % 1 == 0).all() and known.between(-2**15, 2**15 - 1).all():
+            compact['Birth Year'] = birth_years.astype('Int16')
+
+    # Downcast the remaining integer columns (e.g. the trip id)
+    for column in compact.columns:
+        if pd.api.types.is_integer_dtype(compact[column]) and not pd.api.types.is_extension_array_dtype(compact[column]):
+            compact[column] = pd.to_numeric(compact[column], downcast='integer')
+
+    return compact
+
+def memory_report(df, compact_df=None):
+    """
+    Compares the memory used by each column of a DataFrame before and after optimize_dtypes.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data
+        compact_df (DataFrame) - Optional compact version of df, computed if not given
+
+    Returns:
+        DataFrame - Bytes used by each column ('before', 'after') and the bytes saved, with a
+                    'Total' row
+    """
+    compact_df = optimize_dtypes(df) if compact_df is None else compact_df
+    report = pd.DataFrame({
+        'before': df.memory_usage(deep=True, index=False),
+        'after': compact_df.memory_usage(deep=True, index=False),
+    })
+    report.loc['Total'] = report.sum()
+    report['saved'] = report['before'] - report['after']
+    return report
+
+def _prepare_data(df, month, day, compact=False):
+    """Filters and validates the trips read from a city file, as returned by load_data."""
+    df = filter_data(df, month, day, compact)
+
+    # Validate the user and duration columns once, so the stat functions do not clean them again
+    df = validate_data(df)
+    return optimize_dtypes(df) if compact else df
+
+class FrameCache:
+    """
+    Thread-safe in-memory LRU cache of the DataFrames prepared by load_data.
+
+    Each entry holds the validated trips of a city for one month filter (or none); the day
+    filters are derived from it in memory. An entry is dropped when its source file changes,
+    and the least recently used entries are evicted once their total size exceeds the budget.
+
+    Attributes:
+        (int) max_bytes - Memory budget of the entries, None to read FRAME_CACHE_BYTES
+        (int) hits - Number of lookups answered from memory
+        (int) misses - Number of lookups that had to load the city
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (source fingerprint, DataFrame, size in bytes)
+        self._size = 0
+
+    @property
+    def size(self):
+        """(int) - Total memory of the cached DataFrames, in bytes."""
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, fingerprint, count_miss=True):
+        """
+        Looks up a DataFrame, marking it as the most recently used.
+
+        Args:
+            (tuple) key - Key of the entry
+            (dict) fingerprint - Current fingerprint of the source file (see file_fingerprint)
+            (bool) count_miss - False when another key is looked up on a miss, so that the
+                                lookup only counts the miss of its last key
+
+        Returns:
+            df - The cached DataFrame, or None if it is missing or out of date
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != fingerprint:
+                self._remove(key)  # The source file changed since the entry was cached
+                entry = None
+            if entry is None:
+                self.misses += count_miss
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, fingerprint, df):
+        """
+        Caches a DataFrame, evicting the least recently used entries beyond the memory budget.
+
+        Args:
+            (tuple) key - Key of the entry
+            (dict) fingerprint - Fingerprint of the source file the DataFrame was loaded from
+            df (DataFrame) - DataFrame to cache; it must not be modified afterwards
+        """
+        max_bytes = FRAME_CACHE_BYTES if self.max_bytes is None else self.max_bytes
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > max_bytes:
+                return  # Larger than the whole budget, it would only evict everything else
+            self._entries[key] = (fingerprint, df, size)
+            self._size += size
+            while self._size > max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        """Drops one entry; the lock must be held."""
+        self._size -= self._entries.pop(key)[2]
+
+# DataFrames kept in memory by load_data
+FRAME_CACHE = FrameCache()
+
+# Background loads started by prefetch_city, keyed by source path
+_PREFETCHES = {}
+_PREFETCH_LOCK = threading.Lock()
+
+def prefetch_city(city, compact=False):
+    """
+    Starts loading a city in a background thread, e.g. while the user answers the next prompts.
+
+    The next load_data call for the city takes the prefetched trips, waiting for the prefetch if
+    it is still running, instead of reading the file a second time, even when the city is too
+    large for FRAME_CACHE. The console output of the prefetch (e.g. warnings) is held back until
+    then, so that it does not interrupt the prompts.
+
+    Args:
+        (str) city - Name of the city to load
+        (bool) compact - True to load the memory-optimized profile (see load_data)
+
+    Returns:
+        Future - Done once the city is in memory; it never raises, load_data reporting the errors
+    """
+    source_path = CITY_DATA[city]
+    with _PREFETCH_LOCK:
+        future = _PREFETCHES.get(source_path)
+        if future is None or future.done():
+            future = Future()
+            _PREFETCHES[source_path] = future
+            # A daemon thread, so quitting the analysis does not wait for an unused prefetch
+            threading.Thread(target=_prefetch, args=(city, compact, future), daemon=True,
+                             name=f"prefetch-{city}").start()
+    return future
+
+def _prefetch(city, compact, future):
+    """Loads a city in the background and completes the future with the trips and the held back output."""
+    _ECHO_BUFFER.messages = []
+    result = {'compact': compact, 'fingerprint': None, 'data': None, 'messages': _ECHO_BUFFER.messages}
+    try:
+        result['fingerprint'] = file_fingerprint(CITY_DATA[city])
+        result['data'] = _cached_city_data(city, 'all', compact, wait_prefetch=False)
+    except Exception:
+        pass  # The same error is raised again, and reported, by the load_data call that needs the city
+    finally:
+        _ECHO_BUFFER.messages = None
+        future.set_result(result)
+
+def _take_prefetch(source_path, compact, fingerprint):
+    """
+    Takes the result of the prefetch of a city file, waiting for it if it is still running.
+
+    The console output of the prefetch is printed here, once.
+
+    Returns:
+        df - Trips of the whole city, or None if there is no usable prefetch
+    """
+    with _PREFETCH_LOCK:
+        future = _PREFETCHES.pop(source_path, None)
+    if future is None:
+        return None
+    result = future.result()
+    for args, kwargs in result['messages']:
+        _echo(*args, **kwargs)
+    if result['compact'] != compact or result['fingerprint'] != fingerprint:
+        return None  # Another profile, or the file changed since the prefetch
+    return result['data']
+
+def _cached_city_data(city, month, compact, wait_prefetch=True):
+    """Loads and prepares the trips of a city for a month filter, from a prefetch or through FRAME_CACHE."""
+    source_path = CITY_DATA[city]
+    try:
+        fingerprint = file_fingerprint(source_path)
+    except OSError:
+        raise FileNotFoundError(source_path)
+    month_code = calendar_code(MONTH_NAMES, month)
+
+    if wait_prefetch:
+        # Take the city loaded in the background, which FRAME_CACHE may not hold if it is too large
+        df = _take_prefetch(source_path, compact, fingerprint)
+        if df is not None:
+            return df if month_code is None else filter_data(df, month, 'all')
+
+    # The validation rules are part of the key, since the cached trips are already validated
+    schema = json.dumps(VALIDATION_SCHEMA, sort_keys=True)
+    key = (source_path, month_code, compact, USE_CACHE, schema)
+
+    df = FRAME_CACHE.get(key, fingerprint, count_miss=month_code is None)
+    if df is None and month_code is not None:
+        # Filter the month out of the whole city when it is in memory
+        df = FRAME_CACHE.get((source_path, None, compact, USE_CACHE, schema), fingerprint)
+        if df is not None:
+            return filter_data(df, month, 'all')
+    if df is None:
+        df = load_city_data(city, month_code)
+        if 'Start Time' not in df.columns or 'End Time' not in df.columns:
+            _echo('The dataframe does not have temporal columns. Temporal filters are not applied.')
+        df = _prepare_data(df, month, 'all', compact)
+        FRAME_CACHE.put(key, fingerprint, df)
+    return df
+
+@instrument('load_data')
+def load_data(city, month, day, chunksize=None, compact=False):
     """
     Loads data for the specified city and filters by month and day if applicable.
 
+    The prepared trips of each city and month filter are kept in memory (see FRAME_CACHE), so
+    loading the same city again, e.g. with another day filter, does not read the file again.
+
+    With a chunksize, the data is streamed instead: the city file is read chunk by chunk and
+    the filtered chunks are yielded one at a time, so files larger than the memory can be
+    analyzed by passing the result to compute_stats or to any stat function.
+
     Args:
         (str) city - Name of the city to analyze
         (str) month - Name of the month to filter by, or "all" to apply no month filter
         (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+        (int) chunksize - Optional maximum number of trips read at a time
+        (bool) compact - True to load the memory-optimized profile (see optimize_dtypes), e.g.
+                         to keep several cities in memory at once
 
     Returns:
-        df - Pandas DataFrame containing city data filtered by month and day
+        df - Pandas DataFrame containing city data filtered by month and day and validated (see
+             validate_data), or an iterator of such DataFrames when a chunksize is given
     """
+    month_code = calendar_code(MONTH_NAMES, month)
+
+    if chunksize is not None:
+        if not os.path.exists(CITY_DATA[city]):
+            _echo(f"Error: The file for {city} does not exist.")
+            return iter(())  # Return no chunk if the file is not found
+        return (_prepare_data(chunk, month, day, compact) for chunk in iter_city_chunks(city, chunksize, month_code))
+
     try:
-        # Load data from the CSV file corresponding to the selected city
-        df = pd.read_csv(CITY_DATA[city])
+        # Load data from memory, from the Parquet cache, or from the CSV file corresponding to the
+        # selected city, reading only the part of the file that can contain the selected month
+        df = _cached_city_data(city, month, compact)
     except FileNotFoundError:
-        print(f"Error: The file for {city} does not exist.")
+        _echo(f"Error: The file for {city} does not exist.")
         return pd.DataFrame()  # Return an empty DataFrame if the file is not found
 
-    # Check if the DataFrame contains the required columns for temporal analysis
-    if 'Start Time' in df.columns and 'End Time' in df.columns: 
-        # Convert 'Start Time' and 'End Time' to datetime objects
-        df['Start Time'] = pd.to_datetime(df['Start Time'], errors='coerce')
-        df['End Time'] = pd.to_datetime(df['End Time'], errors='coerce')
+    # Filter the day in memory, then detach the result from the cached DataFrame
+    return filter_data(df, 'all', day).copy(deep=False)
+
+# Sections of the statistics computed by aggregate_stats
+STAT_SECTIONS = ("time", "station", "duration", "user", "nulls")
+
+def _to_counter(counts):
+    """Converts a Series of counts indexed by value into a Counter, dropping the zero counts."""
+    counts = counts[counts > 0]  # Categorical columns also list their unused categories
+    return Counter(dict(zip(counts.index, counts.to_numpy().tolist())))
+
+def _count_values(values):
+    """Counts the non-null values of a Series into a Counter."""
+    return _to_counter(values.value_counts(sort=False))
+
+def _merge_counters(left, right):
+    """Adds two Counters, keeping the zero counts and the key order of the left Counter."""
+    merged = Counter(left)
+    merged.update(right)
+    return merged
+
+def _mode(counts):
+    """
+    Gives the most common key of a Counter, breaking ties with the smallest key like Series.mode.
+
+    Args:
+        (Counter) counts - Number of occurrences of each value
+
+    Returns:
+        The most common value, or None if the Counter is empty
+    """
+    if not counts:
+        return None
+    highest = max(counts.values())
+    return min(key for key, count in counts.items() if count == highest)
+
+def _as_python(value):
+    """Converts a numpy scalar into the equivalent Python scalar."""
+    return value.item() if isinstance(value, np.generic) else value
+
+def _name_codes(counts, names, offset):
+    """Replaces the integer month or day codes counted in a Counter with their names."""
+    return Counter({names[int(key) - offset] if not isinstance(key, str) else key: count
+                    for key, count in counts.items()})
+
+def _calendar_columns(df):
+    """
+    Gives the month name, day name and hour of each trip, reusing the columns built by load_data.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame with a 'Start Time' column
+
+    Returns:
+        (tuple) - The 'month', 'day_of_week' and 'hour' Series
+    """
+    if {'month', 'day_of_week', 'hour'}.issubset(df.columns):
+        return df['month'], df['day_of_week'], df['hour']
+    # Count the integer codes, which aggregate_stats names afterwards
+    return tuple(pd.Series(pd.arrays.IntegerArray(codes, codes < 0), index=df.index)
+                 for codes in calendar_codes(df['Start Time']))
+
+def clean_trip_duration(durations, schema=None):
+    """
+    Converts trip durations to numbers and discards the unrealistic ones (one day or longer).
+
+    Args:
+        durations (Series) - Raw 'Trip Duration' column
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+    Returns:
+        Series - Durations in seconds, NaN where the value is missing or invalid
+    """
+    schema = schema or VALIDATION_SCHEMA
+    durations = pd.to_numeric(durations, errors='coerce')
+    return durations.where(~(durations >= schema['max_trip_duration']))
+
+def _clean_vocabulary(values, vocabulary):
+    """
+    Lowercases a column and keeps the values of a fixed vocabulary, without any per-row Python call.
+
+    The column is dictionary-encoded (if it is not already a category), then only its distinct
+    values are lowercased and looked up in the vocabulary, and the row codes are remapped.
+
+    Args:
+        values (Series) - Raw column
+        (list) vocabulary - Valid lowercase values
+
+    Returns:
+        Series - Categorical column with the vocabulary as categories, NaN for the other values
+    """
+    categorical = values.astype('category').cat
+    lowered = pd.Index(categorical.categories.astype(str)).str.lower()
+    category_codes = pd.Index(vocabulary).get_indexer(lowered)
+
+    # Remap each row from its original category to its vocabulary entry; the lookup ends with
+    # -1 so that the missing rows (code -1) stay missing, even when there is no category at all
+    lookup = np.append(category_codes, -1)
+    codes = lookup[categorical.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=vocabulary),
+                     index=values.index, name=values.name)
+
+def clean_user_type(user_types, schema=None):
+    """
+    Standardizes user types to lowercase and discards the invalid ones.
+
+    Args:
+        user_types (Series) - Raw 'User Type' column
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+    Returns:
+        Series - Categorical with the valid user types (e.g. 'subscriber', 'customer'),
+                 NaN where the value is missing or invalid
+    """
+    return _clean_vocabulary(user_types, (schema or VALIDATION_SCHEMA)['user_types'])
+
+def clean_gender(genders, schema=None):
+    """
+    Standardizes genders to lowercase and discards the invalid ones.
+
+    Args:
+        genders (Series) - Raw 'Gender' column
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+    Returns:
+        Series - Categorical with the valid genders (e.g. 'male', 'female'),
+                 NaN where the value is missing or invalid
+    """
+    return _clean_vocabulary(genders, (schema or VALIDATION_SCHEMA)['genders'])
+
+def clean_birth_year(birth_years, schema=None):
+    """
+    Converts birth years to numbers and discards the impossible ones.
+
+    Args:
+        birth_years (Series) - Raw 'Birth Year' column
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+    Returns:
+        Series - Years within the valid range (1900 to the current year by default),
+                 NaN where the value is missing or invalid
+    """
+    earliest, latest = (schema or VALIDATION_SCHEMA)['birth_year_range']
+    latest = time.localtime().tm_year if latest is None else latest
+    birth_years = pd.to_numeric(birth_years, errors='coerce')
+    return birth_years.where(birth_years.between(earliest, latest))
+
+def clean_data(df, schema=None):
+    """
+    Cleans the columns that the statistics validate, without modifying the DataFrame.
+
+    The columns of a DataFrame returned by validate_data are already clean and are returned as is.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+    Returns:
+        dict - The cleaned 'Trip Duration', 'User Type', 'Gender' and 'Birth Year' Series,
+               for the columns present in the DataFrame
+    """
+    cleaners = {
+        'Trip Duration': clean_trip_duration,
+        'User Type': clean_user_type,
+        'Gender': clean_gender,
+        'Birth Year': clean_birth_year,
+    }
+    if df.attrs.get('validated'):
+        return {column: df[column] for column in cleaners if column in df.columns}
+    return {column: cleaner(df[column], schema) for column, cleaner in cleaners.items() if column in df.columns}
+
+@instrument('load_data.validate')
+def validate_data(df, schema=None):
+    """
+    Applies the validation schema once, so that the statistics never clean the data again.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data
+        (dict) schema - Validation rules, VALIDATION_SCHEMA by default
+
+    Returns:
+        df - Pandas DataFrame sharing the unchanged columns of df, with the cleaned columns in
+             place of the raw ones and flagged as validated in its attrs
+    """
+    cleaned = clean_data(df, schema)
+    validated = df.copy(deep=False)
+    for column, values in cleaned.items():
+        validated[column] = values
+    validated.attrs['validated'] = True
+    return validated
+
+def _sum_by_level(counts, level):
+    """Sums a Series of counts indexed by a MultiIndex over one of its levels, into a Counter."""
+    return _to_counter(counts.groupby(level=level, observed=True).sum())
+
+def _null_counts(df, cleaned):
+    """Counts the null values of each column, using the cleaned version of the cleaned columns."""
+    null_counts = df.isnull().sum()
+    for column, values in cleaned.items():
+        null_counts[column] = values.isnull().sum()
+    return Counter(dict(zip(null_counts.index, null_counts.to_numpy().tolist())))  # Zero counts are kept
+
+def aggregate_stats(df, sections=STAT_SECTIONS, cleaned=None):
+    """
+    Computes the partial aggregates behind every statistic in a single pass over the DataFrame.
+
+    Every value is counted once per column: the modes, extremes and counts reported by the
+    statistics are all derived from these counters, and the aggregates of several DataFrames can
+    be combined with merge_aggregates before being summarized with summarize_stats.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data
+        (tuple) sections - Sections to compute, among STAT_SECTIONS
+        (dict) cleaned - Optional output of clean_data for the DataFrame, computed if not given
+
+    Returns:
+        dict - Counters for the month, day, hour, stations, trips, user types, genders, birth years
+               and null values, plus the number of trips and the sum and count of durations.
+               Each counter is None when its column does not exist.
+    """
+    if cleaned is None:
+        cleaned = clean_data(df) if {'duration', 'user', 'nulls'} & set(sections) else {}
+    aggregate = {'rows': len(df)}
+
+    if 'time' in sections:
+        counters = [None] * 3
+        if 'Start Time' in df.columns:
+            counters = [_count_values(column) for column in _calendar_columns(df)]
+            # Name the months and days counted from the compact integer codes
+            counters[0] = _name_codes(counters[0], MONTH_NAMES, 1)
+            counters[1] = _name_codes(counters[1], DAY_NAMES, 0)
+        aggregate['month'], aggregate['day_of_week'], aggregate['hour'] = counters
+
+    if 'station' in sections:
+        aggregate['start_station'] = aggregate['end_station'] = aggregate['trip'] = None
+        if 'Start Station' in df.columns and 'End Station' in df.columns:
+            # Count every (start, end) pair once; the station counts are derived from the pairs
+            pairs = df.groupby(['Start Station', 'End Station'], dropna=False, observed=True, sort=False).size()
+            aggregate['start_station'] = _sum_by_level(pairs, 0)
+            aggregate['end_station'] = _sum_by_level(pairs, 1)
+            complete = pairs.index.get_level_values(0).notna() & pairs.index.get_level_values(1).notna()
+            pairs = pairs[complete]
+            aggregate['trip'] = _to_counter(pairs)
+
+    if 'duration' in sections:
+        aggregate['duration_sum'] = aggregate['duration_count'] = None
+        if 'Trip Duration' in cleaned:
+            durations = cleaned['Trip Duration']
+            if durations.dtype != 'float64':
+                durations = durations.astype('float64')  # Sum compact float32 durations without rounding
+            aggregate['duration_sum'] = float(durations.sum())
+            aggregate['duration_count'] = int(durations.count())
+
+    if 'user' in sections:
+        for key, column in (('user_type', 'User Type'), ('gender', 'Gender'), ('birth_year', 'Birth Year')):
+            aggregate[key] = _count_values(cleaned[column]) if column in cleaned else None
+
+    if 'nulls' in sections:
+        aggregate['null_counts'] = _null_counts(df, cleaned)
+
+    return aggregate
+
+def aggregate_chunks(chunks, sections=STAT_SECTIONS, clean=True):
+    """
+    Computes the aggregates of a stream of DataFrames, holding a single chunk in memory at a time.
+
+    Args:
+        chunks (iterable) - DataFrames, e.g. returned by load_data with a chunksize
+        (tuple) sections - Sections to compute, among STAT_SECTIONS
+        (bool) clean - False to count the null values of the raw columns, like count_null_values
+
+    Returns:
+        dict - Aggregates of all the trips, identical to aggregate_stats on their concatenation
+    """
+    aggregate = None
+    for chunk in chunks:
+        partial = aggregate_stats(chunk, sections, cleaned=None if clean else {})
+        aggregate = partial if aggregate is None else merge_aggregates(aggregate, partial)
+    if aggregate is None:
+        aggregate = aggregate_stats(pd.DataFrame(), sections)  # No chunk, so no column
+    return aggregate
+
+def merge_aggregates(left, right):
+    """
+    Combines the aggregates of two sets of trips, as if they had been computed together.
+
+    The merge is associative and commutative, so the aggregates of chunks, partitions or batches
+    can be combined in any order and give the same statistics.
+
+    Args:
+        (dict) left - Aggregates returned by aggregate_stats
+        (dict) right - Aggregates returned by aggregate_stats
+
+    Returns:
+        dict - Aggregates of the trips of both inputs
+    """
+    merged = {}
+    for key in left.keys() | right.keys():
+        a, b = left.get(key), right.get(key)
+        if a is None or b is None:
+            merged[key] = b if a is None else a
+        elif isinstance(a, Counter):
+            merged[key] = _merge_counters(a, b)
+        else:
+            merged[key] = a + b
+    return merged
+
+def _counts_series(counts, name):
+    """Converts a Counter into a Series sorted like value_counts (most common first, then by value)."""
+    items = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return pd.Series([count for _, count in items], index=pd.Index([key for key, _ in items], name=name),
+                     name='count', dtype='int64')
+
+def summarize_stats(aggregate):
+    """
+    Derives the statistics displayed by the analysis from the aggregates of the trips.
+
+    Args:
+        (dict) aggregate - Aggregates returned by aggregate_stats or merge_aggregates
+
+    Returns:
+        dict - The dictionaries returned by time_stats, station_stats, trip_duration_stats and
+               user_stats, under the name of each function, plus the null counts Series under
+               'null_counts', for the sections present in the aggregates
+    """
+    stats = {}
+
+    if 'month' in aggregate:
+        hour = _mode(aggregate['hour']) if aggregate['hour'] is not None else None
+        stats['time_stats'] = {
+            'most_common_month': _mode(aggregate['month']) if aggregate['month'] is not None else None,
+            'most_common_day': _mode(aggregate['day_of_week']) if aggregate['day_of_week'] is not None else None,
+            'most_common_hour': _as_python(hour),
+        }
+
+    if 'start_station' in aggregate:
+        stats['station_stats'] = {
+            'most_common_start_station': _mode(aggregate['start_station']) if aggregate['start_station'] is not None else None,
+            'most_common_end_station': _mode(aggregate['end_station']) if aggregate['end_station'] is not None else None,
+            'most_common_trip': _mode(aggregate['trip']) if aggregate['trip'] is not None else None,
+        }
+
+    if 'duration_sum' in aggregate:
+        total_travel_time, mean_travel_time = [None] * 2
+        if aggregate['duration_sum'] is not None:
+            total_travel_time = format_time(aggregate['duration_sum'])
+            if aggregate['duration_count']:
+                mean_travel_time = format_time(aggregate['duration_sum'] / aggregate['duration_count'])
+        stats['trip_duration_stats'] = {
+            'total_travel_time': total_travel_time,
+            'mean_travel_time': mean_travel_time
+        }
+
+    if 'user_type' in aggregate:
+        user_types, gender_counts, earliest_year, most_recent_year, most_common_year = [None] * 5
+        if aggregate['user_type'] is not None:
+            user_types = _counts_series(aggregate['user_type'], 'User Type')
+        if aggregate['gender'] is not None:
+            gender_counts = _counts_series(aggregate['gender'], 'Gender')
+        if aggregate['birth_year']:
+            earliest_year = int(min(aggregate['birth_year']))
+            most_recent_year = int(max(aggregate['birth_year']))
+            most_common_year = int(_mode(aggregate['birth_year']))
+        stats['user_stats'] = {
+            'user_types': user_types,
+            'gender_counts': gender_counts,
+            'earliest_year': earliest_year,
+            'most_recent_year': most_recent_year,
+            'most_common_year': most_common_year
+        }
+
+    if 'null_counts' in aggregate:
+        stats['null_counts'] = pd.Series(aggregate['null_counts'], dtype='int64')
+
+    return stats
+
+@instrument('compute_stats')
+def compute_stats(df):
+    """
+    Computes every statistic of the analysis in a single pass over the DataFrame.
+
+    The cleaned columns are only computed once and shared by all the sections; the DataFrame
+    is not modified.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data, or an iterable of DataFrames
+                         (e.g. returned by load_data with a chunksize) to stream over
+
+    Returns:
+        dict - See summarize_stats
+    """
+    if isinstance(df, pd.DataFrame):
+        return summarize_stats(aggregate_stats(df))
+    return summarize_stats(aggregate_chunks(df))
 
-        # Extract month, day of the week, and hour from 'Start Time'
-        df['month'] = df['Start Time'].dt.strftime('%B')
-        df['day_of_week'] = df['Start Time'].dt.day_name()
-        df['hour'] = df['Start Time'].dt.hour.astype('Int64')
+def _section_stats(df, section, key, cleaned=None):
+    """Computes one section of the statistics for a DataFrame or an iterable of DataFrames."""
+    if isinstance(df, pd.DataFrame):
+        aggregate = aggregate_stats(df, (section,), cleaned=cleaned)
+    else:
+        aggregate = aggregate_chunks(df, (section,), clean=cleaned is None)
+    return summarize_stats(aggregate)[key]
 
-        # Filter by month if not 'all'
-        if month.lower() != 'all':
-            df = df[df['month'].str.lower() == month.lower()]
+def _echo_missing(column, columns=None):
+    """
+    Explains why a statistic has no result: its column does not exist, or has no valid value.
 
-        # Filter by day if not 'all'
-        if day != 'all':
-            df = df[df['day_of_week'].str.lower() == day.lower()]
+    Args:
+        (str) column - Column the statistic is computed from
+        columns - Columns of the analyzed data, None if they are not known
+    """
+    if columns is not None and column in columns:
+        _echo(f"`{column}` column has no valid values for this filter.")
     else:
-        print('The dataframe does not have temporal columns. Temporal filters are not applied.')
-            
-    return df
+        _echo(f"`{column}` column does not exist.")
+
+def display_time_stats(result, columns=None):
+    """Displays the result of time_stats; columns are those of the analyzed data, if known."""
+    if result['most_common_month'] is None:
+        _echo_missing('Start Time', columns)
+        return
+    _echo(f"The most common month is: {result['most_common_month']}")
+    _echo(f"The most common day of the week is: {result['most_common_day']}")
+    _echo(f"The most common start hour is: {result['most_common_hour']}")
+
+def display_station_stats(result, columns=None):
+    """Displays the result of station_stats; columns are those of the analyzed data, if known."""
+    if result['most_common_trip'] is None:
+        if columns is not None and {'Start Station', 'End Station'}.issubset(columns):
+            _echo("No trip has both a start and an end station for this filter.")
+        else:
+            _echo("`Start Station` or `End Station` column does not exist.")
+        return
+    most_common_trip = result['most_common_trip']
+    _echo(f"The most commonly used start station is: {result['most_common_start_station']}")
+    _echo(f"The most commonly used end station is: {result['most_common_end_station']}")
+    _echo(f"The most frequent combination of start station and end station trip is: {most_common_trip[0]} to {most_common_trip[1]}")
+
+def display_trip_duration_stats(result, columns=None):
+    """Displays the result of trip_duration_stats; columns are those of the analyzed data, if known."""
+    if result['mean_travel_time'] is None:
+        _echo_missing('Trip Duration', columns)
+        return
+    _echo(f"Total travel time: {result['total_travel_time']}")
+    _echo(f"Mean travel time: {result['mean_travel_time']}")
+
+def display_user_stats(result, columns=None):
+    """Displays the result of user_stats; columns are those of the analyzed data, if known."""
+    if result['user_types'] is not None:
+        _echo(f"Counts of user types:\n{result['user_types']}")
+    else:
+        _echo()
+        _echo_missing('User Type', columns)
+
+    if result['gender_counts'] is not None:
+        _echo(f"\nCounts of gender:\n{result['gender_counts']}")
+    else:
+        _echo()
+        _echo_missing('Gender', columns)
+
+    if result['earliest_year'] is not None:
+        _echo(f"\nEarliest year of birth: {result['earliest_year']}")
+        _echo(f"Most recent year of birth: {result['most_recent_year']}")
+        _echo(f"Most common year of birth: {result['most_common_year']}")
+    else:
+        _echo()
+        _echo_missing('Birth Year', columns)
+
+def display_null_counts(null_counts):
+    """Displays the result of count_null_values."""
+    if null_counts[null_counts > 0].empty:
+        _echo("No null values found in any column.")
+    else:
+        _echo(null_counts[null_counts > 0])
 
 def time_stats(df):
     """
@@ -111,33 +1431,17 @@ def time_stats(df):
         dict - A dictionary with the most common month, day, and hour
     """
 
-    print("\nCalculating The Most Frequent Times of Travel...\n")
-    start_time = time.time()  # Record start time for performance measurement
-
-    # Initialize variables to store the most common month, day, and hour
-    most_common_month, most_common_day, most_common_hour = [None] * 3
-    
-    # Check if the DataFrame contains the 'Start Time' column
-    if 'Start Time' in df.columns: 
-        # Calculate the most common month, day of the week, and start hour
-        most_common_month = df['Start Time'].dt.strftime('%B').mode()[0]
-        most_common_day = df['Start Time'].dt.day_name().mode()[0]
-        most_common_hour = df['Start Time'].dt.hour.astype('Int64').mode()[0]
-        print(f"The most common month is: {most_common_month}")
-        print(f"The most common day of the week is: {most_common_day}")
-        print(f"The most common start hour is: {most_common_hour}")
-    else:
-        print("`Start Time` column does not exist.")
+    _echo("\nCalculating The Most Frequent Times of Travel...\n")
+    # Count the months, days and hours, reusing the columns built by load_data
+    with measure('time_stats', df) as timer:
+        result = _section_stats(df, 'time', 'time_stats', cleaned={})
+    display_time_stats(result, df.columns if isinstance(df, pd.DataFrame) else None)
 
     # Print time taken to calculate statistics
-    print("\nThis took %s seconds." % (time.time() - start_time))
-    print("-" * 40)
+    _echo("\nThis took %s seconds." % timer.seconds)
+    _echo("-" * 40)
     
-    return {
-        'most_common_month': most_common_month,
-        'most_common_day': most_common_day,
-        'most_common_hour': most_common_hour
-    }
+    return result
 
 def station_stats(df):
     """
@@ -155,33 +1459,17 @@ def station_stats(df):
         dict - A dictionary with the most common start station, end station, and trip
     """
     
-    print("\nCalculating The Most Popular Stations and Trip...\n")
-    start_time = time.time()  # Record start time for performance measurement
-    
-    # Initialize variables to store the most common start station, end station, and trip
-    most_common_start_station, most_common_end_station, most_common_trip = [None] * 3
-
-    # Check if the DataFrame contains 'Start Station' and 'End Station' columns
-    if 'Start Station' in df.columns and 'End Station' in df.columns:
-        # Calculate the most common start station, end station, and most frequent trip
-        most_common_start_station = df['Start Station'].mode()[0]
-        most_common_end_station = df['End Station'].mode()[0]
-        most_common_trip = df.groupby(['Start Station', 'End Station']).size().idxmax()
-        print(f"The most commonly used start station is: {most_common_start_station}")
-        print(f"The most commonly used end station is: {most_common_end_station}")
-        print(f"The most frequent combination of start station and end station trip is: {most_common_trip[0]} to {most_common_trip[1]}")
-    else:
-        print("`Start Station` or `End Station` column does not exist.")
+    _echo("\nCalculating The Most Popular Stations and Trip...\n")
+    # Count the trips once per (start, end) pair and derive the station counts from them
+    with measure('station_stats', df) as timer:
+        result = _section_stats(df, 'station', 'station_stats', cleaned={})
+    display_station_stats(result, df.columns if isinstance(df, pd.DataFrame) else None)
     
     # Print time taken to calculate statistics
-    print("\nThis took %s seconds." % (time.time() - start_time))
-    print("-" * 40)
+    _echo("\nThis took %s seconds." % timer.seconds)
+    _echo("-" * 40)
 
-    return {
-        'most_common_start_station': most_common_start_station,
-        'most_common_end_station': most_common_end_station,
-        'most_common_trip': most_common_trip
-    }
+    return result
 
 def format_time(seconds):
     """
@@ -213,6 +1501,9 @@ def trip_duration_stats(df):
     """
     Displays statistics on the total and average trip duration.
 
+    The durations are cleaned into a separate Series: df is not modified, so the function can
+    be called on a shared DataFrame, including from several threads.
+
     Args:
         df (DataFrame) - Pandas DataFrame containing trip data
 
@@ -224,45 +1515,31 @@ def trip_duration_stats(df):
         dict - A dictionary with total and mean travel times formatted as strings
     """
     
-    print("\nCalculating Trip Duration...\n")
-    start_time = time.time()  # Record start time for performance measurement
- 
-    # Initialize variables to store total and mean travel time
-    total_travel_time, mean_travel_time = [None] * 2
-
-    # Check if the DataFrame contains the 'Trip Duration' column
-    if 'Trip Duration' in df.columns:
-        # Ensure 'Trip Duration' is numeric and replace unrealistic values with NaN
-        df['Trip Duration'] = pd.to_numeric(df['Trip Duration'], errors='coerce')
-        df.loc[df['Trip Duration'] >= 86400, 'Trip Duration'] = None
-
-        # Calculate total and mean travel time in seconds
-        total_travel_time = df['Trip Duration'].sum()
-        mean_travel_time = df['Trip Duration'].mean()
-
-        # Format the travel times 
-        total_travel_time = format_time(total_travel_time)
-        mean_travel_time = format_time(mean_travel_time)
-        
-        # Display the results
-        print(f"Total travel time: {total_travel_time}")
-        print(f"Mean travel time: {mean_travel_time}")
-    else:
-        print("`Trip Duration` column does not exist.")
+    _echo("\nCalculating Trip Duration...\n")
+    with measure('trip_duration_stats', df) as timer:
+        # Ensure 'Trip Duration' is numeric and replace unrealistic values with NaN, without
+        # writing the cleaned column back into df
+        cleaned = None
+        if isinstance(df, pd.DataFrame):
+            cleaned = clean_data(df[[column for column in ('Trip Duration',) if column in df.columns]])
+
+        # Calculate total and mean travel time from the sum and count of durations
+        result = _section_stats(df, 'duration', 'trip_duration_stats', cleaned=cleaned)
+    display_trip_duration_stats(result, df.columns if isinstance(df, pd.DataFrame) else None)
 
     # Print time taken to calculate statistics
-    print("\nThis took %s seconds." % (time.time() - start_time))
-    print("-" * 40)
+    _echo("\nThis took %s seconds." % timer.seconds)
+    _echo("-" * 40)
 
-    return {
-        'total_travel_time': total_travel_time,
-        'mean_travel_time': mean_travel_time
-    }
+    return result
 
 def user_stats(df):
     """
     Displays statistics on bikeshare users.
 
+    The user columns are cleaned into separate Series: df is not modified, so the function can
+    be called on a shared DataFrame, including from several threads.
+
     Args:
         df (DataFrame) - Pandas DataFrame containing user data with 'User Type', 'Gender', and 'Birth Year' columns
 
@@ -277,60 +1554,22 @@ def user_stats(df):
         dict - A dictionary with user type counts, gender counts, and birth year statistics
     """
     
-    print("\nCalculating User Stats...\n")
-    start_time = time.time()  # Record start time for performance measurement
-    
-    # Initialize variables to store user statistics
-    user_types, gender_counts, earliest_year, most_recent_year, most_common_year = [None] * 5
-
-    # Check if the DataFrame contains the 'User Type' column
-    if 'User Type' in df.columns:
-        # Standardize user types to lowercase and filter valid types
-        df['User Type'] = df['User Type'].str.lower()
-        valid_user_types = ['subscriber', 'customer']
-        df['User Type'] = df['User Type'].apply(lambda x: x if x in valid_user_types else None)
-        user_types = df['User Type'].value_counts()
-        print(f"Counts of user types:\n{user_types}")
-    else:
-        print("\n`User Type` column does not exist.")
-        
-    # Check if the DataFrame contains the 'Gender' column
-    if 'Gender' in df.columns:
-        # Standardize gender values to lowercase and filter valid genders
-        df['Gender'] = df['Gender'].str.lower()
-        valid_genders = ['male', 'female']
-        df['Gender'] = df['Gender'].apply(lambda x: x if x in valid_genders else None)
-        gender_counts = df['Gender'].value_counts()
-        print(f"\nCounts of gender:\n{gender_counts}")
-    else:
-        print("\n`Gender` column does not exist.")
-        
-    # Check if the DataFrame contains the 'Birth Year' column
-    if 'Birth Year' in df.columns:
-        # Convert 'Birth Year' to numeric and filter valid years
-        df['Birth Year'] = pd.to_numeric(df['Birth Year'], errors='coerce')
-        current_year = time.localtime().tm_year
-        df['Birth Year'] = df['Birth Year'].apply(lambda x: x if 1900 <= x <= current_year else None)
-        earliest_year = int(df['Birth Year'].min())
-        most_recent_year = int(df['Birth Year'].max())
-        most_common_year = int(df['Birth Year'].mode()[0])
-        print(f"\nEarliest year of birth: {earliest_year}")
-        print(f"Most recent year of birth: {most_recent_year}")
-        print(f"Most common year of birth: {most_common_year}")
-    else:
-        print("\n`Birth Year` column does not exist.")
+    _echo("\nCalculating User Stats...\n")
+    with measure('user_stats', df) as timer:
+        # Standardize the user columns and keep only the valid values, without modifying df
+        cleaned = None
+        if isinstance(df, pd.DataFrame):
+            cleaned = clean_data(df[[column for column in ('User Type', 'Gender', 'Birth Year') if column in df.columns]])
+
+        # Count user types, genders and birth years
+        result = _section_stats(df, 'user', 'user_stats', cleaned=cleaned)
+    display_user_stats(result, df.columns if isinstance(df, pd.DataFrame) else None)
     
     # Print time taken to calculate statistics
-    print("\nThis took %s seconds." % (time.time() - start_time))
-    print("-" * 40)
+    _echo("\nThis took %s seconds." % timer.seconds)
+    _echo("-" * 40)
     
-    return {
-        'user_types': user_types,
-        'gender_counts': gender_counts,
-        'earliest_year': earliest_year,
-        'most_recent_year': most_recent_year,
-        'most_common_year': most_common_year
-    }
+    return result
 
 def count_null_values(df):
     """
@@ -343,41 +1582,181 @@ def count_null_values(df):
         null_counts (Series) - Series with the count of null values for each column
     """
     
-    print("\nCalculating null values in each column...\n")
-    start_time = time.time()  # Record start time for performance measurement
-
+    _echo("\nCalculating null values in each column...\n")
     # Count null values in each column
-    null_counts = df.isnull().sum()
-    if null_counts[null_counts > 0].empty:
-        print("No null values found in any column.")
-    else:
-        print(null_counts[null_counts > 0])
+    with measure('count_null_values', df) as timer:
+        null_counts = _section_stats(df, 'nulls', 'null_counts', cleaned={})
+    display_null_counts(null_counts)
     
     # Print time taken to calculate null values
-    print("\nThis took %s seconds." % (time.time() - start_time))
-    print("-" * 40)
+    _echo("\nThis took %s seconds." % timer.seconds)
+    _echo("-" * 40)
     
     return null_counts
 
+def _worker_settings():
+    """Gives the module settings that the worker processes must share with the parent."""
+    return {'CITY_DATA': dict(CITY_DATA), 'CACHE_DIR': CACHE_DIR, 'USE_CACHE': USE_CACHE}
+
+def _init_worker(settings):
+    """Applies the settings of the parent process in a worker process."""
+    globals().update(settings)
+
+def _aggregate_city(city, month, day):
+    """Loads and aggregates the trips of a city in a worker process."""
+    return aggregate_stats(load_data(city, month, day))
+
+def partition_city(city, partitions):
+    """
+    Splits the file of a city into parts that can be read independently.
+
+    The parts are row ranges when CITY_DATA points to a trip store, groups of row groups when
+    the Parquet cache is up to date, otherwise byte ranges of the CSV file aligned on line
+    starts (fields containing line breaks are not supported in that case).
+
+    Args:
+        (str) city - Name of the city
+        (int) partitions - Number of parts to create (fewer if the file is too small)
+
+    Returns:
+        list - Tuples ('rows', start, end), ('row_groups', indices) or ('bytes', start, end, column_names)
+    """
+    if is_trip_store(CITY_DATA[city]):
+        rows = len(open_trip_store(CITY_DATA[city]))
+        bounds = [rows * index // partitions for index in range(partitions + 1)]
+        return [('rows', start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+    if USE_CACHE and pq is not None and is_cache_valid(city):
+        row_groups = np.arange(pq.ParquetFile(cache_paths(city)[0]).metadata.num_row_groups)
+        return [('row_groups', part.tolist()) for part in np.array_split(row_groups, partitions) if len(part)]
+
+    path = CITY_DATA[city]
+    column_names = list(pd.read_csv(path, nrows=0).columns)
+    size = os.path.getsize(path)
+    offsets = []
+    with open(path, 'rb') as file:
+        file.readline()  # Skip the header line
+        data_start = file.tell()
+        for index in range(partitions):
+            file.seek(max(data_start, data_start + (size - data_start) * index // partitions))
+            if index > 0:
+                file.readline()  # Move to the start of the next line
+            offsets.append(file.tell())
+    offsets.append(size)
+    return [('bytes', start, end, column_names) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+def _aggregate_partition(city, partition, month, day):
+    """Reads and aggregates one part of the file of a city in a worker process."""
+    if partition[0] == 'rows':
+        df = open_trip_store(CITY_DATA[city]).iloc[partition[1]:partition[2]]
+    elif partition[0] == 'row_groups':
+        df = pq.ParquetFile(cache_paths(city)[0]).read_row_groups(partition[1]).to_pandas()
+    else:
+        _, start, end, column_names = partition
+        with open(CITY_DATA[city], 'rb') as file:
+            file.seek(start)
+            data = file.read(end - start)
+        df = _parse_times(pd.read_csv(io.BytesIO(data), header=None, names=column_names))
+    return aggregate_stats(_prepare_data(df, month, day))
+
+def analyze_cities(cities=None, month='all', day='all', workers=None):
+    """
+    Computes the statistics of several cities in parallel, one city per worker process.
+
+    Args:
+        (list) cities - Names of the cities to analyze, all of CITY_DATA by default
+        (str) month - Name of the month to filter by, or "all" to apply no month filter
+        (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+        (int) workers - Number of worker processes, the number of CPUs by default
+
+    Returns:
+        dict - Statistics (see summarize_stats) of each city, keyed by city name
+    """
+    cities = list(CITY_DATA) if cities is None else cities
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(_worker_settings(),)) as executor:
+        aggregates = executor.map(_aggregate_city, cities, [month] * len(cities), [day] * len(cities))
+        return {city: summarize_stats(aggregate) for city, aggregate in zip(cities, aggregates)}
+
+def analyze_city_parallel(city, month='all', day='all', workers=None, partitions=None):
+    """
+    Computes the statistics of a single large city by splitting its file across worker processes.
+
+    Each worker aggregates one part of the file and the parent merges the partial aggregates.
+    The result does not depend on the number of workers or parts: the merge adds up counters,
+    and ties between modes are always broken by the smallest value, as in the in-memory path.
+
+    Args:
+        (str) city - Name of the city to analyze
+        (str) month - Name of the month to filter by, or "all" to apply no month filter
+        (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+        (int) workers - Number of worker processes, the number of CPUs by default
+        (int) partitions - Number of parts the file is split into, the number of workers by default
+
+    Returns:
+        dict - Statistics of the city, see summarize_stats
+    """
+    workers = workers or os.cpu_count() or 1
+    month_code = calendar_code(MONTH_NAMES, month)
+    parts = partition_city(city, partitions or workers)
+
+    # Skip the row groups of the cache that cannot contain the month
+    if month_code is not None and parts and parts[0][0] == 'row_groups':
+        selected = set(month_row_groups(pq.ParquetFile(cache_paths(city)[0]), month_code))
+        parts = [('row_groups', [group for group in part[1] if group in selected]) for part in parts]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(_worker_settings(),)) as executor:
+        aggregates = executor.map(_aggregate_partition, [city] * len(parts), parts,
+                                  [month] * len(parts), [day] * len(parts))
+        aggregate = None
+        for partial in aggregates:
+            aggregate = partial if aggregate is None else merge_aggregates(aggregate, partial)
+    return summarize_stats(aggregate if aggregate is not None else aggregate_stats(pd.DataFrame()))
+
+def display_stats(stats):
+    """
+    Displays every statistic computed by compute_stats, section by section.
+
+    Args:
+        (dict) stats - Statistics returned by compute_stats
+    """
+    sections = [
+        ("The Most Frequent Times of Travel", 'time_stats', display_time_stats),
+        ("The Most Popular Stations and Trip", 'station_stats', display_station_stats),
+        ("Trip Duration", 'trip_duration_stats', display_trip_duration_stats),
+        ("User Stats", 'user_stats', display_user_stats),
+        ("Null values in each column", 'null_counts', display_null_counts),
+    ]
+    # The null counts list every column of the analyzed data
+    columns = stats['null_counts'].index if stats.get('null_counts') is not None else None
+    for title, key, display in sections:
+        _echo(f"\n{title}:\n")
+        if key == 'null_counts':
+            display(stats[key])
+        else:
+            display(stats[key], columns)
+        _echo("-" * 40)
+
 def main():
     """Main function to run the bikeshare data analysis."""
     while True:
         # Get user input for city, month, and day
-        city, month, day = get_filters()
-        # Load data based on user input
+        # Start loading the city as soon as it is selected, while the month and day are asked
+        city, month, day = get_filters(on_city=prefetch_city)
+        # Load data based on user input, reusing the prefetched trips
         df = load_data(city, month, day)
 
         # Check if the DataFrame is empty
         if df.empty:
-            print("No data to analyze for the selected filters.")
+            _echo("No data to analyze for the selected filters.")
             break
         else:
-            # Perform and display analysis
-            time_stats(df)
-            station_stats(df)
-            trip_duration_stats(df)
-            user_stats(df)
-            count_null_values(df)
+            # Compute every statistic in a single pass, then display them
+            with measure('analysis', df) as timer:
+                stats = compute_stats(df)
+            display_stats(stats)
+            _echo("\nThis took %s seconds." % timer.seconds)
  
             # Ask user if they want to restart
             restart = input("\nWould you like to restart? Enter yes or no: ").lower()
@@ -385,4 +1764,4 @@ def main():
                 break  
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
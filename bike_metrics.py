@@ -0,0 +1,186 @@
+import contextlib
+import functools
+import json
+import numbers
+import threading
+import time
+import tracemalloc
+import pandas as pd
+
+class Measurement:
+    """
+    Result of one measured operation, filled by measure.
+
+    Attributes:
+        (str) name - Name of the operation
+        (int) rows - Number of rows processed, None if unknown; can be set inside the block
+        (int) duration_ns - Duration of the operation in nanoseconds (perf_counter_ns)
+        (int) peak_memory_bytes - Peak memory allocated during the operation, None unless
+                                  tracemalloc is tracing
+    """
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.duration_ns = None
+        self.peak_memory_bytes = None
+
+    @property
+    def seconds(self):
+        """(float) - Duration of the operation in seconds."""
+        return self.duration_ns / 1e9 if self.duration_ns is not None else None
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of the measurements of each operation.
+
+    For each operation name, the registry keeps the number of calls, the total and maximum
+    durations, the total number of rows processed and the largest peak memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def record(self, measurement):
+        """
+        Adds a measurement to the metrics of its operation.
+
+        Args:
+            measurement (Measurement) - Completed measurement
+        """
+        with self._lock:
+            metrics = self._metrics.setdefault(measurement.name, {
+                'calls': 0, 'total_ns': 0, 'max_ns': 0, 'rows': 0, 'peak_memory_bytes': None})
+            metrics['calls'] += 1
+            metrics['total_ns'] += measurement.duration_ns
+            metrics['max_ns'] = max(metrics['max_ns'], measurement.duration_ns)
+            metrics['rows'] += measurement.rows or 0
+            if measurement.peak_memory_bytes is not None:
+                metrics['peak_memory_bytes'] = max(metrics['peak_memory_bytes'] or 0, measurement.peak_memory_bytes)
+
+    def reset(self):
+        """Forgets every recorded measurement."""
+        with self._lock:
+            self._metrics.clear()
+
+    def to_dict(self):
+        """
+        Gives a snapshot of the metrics.
+
+        Returns:
+            dict - Metrics of each operation: 'calls', 'total_ns', 'max_ns', 'mean_ns', 'rows',
+                   'rows_per_second' and 'peak_memory_bytes'
+        """
+        with self._lock:
+            snapshot = {name: dict(metrics) for name, metrics in self._metrics.items()}
+        for metrics in snapshot.values():
+            metrics['mean_ns'] = metrics['total_ns'] // metrics['calls']
+            metrics['rows_per_second'] = metrics['rows'] * 1e9 / metrics['total_ns'] if metrics['total_ns'] else None
+        return snapshot
+
+    def to_json(self, **kwargs):
+        """
+        Exports the metrics as JSON.
+
+        Args:
+            kwargs - Options passed to json.dumps (e.g. indent)
+
+        Returns:
+            (str) - JSON object of the metrics of each operation
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix='bike'):
+        """
+        Exports the metrics in the Prometheus text exposition format.
+
+        Args:
+            (str) prefix - Prefix of the metric names
+
+        Returns:
+            (str) - One sample per operation for each metric
+        """
+        families = [
+            ('operation_calls_total', 'counter', 'Number of calls of the operation.', lambda m: m['calls']),
+            ('operation_duration_seconds_total', 'counter', 'Total time spent in the operation.',
+             lambda m: m['total_ns'] / 1e9),
+            ('operation_duration_seconds_max', 'gauge', 'Longest call of the operation.', lambda m: m['max_ns'] / 1e9),
+            ('operation_rows_total', 'counter', 'Number of rows processed by the operation.', lambda m: m['rows']),
+            ('operation_peak_memory_bytes', 'gauge', 'Largest peak memory of a call of the operation.',
+             lambda m: m['peak_memory_bytes']),
+        ]
+        snapshot = self.to_dict()
+        lines = []
+        for suffix, kind, description, value in families:
+            name = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for operation, metrics in sorted(snapshot.items()):
+                if value(metrics) is not None:
+                    label = operation.replace('\\', '\\\\').replace('"', '\\"')
+                    lines.append(f'{name}{{operation="{label}"}} {value(metrics)}')
+        return "\n".join(lines) + "\n"
+
+# Registry receiving the measurements of the analysis
+REGISTRY = MetricsRegistry()
+
+def count_rows(data):
+    """Gives the number of rows of a DataFrame or Series, or None for other objects."""
+    return len(data) if isinstance(data, (pd.DataFrame, pd.Series)) else None
+
+@contextlib.contextmanager
+def measure(name, rows=None, registry=None):
+    """
+    Measures the block it wraps and records it in a registry.
+
+    The duration uses the monotonic perf_counter_ns clock. The peak memory is only measured
+    while tracemalloc is tracing (e.g. after tracemalloc.start()); for nested measurements, the
+    inner ones reset the peak seen by the outer ones.
+
+    Args:
+        (str) name - Name of the operation
+        rows - Number of rows processed, or a DataFrame whose length is used
+        registry (MetricsRegistry) - Registry receiving the measurement, REGISTRY by default
+
+    Yields:
+        Measurement - Filled when the block exits; its rows can be set inside the block
+    """
+    measurement = Measurement(name, int(rows) if isinstance(rows, numbers.Integral) else count_rows(rows))
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        memory_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    start = time.perf_counter_ns()
+    try:
+        yield measurement
+    finally:
+        measurement.duration_ns = time.perf_counter_ns() - start
+        if tracing and tracemalloc.is_tracing():
+            measurement.peak_memory_bytes = max(0, tracemalloc.get_traced_memory()[1] - memory_before)
+        (registry or REGISTRY).record(measurement)
+
+def instrument(name=None, registry=None):
+    """
+    Decorates a function so that every call is measured (see measure).
+
+    The number of rows is the length of the first argument when it is a DataFrame, otherwise
+    the length of the returned DataFrame.
+
+    Args:
+        (str) name - Name of the operation, the name of the function by default
+        registry (MetricsRegistry) - Registry receiving the measurements, REGISTRY by default
+
+    Returns:
+        function - Decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with measure(name or function.__name__, count_rows(args[0]) if args else None, registry) as measurement:
+                result = function(*args, **kwargs)
+                if measurement.rows is None:
+                    measurement.rows = count_rows(result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import scipy.sparse as sparse
+except ImportError:  # scipy is optional, the matrix is stored as plain COO arrays
+    sparse = None
+
+# Derived columns of load_data that a matrix can be sliced by
+SLICE_COLUMNS = ["month", "day_of_week", "hour"]
+
+def station_index(df):
+    """
+    Assigns an integer ID to every station of the trips, in alphabetical order.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame with 'Start Station' and 'End Station' columns
+
+    Returns:
+        Index - Sorted station names; the position of a name is its ID
+    """
+    names = set()
+    for column in ('Start Station', 'End Station'):
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Only the categories that are actually used
+            values = values.cat.remove_unused_categories().cat.categories
+        names.update(pd.unique(values.dropna()))
+    return pd.Index(sorted(names), name='station')
+
+def station_ids(values, stations):
+    """
+    Converts station names into their integer IDs.
+
+    Args:
+        values (Series) - Station names, possibly categorical
+        stations (Index) - Station index returned by station_index
+
+    Returns:
+        ndarray - ID of each station, -1 for missing or unknown stations
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Look up each category once and remap the row codes
+        category_ids = stations.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, category_ids[codes], -1)
+    return stations.get_indexer(values)
+
+class ODMatrix:
+    """
+    Origin/destination matrix of a set of trips, stored as sparse COO arrays.
+
+    Entry (i, j) is the number of trips from the station of ID i to the station of ID j. The
+    entries are kept sorted by decreasing count, then by start and end station name, so the
+    top-k queries only slice them and ties are broken like Series.mode.
+
+    Attributes:
+        stations (Index) - Station names, the position of a name being its ID
+        origins (ndarray) - Start station ID of each non-zero entry
+        destinations (ndarray) - End station ID of each non-zero entry
+        counts (ndarray) - Number of trips of each non-zero entry
+        departures (ndarray) - Number of trips starting at each station, including the trips
+                               whose end station is missing
+        arrivals (ndarray) - Number of trips ending at each station, including the trips whose
+                             start station is missing
+    """
+
+    def __init__(self, stations, origins, destinations, counts, departures=None, arrivals=None):
+        size = len(stations)
+        order = np.lexsort((destinations, origins, -counts))
+        self.stations = stations
+        self.origins = np.asarray(origins, dtype=np.int64)[order]
+        self.destinations = np.asarray(destinations, dtype=np.int64)[order]
+        self.counts = np.asarray(counts, dtype=np.int64)[order]
+        if departures is None:
+            departures = np.bincount(self.origins, weights=self.counts, minlength=size).astype(np.int64)
+        if arrivals is None:
+            arrivals = np.bincount(self.destinations, weights=self.counts, minlength=size).astype(np.int64)
+        self.departures = departures
+        self.arrivals = arrivals
+
+    @classmethod
+    def from_trips(cls, df, stations=None):
+        """
+        Builds the matrix of a set of trips.
+
+        Args:
+            df (DataFrame) - Pandas DataFrame with 'Start Station' and 'End Station' columns
+            stations (Index) - Optional station index, built from df if not given; pass the
+                               same index to build comparable matrices
+
+        Returns:
+            ODMatrix - Trip counts between the stations
+        """
+        return build_od_matrices(df, stations=stations)[None]
+
+    @property
+    def shape(self):
+        """(tuple) - Number of start stations and of end stations."""
+        return (len(self.stations), len(self.stations))
+
+    @property
+    def total_trips(self):
+        """(int) - Number of trips with both a start and an end station."""
+        return int(self.counts.sum())
+
+    def top_trips(self, k=10):
+        """
+        Gives the most frequent trips.
+
+        Args:
+            (int) k - Number of trips to return
+
+        Returns:
+            DataFrame - 'Start Station', 'End Station' and number of 'trips', most frequent first
+        """
+        return pd.DataFrame({
+            'Start Station': self.stations[self.origins[:k]],
+            'End Station': self.stations[self.destinations[:k]],
+            'trips': self.counts[:k],
+        })
+
+    def _top_stations(self, counts, k):
+        """Gives the k stations with the largest counts, ties broken by name."""
+        order = np.lexsort((np.arange(len(counts)), -counts))[:k]
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order], index=self.stations[order], name='trips')
+
+    def top_start_stations(self, k=10):
+        """
+        Gives the stations where the most trips start.
+
+        Args:
+            (int) k - Number of stations to return
+
+        Returns:
+            Series - Number of departures of each station, most used first
+        """
+        return self._top_stations(self.departures, k)
+
+    def top_end_stations(self, k=10):
+        """
+        Gives the stations where the most trips end.
+
+        Args:
+            (int) k - Number of stations to return
+
+        Returns:
+            Series - Number of arrivals of each station, most used first
+        """
+        return self._top_stations(self.arrivals, k)
+
+    def flow_balance(self):
+        """
+        Compares the trips leaving and reaching each station, e.g. to plan bike rebalancing.
+
+        Returns:
+            DataFrame - 'departures', 'arrivals' and 'net' (arrivals minus departures) per
+                        station; a negative net means the station loses bikes
+        """
+        return pd.DataFrame({
+            'departures': self.departures,
+            'arrivals': self.arrivals,
+            'net': self.arrivals - self.departures,
+        }, index=self.stations)
+
+    def to_dense(self):
+        """
+        Expands the matrix into a dense array, only suitable for a small number of stations.
+
+        Returns:
+            ndarray - Trip counts with start stations as rows and end stations as columns
+        """
+        dense = np.zeros(self.shape, dtype=np.int64)
+        dense[self.origins, self.destinations] = self.counts
+        return dense
+
+    def to_scipy(self):
+        """
+        Converts the matrix into a scipy sparse matrix.
+
+        Returns:
+            coo_matrix - Trip counts with start stations as rows and end stations as columns
+
+        Raises:
+            ImportError - If scipy is not installed
+        """
+        if sparse is None:
+            raise ImportError("scipy is required to convert the matrix into a scipy sparse matrix.")
+        return sparse.coo_matrix((self.counts, (self.origins, self.destinations)), shape=self.shape)
+
+def build_od_matrices(df, by=None, stations=None):
+    """
+    Builds one origin/destination matrix per slice of the trips, in a single pass.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame with 'Start Station' and 'End Station' columns, and the
+                         column to slice by (e.g. returned by load_data)
+        (str) by - Optional column among SLICE_COLUMNS to build one matrix per value of
+        stations (Index) - Optional station index, built from df if not given
+
+    Returns:
+        dict - ODMatrix of each value of the slice column (sharing the same station index), or a
+               single matrix under the key None when no slice column is given
+    """
+    stations = station_index(df) if stations is None else stations
+    size = len(stations)
+    origins = station_ids(df['Start Station'], stations)
+    destinations = station_ids(df['End Station'], stations)
+
+    if by is None:
+        slice_keys, slice_codes = np.array([None], dtype=object), np.zeros(len(df), dtype=np.int64)
+    else:
+        slice_codes, slice_keys = pd.factorize(df[by], sort=True)
+    known = slice_codes >= 0
+
+    # Encode each (slice, start, end) triple as one integer and count them all at once
+    complete = known & (origins >= 0) & (destinations >= 0)
+    keys = (slice_codes[complete] * size + origins[complete]) * size + destinations[complete]
+    keys, counts = np.unique(keys, return_counts=True)
+    entry_slices, pairs = np.divmod(keys, size * size)
+
+    # Count the departures and arrivals of each (slice, station), including incomplete trips
+    shape = (len(slice_keys), size)
+    leaving = known & (origins >= 0)
+    reaching = known & (destinations >= 0)
+    departures = np.bincount(slice_codes[leaving] * size + origins[leaving], minlength=shape[0] * size)
+    arrivals = np.bincount(slice_codes[reaching] * size + destinations[reaching], minlength=shape[0] * size)
+    departures, arrivals = departures.reshape(shape), arrivals.reshape(shape)
+
+    matrices = {}
+    for code, key in enumerate(slice_keys):
+        entries = entry_slices == code
+        matrix_origins, matrix_destinations = np.divmod(pairs[entries], size)
+        matrices[key.item() if isinstance(key, np.generic) else key] = ODMatrix(
+            stations, matrix_origins, matrix_destinations, counts[entries], departures[code], arrivals[code])
+    return matrices
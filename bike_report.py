@@ -0,0 +1,149 @@
+import argparse
+import csv
+import json
+import sys
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import CITY_DATA, DAY_NAMES, MONTH_NAMES, compute_stats, filter_data, load_data
+
+# Filter values accepted for each dimension, "all" applying no filter
+MONTH_FILTERS = ["all"] + [name.lower() for name in MONTH_NAMES[:6]]
+DAY_FILTERS = ["all"] + [name.lower() for name in DAY_NAMES]
+
+def to_serializable(value):
+    """
+    Converts a statistic into plain JSON types.
+
+    Series become dictionaries, tuples become lists, numpy scalars become Python numbers and
+    missing values become None.
+
+    Args:
+        value - Statistic returned by compute_stats, or a container of statistics
+
+    Returns:
+        Value made of dict, list, str, int, float, bool and None only
+    """
+    if isinstance(value, pd.Series):
+        return {str(key): to_serializable(item) for key, item in value.items()}
+    if isinstance(value, dict):
+        return {str(key): to_serializable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_serializable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+def flatten(record, prefix=''):
+    """
+    Flattens a nested record into one column per statistic, for the CSV output.
+
+    Args:
+        (dict) record - Serializable record (see to_serializable)
+        (str) prefix - Name of the enclosing columns
+
+    Returns:
+        dict - Values keyed by their dotted path (e.g. 'user_stats.user_types.subscriber');
+               lists are joined with " to "
+    """
+    columns = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            columns.update(flatten(value, name + '.'))
+        elif isinstance(value, list):
+            columns[name] = " to ".join(str(item) for item in value)
+        else:
+            columns[name] = value
+    return columns
+
+def run_report(cities, months=("all",), days=("all",), compact=False):
+    """
+    Computes the statistics of every combination of cities, months and days.
+
+    Each city is loaded once, then filtered in memory for each month and day combination.
+
+    Args:
+        (list) cities - Names of the cities to analyze
+        (list) months - Month filters, among MONTH_FILTERS
+        (list) days - Day filters, among DAY_FILTERS
+        (bool) compact - True to load the memory-optimized profile (see optimize_dtypes)
+
+    Returns:
+        list - One serializable record per combination, with the 'city', 'month', 'day', the
+               number of 'trips' and the statistics of compute_stats
+    """
+    records = []
+    for city in cities:
+        trips = load_data(city, 'all', 'all', compact=compact)
+        for month in months:
+            for day in days:
+                df = filter_data(trips, month, day) if not trips.empty else trips
+                record = {'city': city, 'month': month, 'day': day, 'trips': len(df)}
+                record.update(compute_stats(df))
+                records.append(to_serializable(record))
+    return records
+
+def write_json(records, file):
+    """
+    Writes the records as a JSON array.
+
+    Args:
+        (list) records - Records returned by run_report
+        file - Text file receiving the records
+    """
+    json.dump(records, file, indent=2)
+    file.write("\n")
+
+def write_csv(records, file):
+    """
+    Writes the records as CSV, one row per record and one column per statistic.
+
+    Args:
+        (list) records - Records returned by run_report
+        file - Text file receiving the records
+    """
+    rows = [flatten(record) for record in records]
+    # Columns in order of first appearance, as the cities do not all have the same columns
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    writer = csv.DictWriter(file, fieldnames=columns, restval='', lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+def main(argv=None):
+    """Runs the analysis of the given filters from the command line, without prompts."""
+    parser = argparse.ArgumentParser(description="Compute the bike share statistics of several filters at once.")
+    parser.add_argument('--cities', nargs='+', default=list(CITY_DATA), choices=list(CITY_DATA),
+                        help="cities to analyze (default: every city)")
+    parser.add_argument('--months', nargs='+', default=["all"], choices=MONTH_FILTERS,
+                        help="month filters, 'all' applying no filter (default: all)")
+    parser.add_argument('--days', nargs='+', default=["all"], choices=DAY_FILTERS,
+                        help="day filters, 'all' applying no filter (default: all)")
+    parser.add_argument('--all-combinations', action='store_true',
+                        help="analyze every month and day filter, including 'all'")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json', help="output format")
+    parser.add_argument('--output', help="file receiving the report (default: standard output)")
+    parser.add_argument('--compact', action='store_true', help="load the memory-optimized profile")
+    args = parser.parse_args(argv)
+
+    months, days = (MONTH_FILTERS, DAY_FILTERS) if args.all_combinations else (args.months, args.days)
+
+    # Keep the standard output for the report
+    quiet = bike_investigation.QUIET
+    bike_investigation.QUIET = True
+    try:
+        records = run_report(args.cities, months, days, args.compact)
+    finally:
+        bike_investigation.QUIET = quiet
+
+    write = write_json if args.format == 'json' else write_csv
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            write(records, file)
+    else:
+        write(records, sys.stdout)
+
+if __name__ == "__main__":
+    main()
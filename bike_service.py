@@ -0,0 +1,237 @@
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import bike_investigation
+from bike_investigation import CITY_DATA, compute_stats, filter_data, load_data
+from bike_metrics import REGISTRY, measure
+from bike_report import DAY_FILTERS, MONTH_FILTERS, to_serializable
+
+# Address the service listens on by default; it is only reachable from this machine
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+# Number of filter combinations whose responses are kept in memory
+RESPONSE_CACHE_SIZE = 256
+
+class StatsService:
+    """
+    Statistics of warm in-memory cities, with the responses cached by filter.
+
+    Every city is loaded once by warm; each request then only filters the loaded trips in
+    memory and computes their statistics, and the responses of the most recent filters are
+    kept (least recently used first out). The methods can be called from several threads.
+
+    Attributes:
+        (dict) datasets - Trips of each city, as returned by load_data with no filter
+        (int) hits - Number of responses served from the cache, or by waiting for the computation
+                     of the same filter by another thread
+        (int) misses - Number of responses computed
+    """
+
+    def __init__(self, cities=None, compact=False, cache_size=RESPONSE_CACHE_SIZE):
+        self.cities = list(CITY_DATA) if cities is None else list(cities)
+        self.compact = compact
+        self.cache_size = cache_size
+        self.datasets = {}
+        self.hits = self.misses = 0
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def warm(self):
+        """Loads every city of the service in memory."""
+        for city in self.cities:
+            with measure('service.warm') as measurement:
+                measurement.rows = len(self._dataset(city))
+
+    def _dataset(self, city):
+        """Gives the trips of a city, loading them once even when several threads ask at the same time."""
+        with self._load_lock:
+            if city not in self.datasets:
+                self.datasets[city] = load_data(city, 'all', 'all', compact=self.compact)
+            return self.datasets[city]
+
+    def clear(self):
+        """Forgets the cached responses, e.g. after the city files changed and warm was called again."""
+        with self._lock:
+            self._responses.clear()
+
+    def stats(self, city, month='all', day='all'):
+        """
+        Gives the statistics of a city for a month and day filter.
+
+        Args:
+            (str) city - Name of the city, among the cities of the service
+            (str) month - Month filter, among MONTH_FILTERS
+            (str) day - Day filter, among DAY_FILTERS
+
+        Returns:
+            dict - Serializable record with the 'city', 'month', 'day', the number of 'trips' and
+                   the statistics of compute_stats (time_stats, station_stats,
+                   trip_duration_stats, user_stats and null_counts)
+
+        Raises:
+            ValueError - If the city or a filter is not valid
+        """
+        city, month, day = city.lower(), month.lower(), day.lower()
+        if city not in self.cities:
+            raise ValueError(f"Unknown city: {city}. Use one of {', '.join(self.cities)}.")
+        if month not in MONTH_FILTERS:
+            raise ValueError(f"Unknown month: {month}. Use one of {', '.join(MONTH_FILTERS)}.")
+        if day not in DAY_FILTERS:
+            raise ValueError(f"Unknown day: {day}. Use one of {', '.join(DAY_FILTERS)}.")
+
+        # The cache holds one future per filter, so concurrent requests for a filter that is not
+        # cached yet wait for a single computation
+        key = (city, month, day)
+        with self._lock:
+            future = self._responses.get(key)
+            cached = future is not None
+            if cached:
+                self._responses.move_to_end(key)
+                self.hits += 1
+            else:
+                future = self._responses[key] = Future()
+                self.misses += 1
+                while len(self._responses) > self.cache_size:
+                    self._responses.popitem(last=False)
+        if cached:
+            return future.result()
+
+        # Compute outside the lock, so that other filters are served meanwhile
+        try:
+            trips = self._dataset(city)
+            df = filter_data(trips, month, day) if not trips.empty else trips
+            record = {'city': city, 'month': month, 'day': day, 'trips': len(df)}
+            record.update(compute_stats(df))
+            record = to_serializable(record)
+        except BaseException as error:
+            with self._lock:
+                if self._responses.get(key) is future:
+                    del self._responses[key]  # Let the next request try again
+            future.set_exception(error)
+            raise
+        future.set_result(record)
+        return record
+
+    def metrics(self):
+        """
+        Exports the latency and throughput metrics of the service and of the analysis.
+
+        Returns:
+            (str) - Metrics of REGISTRY and cache counters, in the Prometheus text format
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return REGISTRY.to_prometheus() + (
+            "# HELP bike_service_cache_hits_total Number of responses served from the cache.\n"
+            "# TYPE bike_service_cache_hits_total counter\n"
+            f"bike_service_cache_hits_total {hits}\n"
+            "# HELP bike_service_cache_misses_total Number of responses computed.\n"
+            "# TYPE bike_service_cache_misses_total counter\n"
+            f"bike_service_cache_misses_total {misses}\n"
+        )
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the endpoints of the service:
+
+        GET /stats?city=chicago&month=june&day=all - Statistics of the filter, as JSON
+        GET /metrics - Metrics of the service, in the Prometheus text format
+
+    Invalid requests get a 400 response and failed computations a 500 response, both with an
+    'error' message as JSON.
+    """
+
+    def do_GET(self):
+        """Answers a GET request, measuring its latency and trips under 'service.<endpoint>'."""
+        url = urlsplit(self.path)
+        endpoint = url.path.strip('/')
+        if endpoint not in ('stats', 'metrics'):
+            self._send(404, {'error': f"Unknown endpoint: {url.path}."})
+            return
+
+        with measure(f"service.{endpoint}") as measurement:
+            if endpoint == 'metrics':
+                self._send(200, self.server.service.metrics(), content_type='text/plain; version=0.0.4')
+                return
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            if 'city' not in query:
+                self._send(400, {'error': "The city parameter is required."})
+                return
+            try:
+                record = self.server.service.stats(query['city'], query.get('month', 'all'), query.get('day', 'all'))
+            except ValueError as error:
+                self._send(400, {'error': str(error)})
+                return
+            except Exception as error:
+                # Any other failure (e.g. an unreadable city file) still gets an answer
+                self._send(500, {'error': f"The statistics could not be computed: {error}"})
+                return
+            measurement.rows = record['trips']
+            self._send(200, record)
+
+    def _send(self, status, body, content_type='application/json'):
+        """Sends a response, encoding the dictionaries as JSON."""
+        data = (json.dumps(body) if isinstance(body, dict) else body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """Logs the requests unless the server is quiet."""
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, cities=None, compact=False, quiet=False):
+    """
+    Creates the HTTP server of the service, with every city already loaded.
+
+    Each request is handled in its own thread. The server is not started: call serve_forever,
+    and shutdown to stop it.
+
+    Args:
+        (str) host - Address to listen on, this machine only by default
+        (int) port - Port to listen on, 0 to pick a free one (see server_address)
+        (list) cities - Names of the cities to serve, all of CITY_DATA by default
+        (bool) compact - True to load the memory-optimized profile (see optimize_dtypes)
+        (bool) quiet - True to not log the requests
+
+    Returns:
+        ThreadingHTTPServer - Server with the StatsService under its 'service' attribute
+    """
+    service = StatsService(cities, compact)
+    service.warm()
+    server = ThreadingHTTPServer((host, port), StatsRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+def main(argv=None):
+    """Runs the service from the command line until it is interrupted."""
+    parser = argparse.ArgumentParser(description="Serve the bike share statistics over HTTP.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--cities', nargs='+', default=list(CITY_DATA), choices=list(CITY_DATA),
+                        help="cities to serve (default: every city)")
+    parser.add_argument('--compact', action='store_true', help="load the memory-optimized profile")
+    args = parser.parse_args(argv)
+
+    bike_investigation.QUIET = True  # Silence the analysis output; the request log goes to stderr
+    server = create_server(args.host, args.port, args.cities, args.compact)
+    print(f"Serving the statistics on http://{server.server_address[0]}:{server.server_address[1]}/stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
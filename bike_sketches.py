@@ -0,0 +1,341 @@
+import math
+import numpy as np
+import pandas as pd
+from bike_investigation import aggregate_stats
+
+# Default relative error of the approximate counts, as a share of the number of trips
+DEFAULT_EPSILON = 0.001
+# Default probability that a Count-Min estimate exceeds its error bound
+DEFAULT_DELTA = 0.01
+# Number of trips counted at a time, which bounds the memory used by each update
+SKETCH_CHUNK_ROWS = 1_000_000
+# Columns identifying the items of each sketched statistic
+SKETCH_KEYS = {
+    'start_station': ['Start Station'],
+    'end_station': ['End Station'],
+    'trip': ['Start Station', 'End Station'],
+}
+
+def _plain_index(index):
+    """Converts the categorical levels of an index of items into plain objects, so indexes can be combined."""
+    if isinstance(index, pd.MultiIndex):
+        return pd.MultiIndex.from_arrays([index.get_level_values(level).astype(object)
+                                          for level in range(index.nlevels)], names=index.names)
+    return pd.Index(index.astype(object), name=index.name)
+
+class SpaceSaving:
+    """
+    Space-Saving summary of the most frequent items of a stream, in a fixed number of counters.
+
+    The stream is consumed in batches of pre-aggregated counts. An item that is not tracked is
+    assumed to have occurred as often as the least counted tracked item (the floor), so every
+    count is an upper bound of the true count; its recorded error bounds the overestimation
+    and never exceeds total / capacity.
+
+    Attributes:
+        (int) capacity - Maximum number of tracked items
+        (int) total - Number of occurrences counted so far
+        counters (DataFrame) - 'count' and 'error' of each tracked item, most frequent first
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        self.counters = pd.DataFrame({'count': pd.Series(dtype='int64'), 'error': pd.Series(dtype='int64')})
+
+    @property
+    def floor(self):
+        """(int) - Upper bound of the count of any item that is not tracked."""
+        return int(self.counters['count'].iloc[-1]) if len(self.counters) == self.capacity else 0
+
+    def update(self, counts):
+        """
+        Adds a batch of occurrences.
+
+        Args:
+            counts (Series) - Number of occurrences of each item in the batch, indexed by item
+        """
+        counts = counts[counts > 0].astype('int64')
+        counts.index = _plain_index(counts.index)
+        batch = pd.DataFrame({'count': counts, 'error': 0})
+        self._combine(batch, 0, int(counts.sum()))
+
+    def merge(self, other):
+        """
+        Adds the occurrences summarized by another sketch of the same capacity (e.g. of another partition).
+
+        Args:
+            other (SpaceSaving) - Sketch to merge into this one
+        """
+        self._combine(other.counters, other.floor, other.total)
+
+    def _combine(self, other, other_floor, other_total):
+        """Adds the counters of a batch or sketch, each side counting its floor for the items it does not track."""
+        if self.counters.empty:
+            combined = other.copy()
+            combined['count'] += self.floor
+        else:
+            index = self.counters.index.union(other.index)
+            mine, theirs = self.counters.reindex(index), other.reindex(index)
+            combined = pd.DataFrame({
+                'count': mine['count'].fillna(self.floor) + theirs['count'].fillna(other_floor),
+                'error': mine['error'].fillna(self.floor) + theirs['error'].fillna(other_floor),
+            }).astype('int64')
+        # Keep the largest counts, ties broken by the smallest item like Series.mode
+        combined = combined.sort_index().sort_values('count', ascending=False, kind='stable')
+        self.counters = combined.head(self.capacity)
+        self.total += other_total
+
+    def top(self, k=10):
+        """
+        Gives the most frequent items.
+
+        Args:
+            (int) k - Number of items to return
+
+        Returns:
+            DataFrame - 'count' (upper bound) and 'error' of the k most counted items
+        """
+        return self.counters.head(k)
+
+class CountMinSketch:
+    """
+    Count-Min sketch giving an upper bound of the count of any item in fixed memory.
+
+    With probability 1 - delta, an estimate exceeds the true count by at most epsilon * total,
+    for a width of e / epsilon and a depth of ln(1 / delta).
+
+    Attributes:
+        (int) width - Number of counters per row
+        (int) depth - Number of rows, each with its own hash function
+        (int) seed - Seed of the hash functions; only sketches with the same seed can be merged
+        table (ndarray) - Counters, of shape (depth, width)
+        (int) total - Number of occurrences counted so far
+    """
+
+    def __init__(self, width, depth, seed=0):
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, seed=0):
+        """
+        Creates a sketch sized for an error bound.
+
+        Args:
+            (float) epsilon - Maximum overestimation, as a share of the total count
+            (float) delta - Probability of exceeding that bound
+            (int) seed - Seed of the hash functions
+
+        Returns:
+            CountMinSketch - Empty sketch
+        """
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), seed)
+
+    def _buckets(self, items):
+        """Hashes each item once per row into the index of its counter."""
+        frame = items.to_frame(index=False)
+        return np.stack([
+            pd.util.hash_pandas_object(frame, index=False, hash_key=f"{self.seed:08d}{row:08d}").to_numpy() % self.width
+            for row in range(self.depth)
+        ]).astype(np.int64)
+
+    def update(self, counts):
+        """
+        Adds a batch of occurrences.
+
+        Args:
+            counts (Series) - Number of occurrences of each item in the batch, indexed by item
+        """
+        counts = counts[counts > 0]
+        buckets = self._buckets(_plain_index(counts.index))
+        weights = counts.to_numpy(dtype=np.int64)
+        for row in range(self.depth):
+            np.add.at(self.table[row], buckets[row], weights)
+        self.total += int(weights.sum())
+
+    def estimate(self, items):
+        """
+        Estimates the counts of items.
+
+        Args:
+            items (Index) - Items to look up (a MultiIndex for the trips)
+
+        Returns:
+            ndarray - Upper bound of the count of each item
+        """
+        if len(items) == 0:
+            return np.zeros(0, dtype=np.int64)
+        buckets = self._buckets(_plain_index(items))
+        return self.table[np.arange(self.depth)[:, None], buckets].min(axis=0)
+
+    def merge(self, other):
+        """
+        Adds the counters of another sketch with the same dimensions and seed.
+
+        Args:
+            other (CountMinSketch) - Sketch to merge into this one
+
+        Raises:
+            ValueError - If the sketches do not have the same dimensions and seed
+        """
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Only sketches with the same dimensions and seed can be merged.")
+        self.table += other.table
+        self.total += other.total
+
+class StationSketch:
+    """
+    Approximate counts of the start stations, end stations and trips, in bounded memory.
+
+    Each statistic has a Space-Saving summary, which tracks the candidate heavy hitters, and a
+    Count-Min sketch, which tightens their counts; the memory depends on epsilon and delta only.
+
+    Attributes:
+        (float) epsilon - Maximum overestimation of a count, as a share of the counted trips
+        (float) delta - Probability that a Count-Min estimate exceeds its bound
+        (dict) summaries - SpaceSaving of each key of SKETCH_KEYS
+        (dict) sketches - CountMinSketch of each key of SKETCH_KEYS
+    """
+
+    def __init__(self, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.summaries = {key: SpaceSaving(math.ceil(1 / epsilon)) for key in SKETCH_KEYS}
+        self.sketches = {key: CountMinSketch.from_error(epsilon, delta) for key in SKETCH_KEYS}
+
+    def update(self, df):
+        """
+        Counts the stations and trips of a DataFrame; missing stations are ignored.
+
+        Args:
+            df (DataFrame) - Pandas DataFrame with 'Start Station' and 'End Station' columns
+        """
+        for key, columns in SKETCH_KEYS.items():
+            if len(columns) == 1:
+                counts = df[columns[0]].value_counts(sort=False)
+            else:
+                counts = df.groupby(columns, observed=True, sort=False).size()
+            self.summaries[key].update(counts)
+            self.sketches[key].update(counts)
+
+    def merge(self, other):
+        """
+        Adds the counts of another sketch built with the same epsilon and delta.
+
+        Args:
+            other (StationSketch) - Sketch to merge into this one
+        """
+        for key in SKETCH_KEYS:
+            self.summaries[key].merge(other.summaries[key])
+            self.sketches[key].merge(other.sketches[key])
+
+    def top(self, key, k=10):
+        """
+        Gives the most frequent items of a statistic.
+
+        Args:
+            (str) key - 'start_station', 'end_station' or 'trip'
+            (int) k - Number of items to return
+
+        Returns:
+            DataFrame - 'count' (upper bound of the true count) and 'lower' (lower bound) of the
+                        k most frequent items, indexed by station name or (start, end) pair
+        """
+        summary = self.summaries[key].counters
+        upper = np.minimum(summary['count'].to_numpy(), self.sketches[key].estimate(summary.index))
+        top = pd.DataFrame({'count': upper, 'lower': summary['count'] - summary['error']}, index=summary.index)
+        top = top.sort_index().sort_values('count', ascending=False, kind='stable')
+        return top.head(k)
+
+    def station_stats(self):
+        """
+        Gives the approximate most common stations and trip.
+
+        Returns:
+            dict - Same keys as station_stats, None when no station was counted
+        """
+        names = {'start_station': 'most_common_start_station', 'end_station': 'most_common_end_station',
+                 'trip': 'most_common_trip'}
+        result = {}
+        for key, name in names.items():
+            top = self.top(key, 1)
+            result[name] = top.index[0] if len(top) else None
+        return result
+
+def sketch_stations(df, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, chunksize=SKETCH_CHUNK_ROWS):
+    """
+    Builds the station sketch of a set of trips, counting a bounded number of trips at a time.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data, or an iterable of DataFrames
+                         (e.g. returned by load_data with a chunksize)
+        (float) epsilon - Maximum overestimation of a count, as a share of the trips
+        (float) delta - Probability that a Count-Min estimate exceeds its bound
+        (int) chunksize - Number of rows of an in-memory DataFrame counted at a time
+
+    Returns:
+        StationSketch - Approximate counts of the stations and trips
+    """
+    chunks = df
+    if isinstance(df, pd.DataFrame):
+        chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    sketch = StationSketch(epsilon, delta)
+    for chunk in chunks:
+        if 'Start Station' in chunk.columns and 'End Station' in chunk.columns:
+            sketch.update(chunk)
+    return sketch
+
+def approximate_station_stats(df, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA, chunksize=SKETCH_CHUNK_ROWS):
+    """
+    Approximates station_stats in bounded memory, without counting every (start, end) pair exactly.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data, or an iterable of DataFrames
+        (float) epsilon - Maximum overestimation of a count, as a share of the trips
+        (float) delta - Probability that a Count-Min estimate exceeds its bound
+        (int) chunksize - Number of rows of an in-memory DataFrame counted at a time
+
+    Returns:
+        dict - The most common start station, end station and trip, like station_stats
+    """
+    return sketch_stations(df, epsilon, delta, chunksize).station_stats()
+
+def validation_report(df, k=10, epsilon=DEFAULT_EPSILON, delta=DEFAULT_DELTA):
+    """
+    Compares the approximate top-k stations and trips with the exact ones.
+
+    Args:
+        df (DataFrame) - Pandas DataFrame containing trip data
+        (int) k - Number of most frequent items compared
+        (float) epsilon - Maximum overestimation of a count, as a share of the trips
+        (float) delta - Probability that a Count-Min estimate exceeds its bound
+
+    Returns:
+        DataFrame - For each statistic: the 'recall' of the exact top-k among the approximate
+                    top-k, the largest overestimation of the approximate counts ('max_error'),
+                    the guaranteed bound ('error_bound', epsilon times the counted trips),
+                    whether it holds ('within_bound') and whether the most common item matches
+    """
+    exact = aggregate_stats(df, ('station',))
+    sketch = sketch_stations(df, epsilon, delta)
+    rows = {}
+    for key in SKETCH_KEYS:
+        # Exact counts, most frequent first with ties broken by the smallest item
+        counts = pd.Series(exact[key] or {}, dtype='int64')
+        counts = counts.sort_index().sort_values(ascending=False, kind='stable')
+        approximate = sketch.top(key, k)
+        true_counts = counts.reindex(approximate.index, fill_value=0)
+        max_error = int((approximate['count'] - true_counts).max()) if len(approximate) else 0
+        error_bound = epsilon * sketch.summaries[key].total
+        rows[key] = {
+            'recall': len(set(counts.index[:k]) & set(approximate.index)) / min(k, len(counts)) if len(counts) else 1.0,
+            'max_error': max_error,
+            'error_bound': error_bound,
+            'within_bound': max_error <= error_bound,
+            'top_matches': (counts.index[0] if len(counts) else None) == (approximate.index[0] if len(approximate) else None),
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
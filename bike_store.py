@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import shutil
+from collections import Counter
+import pandas as pd
+import bike_investigation
+from bike_investigation import (aggregate_stats, display_stats, file_hash, merge_aggregates, read_city_csv,
+                                summarize_stats, _as_python, _prepare_data)
+
+# Directory holding one trip store per city
+STORE_DIR = "Bike_raw_data/store"
+# Version of the store layout, bumped whenever the content of the state file changes
+STORE_VERSION = 1
+
+class TripStore:
+    """
+    Append-only store of the trip batches of a city, with the running aggregates of all of them.
+
+    Each batch is kept as one part file (Parquet when pyarrow is installed, otherwise a copy of
+    the CSV file), and the aggregates of the whole history (see aggregate_stats) are updated by
+    merging those of the new batch, so ingesting a batch costs in proportion to its size only.
+    The store supports a single writer at a time.
+
+    Attributes:
+        (str) path - Directory of the store
+        (list) batches - Name, SHA-256 digest, number of rows and part file of each batch
+        (dict) aggregate - Aggregates of every ingested trip, None while the store is empty
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.batches = []
+        self.aggregate = None
+        state_path = os.path.join(path, 'state.json')
+        if os.path.exists(state_path):
+            with open(state_path) as file:
+                state = json.load(file)
+            if state.get('version') != STORE_VERSION:
+                raise ValueError(f"The store {path} has an unsupported version: {state.get('version')}.")
+            self.batches = state['batches']
+            self.aggregate = _decode_aggregate(state['aggregate'])
+
+    @classmethod
+    def open(cls, city):
+        """
+        Opens the store of a city, empty if nothing was ingested yet.
+
+        Args:
+            (str) city - Name of the city
+
+        Returns:
+            TripStore - Store of the city
+        """
+        return cls(store_path(city))
+
+    def append(self, source, name=None):
+        """
+        Ingests a new batch of trips and updates the running aggregates.
+
+        Args:
+            (str) source - Path of a CSV file in the layout of the city files
+            (str) name - Name of the batch, the file name by default
+
+        Returns:
+            dict - Record of the batch: 'name', 'sha256', 'rows' and 'part' (file name in the store)
+
+        Raises:
+            ValueError - If the same file content was already ingested
+        """
+        digest = file_hash(source)
+        if any(batch['sha256'] == digest for batch in self.batches):
+            raise ValueError(f"The batch {source} was already ingested.")
+
+        df = read_city_csv(source)
+        aggregate = aggregate_stats(_prepare_data(df, 'all', 'all'))
+
+        # Write the part before the state, so the state never refers to a missing part
+        os.makedirs(self.path, exist_ok=True)
+        extension = '.parquet' if bike_investigation.pq is not None else '.csv'
+        part = f"part-{len(self.batches):05d}{extension}"
+        tmp_path = os.path.join(self.path, part + '.tmp')
+        if bike_investigation.pq is not None:
+            df.to_parquet(tmp_path, index=False)
+        else:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, os.path.join(self.path, part))
+
+        batch = {'name': name or os.path.basename(source), 'sha256': digest, 'rows': len(df), 'part': part}
+        self.aggregate = aggregate if self.aggregate is None else merge_aggregates(self.aggregate, aggregate)
+        self.batches.append(batch)
+        self._write_state()
+        return batch
+
+    def stats(self):
+        """
+        Gives the statistics of every ingested trip, from the running aggregates only.
+
+        Returns:
+            dict - Statistics of the trips (see summarize_stats), or None while the store is empty
+        """
+        return summarize_stats(self.aggregate) if self.aggregate is not None else None
+
+    def load_trips(self, month='all', day='all'):
+        """
+        Reads the trips of every batch back, e.g. to compute statistics for a month or a day.
+
+        Args:
+            (str) month - Name of the month to filter by, or "all" to apply no month filter
+            (str) day - Name of the day of the week to filter by, or "all" to apply no day filter
+
+        Returns:
+            df - Pandas DataFrame of the trips, filtered and validated like the one of load_data
+        """
+        parts = []
+        for batch in self.batches:
+            path = os.path.join(self.path, batch['part'])
+            parts.append(pd.read_parquet(path) if path.endswith('.parquet') else read_city_csv(path))
+        if not parts:
+            return pd.DataFrame()
+        return _prepare_data(pd.concat(parts, ignore_index=True), month, day)
+
+    def _write_state(self):
+        """Writes the batches and the aggregates atomically."""
+        state = {'version': STORE_VERSION, 'batches': self.batches, 'aggregate': _encode_aggregate(self.aggregate)}
+        tmp_path = os.path.join(self.path, 'state.json.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(state, file)
+        os.replace(tmp_path, os.path.join(self.path, 'state.json'))
+
+def store_path(city):
+    """
+    Gives the location of the store of a city.
+
+    Args:
+        (str) city - Name of the city
+
+    Returns:
+        (str) - Path of the store directory
+    """
+    return os.path.join(STORE_DIR, city.replace(' ', '_'))
+
+def _encode_key(key):
+    """Converts a counter key into a JSON value, the (start, end) trips becoming lists."""
+    return [_as_python(item) for item in key] if isinstance(key, tuple) else _as_python(key)
+
+def _encode_aggregate(aggregate):
+    """Converts aggregates into JSON values, each Counter becoming a list of [key, count] pairs."""
+    return {name: [[_encode_key(key), count] for key, count in value.items()] if isinstance(value, Counter) else value
+            for name, value in aggregate.items()}
+
+def _decode_aggregate(encoded):
+    """Restores the aggregates written by _encode_aggregate."""
+    return {name: Counter({tuple(key) if isinstance(key, list) else key: count for key, count in value})
+            if isinstance(value, list) else value
+            for name, value in encoded.items()}
+
+def main():
+    """Ingests trip files into the store of a city from the command line and displays its statistics."""
+    parser = argparse.ArgumentParser(description="Append new trip files to the store of a city.")
+    parser.add_argument('city', choices=list(bike_investigation.CITY_DATA), help="city receiving the trips")
+    parser.add_argument('files', nargs='+', help="CSV files of new trips, in the layout of the city files")
+    args = parser.parse_args()
+
+    store = TripStore.open(args.city)
+    for path in args.files:
+        batch = store.append(path)
+        print(f"Ingested {batch['rows']} trips from {batch['name']}.")
+    display_stats(store.stats())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from benchmark_bike_investigation import LAYOUTS, generate_trips, run_benchmarks, find_regressions
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create a temporary directory for the generated files.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_generate_trips(self):
+        """
+        Test that the generator writes the column layout of each city and is reproducible.
+        """
+        for layout, columns in LAYOUTS.items():
+            path = os.path.join(self.tmp_dir.name, 'trips.csv')
+            generate_trips(path, 250, layout, seed=1)
+            df = pd.read_csv(path)
+            self.assertEqual(len(df), 250)
+            self.assertEqual(list(df.columns[1:]), columns[1:])
+            self.assertTrue(pd.to_datetime(df['Start Time'], format='%Y-%m-%d %H:%M:%S').notna().all())
+
+        other_path = os.path.join(self.tmp_dir.name, 'other.csv')
+        generate_trips(other_path, 250, 'washington', seed=1)
+        pd.testing.assert_frame_equal(pd.read_csv(path), pd.read_csv(other_path))
+
+    def test_run_benchmarks(self):
+        """
+        Test that every operation is timed and that slower operations are reported as regressions.
+        """
+        results = run_benchmarks([200], ['chicago'], self.tmp_dir.name, track_memory=False)
+        operations = {record['operation'] for record in results['results']}
+        self.assertIn('load_data (cache)', operations)
+        self.assertIn('compute_stats', operations)
+        self.assertTrue(all(record['seconds'] > 0 for record in results['results']))
+
+        baseline = {'results': [dict(record, seconds=record['seconds'] / 10) for record in results['results']]}
+        self.assertEqual(len(find_regressions(results, baseline)), len(results['results']))
+        self.assertEqual(find_regressions(results, results), [])
+
+if __name__ == '__main__':
+    unittest.main()
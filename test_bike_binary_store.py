@@ -0,0 +1,67 @@
+import os
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import compute_stats, load_data, read_city_csv
+from bike_binary_store import is_trip_store, open_trip_store, write_trip_store
+from test_bike_investigation import CityFilesTestCase
+
+def memory_map_of(array):
+    """Gives the memory-mapped array an array is a view of, None if it owns its memory."""
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array
+
+class TestBinaryTripStore(CityFilesTestCase):
+
+    def setUp(self):
+        """
+        Write the sample city file and its trip store in a temporary directory.
+        """
+        super().setUp()
+        self.store_path = os.path.join(self.tmp_dir.name, 'chicago.trips')
+        write_trip_store(read_city_csv(self.csv_path), self.store_path)
+
+    def test_round_trip(self):
+        """
+        Test that the store gives back the trips as read-only views of the files.
+        """
+        self.assertTrue(is_trip_store(self.store_path))
+        self.assertFalse(is_trip_store(self.csv_path))
+        expected = read_city_csv(self.csv_path)
+        df = open_trip_store(self.store_path)
+        self.assertEqual(list(df.columns), list(expected.columns))
+        self.assertEqual(df['Start Time'].tolist(), expected['Start Time'].tolist())
+        for column in ('Start Station', 'End Station', 'User Type', 'Gender'):
+            self.assertIsInstance(df[column].dtype, pd.CategoricalDtype)
+            self.assertEqual(df[column].astype(object).tolist(), expected[column].astype(object).tolist())
+        self.assertEqual(df['Birth Year'].fillna(0).tolist(), expected['Birth Year'].fillna(0).tolist())
+        # The columns are views of the memory-mapped files, not copies in memory
+        for column in ('Trip Duration', 'Start Time'):
+            self.assertIsInstance(memory_map_of(df[column].to_numpy()), np.memmap)
+        self.assertIsInstance(memory_map_of(df['Start Station'].cat.codes.to_numpy()), np.memmap)
+
+    def test_load_data_from_store(self):
+        """
+        Test that pointing CITY_DATA at the store gives the statistics of the CSV file.
+        """
+        for month, day in [('all', 'all'), ('june', 'all'), ('june', 'friday')]:
+            with mock.patch.dict(bike_investigation.CITY_DATA, {'chicago': self.csv_path}):
+                expected = compute_stats(load_data('chicago', month, day))
+            with mock.patch.dict(bike_investigation.CITY_DATA, {'chicago': self.store_path}):
+                stats = compute_stats(load_data('chicago', month, day))
+                streamed = compute_stats(load_data('chicago', month, day, chunksize=2))
+            for result in (stats, streamed):
+                for key in ('time_stats', 'station_stats', 'trip_duration_stats'):
+                    self.assertEqual(result[key], expected[key])
+                self.assertEqual(result['user_stats']['user_types'].to_dict(), expected['user_stats']['user_types'].to_dict())
+                self.assertEqual(result['null_counts'].to_dict(), expected['null_counts'].to_dict())
+
+        with mock.patch.dict(bike_investigation.CITY_DATA, {'chicago': self.store_path}):
+            parallel = bike_investigation.analyze_city_parallel('chicago', workers=2, partitions=2)
+        self.assertEqual(parallel['station_stats']['most_common_trip'], ('Station A', 'Station B'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+import pandas as pd
+import bike_investigation
+from bike_investigation import compute_stats, load_data
+from bike_cities import CITY_COLUMN, compare_cities, comparison_table, load_cities
+from test_bike_investigation import SAMPLE_CSV, CityFilesTestCase
+
+# City file in the Washington layout, without the 'Gender' and 'Birth Year' columns
+WASHINGTON_CSV = """,Start Time,End Time,Trip Duration,Start Station,End Station,User Type
+1,2017-03-02 07:07:57,2017-03-02 07:20:53,776,Station W,Station A,Subscriber
+2,2017-06-03 18:07:57,2017-06-03 18:10:53,176,Station A,Station W,Customer
+3,2017-06-03 19:07:57,2017-06-03 19:27:57,100000,Station W,,Subscriber
+"""
+
+class TestCityComparison(CityFilesTestCase):
+
+    CITY_FILES = {'chicago': SAMPLE_CSV, 'washington': WASHINGTON_CSV}
+
+    def setUp(self):
+        """
+        Write a Chicago and a Washington file in a temporary directory and point CITY_DATA at them.
+        """
+        super().setUp()
+        self.start_patch(mock.patch.object(bike_investigation, 'QUIET', True))
+
+    def test_unified_schema(self):
+        """
+        Test that the cities share one DataFrame, with explicit nulls for the missing columns.
+        """
+        df = load_cities()
+        self.assertEqual(len(bike_investigation.FRAME_CACHE), 0)  # No per-city copy is kept
+        self.assertEqual(df[CITY_COLUMN].value_counts().to_dict(), {'chicago': 5, 'washington': 3})
+        self.assertEqual(list(df.columns[:3]), [CITY_COLUMN, 'Unnamed: 0', 'Start Time'])
+        washington = df[df[CITY_COLUMN] == 'washington']
+        self.assertTrue(washington['Gender'].isna().all())
+        self.assertTrue(washington['Birth Year'].isna().all())
+        self.assertIsInstance(df['Start Station'].dtype, pd.CategoricalDtype)
+        self.assertEqual(sorted(df['Start Station'].cat.categories), ['Station A', 'Station B', 'Station C', 'Station W'])
+        self.assertEqual(df.attrs['missing_columns'], {'chicago': [], 'washington': ['Gender', 'Birth Year']})
+
+    def test_compare_cities(self):
+        """
+        Test that the grouped statistics of each city match the statistics of the city alone.
+        """
+        for month, compact in (('all', True), ('june', False)):
+            stats = compare_cities(load_cities(month=month, compact=compact))
+            for city in ('chicago', 'washington'):
+                expected = compute_stats(load_data(city, month, 'all', compact=compact))
+                for key in ('time_stats', 'station_stats', 'trip_duration_stats'):
+                    self.assertEqual(stats[city][key], expected[key])
+                for key, value in expected['user_stats'].items():
+                    if isinstance(value, pd.Series):
+                        self.assertEqual(stats[city]['user_stats'][key].to_dict(), value.to_dict())
+                    else:
+                        self.assertEqual(stats[city]['user_stats'][key], value)
+                self.assertEqual(stats[city]['null_counts'].to_dict(), expected['null_counts'].to_dict())
+        self.assertIsNone(stats['washington']['user_stats']['gender_counts'])
+
+    def test_comparison_table(self):
+        """
+        Test that the table puts the statistics of the cities side by side.
+        """
+        table = comparison_table(compare_cities(load_cities()))
+        self.assertEqual(list(table.columns), ['chicago', 'washington'])
+        self.assertEqual(table.loc['station_stats.most_common_start_station', 'washington'], 'Station W')
+        self.assertEqual(table.loc['user_stats.gender_counts.male', 'chicago'], 2)
+        self.assertTrue(pd.isna(table.loc['user_stats.gender_counts.male', 'washington']))
+
+if __name__ == '__main__':
+    unittest.main()
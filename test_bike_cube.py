@@ -0,0 +1,55 @@
+import os
+import unittest
+from unittest import mock
+import bike_investigation
+from bike_investigation import compute_stats, load_data
+from bike_cube import CityCube, cube_path, load_city_cube, query_cube
+from test_bike_investigation import SAMPLE_CSV, CityFilesTestCase
+
+# One more trip without a valid start time, only counted when no filter is applied
+UNDATED_TRIP = "6,not a date,2017-06-10 08:05:00,400,Station A,Station C,Subscriber,Male,1990\n"
+
+class TestCityCube(CityFilesTestCase):
+
+    CITY_FILES = {'chicago': SAMPLE_CSV + UNDATED_TRIP}
+
+    def test_query_matches_load_data(self):
+        """
+        Test that slicing the cube gives the statistics of the filtered trips.
+        """
+        for month, day in [('all', 'all'), ('june', 'all'), ('all', 'monday'), ('june', 'friday'), ('march', 'all')]:
+            stats = query_cube('chicago', month, day)
+            expected = compute_stats(load_data('chicago', month, day))
+            self.assertEqual(stats['time_stats'], expected['time_stats'])
+            self.assertEqual(stats['trip_duration_stats'], expected['trip_duration_stats'])
+            for key in ('user_types', 'gender_counts'):
+                self.assertEqual(stats['user_stats'][key].to_dict(), expected['user_stats'][key].to_dict())
+            for key in ('earliest_year', 'most_recent_year', 'most_common_year'):
+                self.assertEqual(stats['user_stats'][key], expected['user_stats'][key])
+
+    def test_cube_is_persisted_and_invalidated(self):
+        """
+        Test that the cube is saved next to the data and rebuilt when the source file changes.
+        """
+        load_city_cube('chicago')
+        self.assertTrue(os.path.exists(cube_path('chicago')))
+        with mock.patch.object(CityCube, 'from_trips') as from_trips:
+            load_city_cube('chicago')
+            from_trips.assert_not_called()
+
+        # Touching the source file keeps the cube, and its new modification time is saved
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        with mock.patch.object(CityCube, 'from_trips') as from_trips:
+            load_city_cube('chicago')
+            from_trips.assert_not_called()
+        with mock.patch('bike_investigation.file_hash') as file_hash:
+            load_city_cube('chicago')
+            file_hash.assert_not_called()
+
+        with open(self.csv_path, 'a') as file:
+            file.write("7,2017-03-01 10:00:00,2017-03-01 10:10:00,600,Station B,Station A,Customer,Female,1990\n")
+        self.assertEqual(query_cube('chicago', 'march', 'all')['time_stats']['most_common_month'], 'March')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+import pandas as pd
+from bike_demand import StationDemand
+
+class TestStationDemand(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build a few trips between three stations over two days.
+        """
+        self.df = pd.DataFrame({
+            'Start Time': pd.to_datetime(['2017-01-02 08:10', '2017-01-02 08:50', '2017-01-02 17:05',
+                                          '2017-01-03 08:15', '2017-01-03 09:00', None]),
+            'End Time': pd.to_datetime(['2017-01-02 08:30', '2017-01-02 09:10', '2017-01-02 17:25',
+                                        '2017-01-03 08:40', '2017-01-03 09:20', '2017-01-03 10:00']),
+            'Start Station': ['A', 'A', 'B', 'A', 'C', 'B'],
+            'End Station': ['B', 'B', 'A', 'C', None, 'A'],
+        })
+
+    def test_hourly_counts(self):
+        """
+        Test that the trips are counted at their station and hour, and the net flow.
+        """
+        demand = StationDemand.from_trips(self.df)
+        self.assertEqual(list(demand.stations), ['A', 'B', 'C'])
+        self.assertEqual(demand.hours[0], pd.Timestamp('2017-01-02 08:00'))
+        self.assertEqual(demand.hours[-1], pd.Timestamp('2017-01-03 10:00'))
+        departures = demand.to_frame('departures')
+        self.assertEqual(departures.loc['A', pd.Timestamp('2017-01-02 08:00')], 2)
+        self.assertEqual(demand.departures.sum(), 5)  # The trip without a start time is not a departure
+        self.assertEqual(demand.arrivals.sum(), 5)  # Nor is the trip without an end station an arrival
+        net = pd.DataFrame(demand.net_flow(), index=demand.stations, columns=demand.hours)
+        self.assertEqual(net.loc['B', pd.Timestamp('2017-01-02 08:00')], 1)
+        self.assertEqual(net.loc['B', pd.Timestamp('2017-01-02 09:00')], 1)
+        self.assertEqual(net.loc['A'].sum(), -1)
+
+    def test_rolling_and_peaks(self):
+        """
+        Test the rolling windows against pandas and the detection of the peak hours.
+        """
+        demand = StationDemand.from_trips(self.df)
+        for window in (1, 3, 24):
+            expected = demand.to_frame('total').T.rolling(window, min_periods=1).sum().T
+            np.testing.assert_array_equal(demand.rolling(window, 'total'), expected.to_numpy())
+        peaks = demand.peak_hours(window=1)
+        self.assertEqual(peaks.loc['A', 'peak_start'], pd.Timestamp('2017-01-02 08:00'))
+        self.assertEqual(peaks.loc['A', 'peak_demand'], 2)
+        self.assertEqual(peaks.loc['A', 'peak_hour_of_day'], 8)
+        self.assertEqual(demand.hour_of_day_profile().loc['A', 8], 3)
+        self.assertEqual(demand.peak_hours(window=25).loc['A', 'peak_demand'], 3)
+        for window in (0, -1):
+            with self.assertRaises(ValueError):
+                demand.rolling(window)
+            with self.assertRaises(ValueError):
+                demand.peak_hours(window=window)
+
+    def test_extend(self):
+        """
+        Test that extending the series hour by hour gives the series of all the trips.
+        """
+        expected = StationDemand.from_trips(self.df)
+        demand = StationDemand.from_trips(self.df.iloc[[3, 4]])
+        for index in (0, 1, 2, 5):
+            demand.extend(self.df.iloc[[index]])
+        order = expected.stations.get_indexer(demand.stations)
+        self.assertEqual(demand.hours.tolist(), expected.hours.tolist())
+        np.testing.assert_array_equal(demand.departures, expected.departures[order])
+        np.testing.assert_array_equal(demand.arrivals, expected.arrivals[order])
+
+if __name__ == '__main__':
+    unittest.main()
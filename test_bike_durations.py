@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import pandas as pd
+from bike_durations import DurationHistogram, duration_histograms, duration_profile, merge_histograms
+
+class TestDurationHistogram(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build log-normal trip durations over the hours of the day, with a few invalid ones.
+        """
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'Trip Duration': np.exp(rng.normal(6.5, 1, 20_000)),
+            'hour': rng.integers(0, 24, 20_000),
+        })
+        self.df.loc[::1000, 'Trip Duration'] = 90_000  # Longer than a day, discarded by the cleaning
+        self.df.loc[1::1000, 'Trip Duration'] = np.nan
+        self.valid = self.df['Trip Duration'][self.df['Trip Duration'] < 86_400]
+
+    def test_quantiles_within_relative_error(self):
+        """
+        Test that the quantiles are within 1% of the exact ones and the other figures are exact.
+        """
+        histogram = DurationHistogram.from_durations(self.df['Trip Duration'])
+        for q in (0.01, 0.5, 0.9, 0.99, 1.0):
+            expected = np.quantile(self.valid, q, method='inverted_cdf')
+            self.assertLessEqual(abs(histogram.quantile(q) - expected), 0.01 * expected)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], len(self.valid))
+        self.assertAlmostEqual(summary['mean'], self.valid.mean())
+        self.assertEqual(summary['max'], self.valid.max())
+        self.assertEqual(summary['invalid'], 40)
+        self.assertEqual(summary['short_trips'], (self.valid < 60).sum())
+        self.assertEqual(summary['long_trips'], (self.valid >= 3 * 3600).sum())
+        self.assertEqual(list(summary)[4:7], ['p50', 'p90', 'p99'])
+
+    def test_merged_histograms(self):
+        """
+        Test that the histograms of two halves merge into the histogram of the whole.
+        """
+        half = len(self.df) // 2
+        merged = merge_histograms(duration_histograms(self.df.iloc[:half], 'hour'),
+                                  duration_histograms(self.df.iloc[half:], 'hour'))
+        whole = duration_histograms(self.df, 'hour')
+        self.assertEqual(sorted(merged), list(range(24)))
+        for hour, histogram in whole.items():
+            expected, summary = histogram.summary(), merged[hour].summary()
+            self.assertAlmostEqual(summary.pop('mean'), expected.pop('mean'))
+            self.assertEqual(summary, expected)
+
+    def test_duration_profile(self):
+        """
+        Test that the profile has one row per group, also when streamed over chunks.
+        """
+        profile = duration_profile(self.df, by='hour')
+        self.assertEqual(list(profile.index), list(range(24)))
+        self.assertEqual(profile['count'].sum(), len(self.valid))
+        chunks = (self.df.iloc[start:start + 3000] for start in range(0, len(self.df), 3000))
+        pd.testing.assert_frame_equal(duration_profile(chunks, by='hour'), profile)
+
+        empty = DurationHistogram.from_durations(pd.Series([np.nan, 100_000.0]))
+        self.assertIsNone(empty.quantile(0.5))
+        self.assertEqual(empty.summary()['invalid'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,23 @@
+import os
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 import pandas as pd
+import bike_investigation
 from bike_investigation import time_stats, station_stats, trip_duration_stats, user_stats, count_null_values
+from bike_investigation import load_data, load_city_data, cache_paths
+from bike_investigation import aggregate_stats, merge_aggregates, summarize_stats, compute_stats, validate_data
+
+# Small city file in the Chicago layout, shared by the tests that load data from disk
+SAMPLE_CSV = """,Start Time,End Time,Trip Duration,Start Station,End Station,User Type,Gender,Birth Year
+1,2017-01-02 09:07:57,2017-01-02 09:20:53,776,Station A,Station B,Subscriber,Male,1985
+2,2017-01-02 18:07:57,2017-01-02 18:10:53,176,Station B,Station C,Customer,Female,1992
+3,2017-06-02 09:07:57,2017-06-02 09:27:57,1200,Station A,Station B,Subscriber,Male,1985
+4,2017-06-09 17:01:00,2017-06-09 17:31:00,1800,Station C,Station A,Subscriber,,
+5,2017-06-10 08:00:00,2017-06-10 08:05:00,300,Station A,Station C,Customer,Female,1970
+"""
 
 class TestBikeShareData(unittest.TestCase):
 
@@ -84,8 +101,12 @@ class TestBikeShareData(unittest.TestCase):
         self.assertEqual(result['most_recent_year'], 1992)
         self.assertEqual(result['most_common_year'], 1985)
 
+        # The DataFrame is not modified, the invalid values only become nulls once validated
+        self.assertEqual(df['User Type'].tolist(), data['User Type'])
+        self.assertEqual(count_null_values(df)['Gender'], 0)
+
         # Check for null values
-        null_values = count_null_values(df)
+        null_values = count_null_values(validate_data(df))
         self.assertEqual(null_values['Gender'], 1) # 'Unknown' is a null value
         self.assertEqual(null_values['User Type'], 1) # 'non-binary' is a null value
         self.assertEqual(null_values['Birth Year'], 1) # '2030' is a null value because is does not possible
@@ -185,5 +206,432 @@ class TestBikeShareData(unittest.TestCase):
         self.assertEqual(result['most_recent_year'], 1985)
         self.assertEqual(result['most_common_year'], 1985)
 
+    def test_user_stats_all_null_columns(self):
+        """
+        Test that user columns without any value give empty counts.
+        """
+        result = user_stats(pd.DataFrame({'User Type': ['Subscriber'], 'Gender': [None]}))
+        self.assertEqual(result['user_types'].to_dict(), {'subscriber': 1})
+        self.assertTrue(result['gender_counts'].empty)
+        stats = compute_stats(pd.DataFrame({'User Type': [None, None]}))
+        self.assertTrue(stats['user_stats']['user_types'].empty)
+
+    def test_missing_and_empty_columns_are_told_apart(self):
+        """
+        Test that a column without valid values is not reported as a missing column.
+        """
+        df = pd.DataFrame({
+            'Start Time': pd.to_datetime(pd.Series([], dtype=object)),
+            'Birth Year': pd.Series([], dtype=float),
+        })
+        with mock.patch('builtins.print') as print_:
+            time_stats(df)
+            user_stats(pd.DataFrame({'Birth Year': [1850, None]}))
+        print_.assert_any_call("`Start Time` column has no valid values for this filter.")
+        print_.assert_any_call("`Birth Year` column has no valid values for this filter.")
+        print_.assert_any_call("`Gender` column does not exist.")
+
+class TestStatsEngine(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build a trip DataFrame like the one returned by load_data.
+        """
+        data = {
+            'Start Time': ['2017-01-02 09:07:57', '2017-01-02 18:07:57', '2017-06-02 09:07:57', '2017-06-09 17:01:00'],
+            'Trip Duration': [776, 176, 1200, 90000],
+            'Start Station': ['Station A', 'Station B', 'Station A', 'Station C'],
+            'End Station': ['Station B', 'Station C', 'Station B', None],
+            'User Type': ['Subscriber', 'Customer', 'subscriber', 'Unknown'],
+            'Gender': ['Male', 'Female', 'male', None],
+            'Birth Year': [1985, 1992, 1985, 1850],
+        }
+        self.df = pd.DataFrame(data)
+        self.df['Start Time'] = pd.to_datetime(self.df['Start Time'])
+        self.df['month'] = self.df['Start Time'].dt.strftime('%B')
+        self.df['day_of_week'] = self.df['Start Time'].dt.day_name()
+        self.df['hour'] = self.df['Start Time'].dt.hour.astype('Int64')
+
+    def test_compute_stats_matches_functions(self):
+        """
+        Test that the single-pass engine gives the results of the individual stat functions.
+        """
+        stats = compute_stats(self.df)
+        self.assertEqual(stats['time_stats'], time_stats(self.df))
+        self.assertEqual(stats['station_stats'], station_stats(self.df))
+        self.assertEqual(stats['trip_duration_stats'], trip_duration_stats(self.df))
+        self.assertEqual(stats['user_stats']['user_types'].to_dict(), {'subscriber': 2, 'customer': 1})
+        self.assertEqual(stats['user_stats']['most_common_year'], 1985)
+        self.assertEqual(stats['null_counts']['User Type'], 1)
+        self.assertEqual(stats['null_counts']['Trip Duration'], 1)
+
+    def test_compute_stats_does_not_modify_dataframe(self):
+        """
+        Test that the engine cleans the columns without writing them back.
+        """
+        before = self.df.copy()
+        compute_stats(self.df)
+        pd.testing.assert_frame_equal(self.df, before)
+
+    def test_stat_functions_do_not_modify_dataframe(self):
+        """
+        Test that the stat functions can share one DataFrame, including across threads.
+        """
+        before = self.df.copy()
+        functions = [time_stats, station_stats, trip_duration_stats, user_stats, count_null_values] * 4
+        with mock.patch.object(bike_investigation, 'QUIET', True), ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda function: function(self.df), functions))
+        pd.testing.assert_frame_equal(self.df, before)
+        self.assertEqual(results[2], results[7])
+        self.assertEqual(results[3]['user_types'].to_dict(), {'subscriber': 2, 'customer': 1})
+
+    def test_parse_timestamps(self):
+        """
+        Test that only the pinned layout is parsed and the other values are counted as invalid.
+        """
+        values = pd.Series(['2017-01-02 09:07:57', '2017-06-01T09:00', None, '03/04/2017 10:00',
+                            '2017-02-30 00:00:00', '2017-01-01 25:00:00', '2017-03-02 00:00:00'])
+        expected = [pd.Timestamp('2017-01-02 09:07:57')] + [pd.NaT] * 5 + [pd.Timestamp('2017-03-02')]
+        for arrow in (bike_investigation.pa, None):
+            with mock.patch.object(bike_investigation, 'pa', arrow):
+                times, invalid = bike_investigation.parse_timestamps(values)
+                valid_times, no_invalid = bike_investigation.parse_timestamps(values[:1])
+                off_layout_times, off_layout = bike_investigation.parse_timestamps(values[[0, 1, 6]])
+            self.assertEqual(times.tolist(), expected)
+            self.assertEqual(invalid, 4)
+            self.assertEqual((off_layout_times.tolist(), off_layout), ([expected[0], pd.NaT, expected[-1]], 1))
+            self.assertEqual((valid_times.tolist(), no_invalid), (expected[:1], 0))
+
+    def test_calendar_codes(self):
+        """
+        Test that the integer month, day of the week and hour match the pandas accessors.
+        """
+        times = pd.Series(pd.date_range('1969-12-30', '2030-03-02', periods=5000)).astype('datetime64[us]')
+        times[::7] = pd.NaT
+        months, days, hours = bike_investigation.calendar_codes(times)
+        self.assertEqual(months.dtype, 'int8')
+        self.assertEqual(months.tolist(), times.dt.month.fillna(-1).astype(int).tolist())
+        self.assertEqual(days.tolist(), times.dt.dayofweek.fillna(-1).astype(int).tolist())
+        self.assertEqual(hours.tolist(), times.dt.hour.fillna(-1).astype(int).tolist())
+
+    def test_merge_aggregates(self):
+        """
+        Test that merging the aggregates of two halves gives the statistics of the whole.
+        """
+        merged = merge_aggregates(aggregate_stats(self.df.iloc[:2]), aggregate_stats(self.df.iloc[2:]))
+        stats = summarize_stats(merged)
+        expected = compute_stats(self.df)
+        for key in ('time_stats', 'station_stats', 'trip_duration_stats'):
+            self.assertEqual(stats[key], expected[key])
+        self.assertEqual(stats['user_stats']['user_types'].to_dict(), expected['user_stats']['user_types'].to_dict())
+        self.assertEqual(stats['null_counts'].to_dict(), expected['null_counts'].to_dict())
+
+    def test_validation_schema(self):
+        """
+        Test that validate_data applies a custom schema once and the statistics reuse it.
+        """
+        schema = dict(bike_investigation.VALIDATION_SCHEMA, user_types=['subscriber', 'customer', 'unknown'],
+                      birth_year_range=(1800, 2000))
+        validated = bike_investigation.validate_data(self.df, schema)
+        self.assertEqual(validated['User Type'].tolist(), ['subscriber', 'customer', 'subscriber', 'unknown'])
+        self.assertEqual(validated['Birth Year'].min(), 1850)
+        self.assertTrue(pd.isna(validated['Trip Duration'].iloc[3]))
+        self.assertEqual(self.df['User Type'].iloc[0], 'Subscriber')  # The input is left as is
+
+        with mock.patch.object(bike_investigation, 'clean_user_type') as clean_user_type:
+            stats = compute_stats(validated)
+            clean_user_type.assert_not_called()
+        self.assertEqual(stats['user_stats']['user_types']['unknown'], 1)
+        self.assertEqual(stats['user_stats']['earliest_year'], 1850)
+
+class CityFilesTestCase(unittest.TestCase):
+    """
+    Base of the tests reading city files: writes them in a temporary directory, points CITY_DATA
+    (only these cities) and CACHE_DIR at it, and empties FRAME_CACHE afterwards.
+    """
+
+    # Content of the file of each city
+    CITY_FILES = {'chicago': SAMPLE_CSV}
+
+    def setUp(self):
+        """
+        Write the city files in a temporary directory and point the module at them.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.city_paths = {}
+        for city, content in self.CITY_FILES.items():
+            self.city_paths[city] = os.path.join(self.tmp_dir.name, f"{city}.csv")
+            with open(self.city_paths[city], 'w') as file:
+                file.write(content)
+        self.csv_path = self.city_paths.get('chicago')
+        self.start_patch(mock.patch.dict(bike_investigation.CITY_DATA, self.city_paths, clear=True))
+        self.start_patch(mock.patch.object(bike_investigation, 'CACHE_DIR', os.path.join(self.tmp_dir.name, 'cache')))
+        self.addCleanup(bike_investigation.FRAME_CACHE.clear)
+
+    def start_patch(self, patch):
+        """Starts a patch until the end of the test."""
+        patch.start()
+        self.addCleanup(patch.stop)
+
+class TestCityCache(CityFilesTestCase):
+
+    @unittest.skipIf(bike_investigation.pq is None, "pyarrow is not installed")
+    def test_cache_is_built_and_reused(self):
+        """
+        Test that the first load writes the cache and later loads read it instead of the CSV.
+        """
+        first = load_city_data('chicago')
+        self.assertTrue(os.path.exists(cache_paths('chicago')[0]))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(first['Start Time']))
+        self.assertIsInstance(first['Start Station'].dtype, pd.CategoricalDtype)
+
+        with mock.patch.object(bike_investigation, 'read_city_csv') as read_csv:
+            second = load_city_data('chicago')
+            read_csv.assert_not_called()
+        pd.testing.assert_frame_equal(first, second)
+
+    @unittest.skipIf(bike_investigation.pq is None, "pyarrow is not installed")
+    def test_first_load_matches_cached_loads(self):
+        """
+        Test that the load building the cache returns the trips in the order of the cache.
+        """
+        header, *rows = SAMPLE_CSV.strip().split('\n')
+        with open(self.csv_path, 'w') as file:
+            file.write('\n'.join([header] + rows[::-1]) + '\n')
+        first = load_city_data('chicago')
+        self.assertTrue(first['Start Time'].is_monotonic_increasing)
+        pd.testing.assert_frame_equal(first, load_city_data('chicago'))
+
+    @unittest.skipIf(bike_investigation.pq is None, "pyarrow is not installed")
+    def test_cache_is_invalidated_when_source_changes(self):
+        """
+        Test that editing the source file rebuilds the cache, while touching it does not.
+        """
+        load_city_data('chicago')
+
+        # Touching the file keeps the cache because its content hash is unchanged
+        os.utime(self.csv_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        with mock.patch.object(bike_investigation, 'read_city_csv') as read_csv:
+            load_city_data('chicago')
+            read_csv.assert_not_called()
+
+        # Appending a trip changes the size, so the CSV is parsed again
+        with open(self.csv_path, 'a') as file:
+            file.write("6,2017-03-01 10:00:00,2017-03-01 10:10:00,600,Station B,Station A,Subscriber,Male,1990\n")
+        df = load_city_data('chicago')
+        self.assertEqual(len(df), 6)
+
+    @unittest.skipIf(bike_investigation.pq is None, "pyarrow is not installed")
+    def test_month_filter_skips_row_groups(self):
+        """
+        Test that the month filter only reads the row groups that can contain the month.
+        """
+        with mock.patch.object(bike_investigation, 'CACHE_ROW_GROUP_SIZE', 1):
+            load_city_data('chicago')
+        df = bike_investigation.read_cache('chicago', 6)
+        self.assertEqual(len(df), 3)
+        self.assertTrue((df['Start Time'].dt.month == 6).all())
+        self.assertEqual(len(bike_investigation.read_cache('chicago', 3)), 0)
+
+    def test_load_data_filters(self):
+        """
+        Test that load_data filters the cached data by month and day.
+        """
+        self.assertEqual(len(load_data('chicago', 'all', 'all')), 5)
+        self.assertEqual(len(load_data('chicago', 'june', 'all')), 3)
+        df = load_data('chicago', 'june', 'friday')
+        self.assertEqual(len(df), 2)
+        self.assertTrue((df['day_of_week'] == 'Friday').all())
+        self.assertTrue((df['month'] == 'June').all())
+
+    def test_streaming_matches_in_memory(self):
+        """
+        Test that the statistics computed chunk by chunk match the in-memory ones.
+        """
+        for use_cache in (True, False):
+            with mock.patch.object(bike_investigation, 'USE_CACHE', use_cache):
+                expected = compute_stats(load_data('chicago', 'all', 'all'))
+                streamed = compute_stats(load_data('chicago', 'all', 'all', chunksize=2))
+            for key in ('time_stats', 'station_stats', 'trip_duration_stats'):
+                self.assertEqual(streamed[key], expected[key])
+            self.assertEqual(streamed['user_stats']['gender_counts'].to_dict(),
+                             expected['user_stats']['gender_counts'].to_dict())
+            self.assertEqual(streamed['null_counts'].to_dict(), expected['null_counts'].to_dict())
+
+        # The stat functions also accept the chunks
+        result = station_stats(load_data('chicago', 'june', 'all', chunksize=1))
+        self.assertEqual(result['most_common_start_station'], 'Station A')
+
+    def test_parallel_matches_in_memory(self):
+        """
+        Test that splitting a city across worker processes gives the in-memory statistics.
+        """
+        for use_cache in (True, False):
+            with mock.patch.object(bike_investigation, 'USE_CACHE', use_cache), \
+                 mock.patch.object(bike_investigation, 'CACHE_ROW_GROUP_SIZE', 2):
+                expected = compute_stats(load_data('chicago', 'june', 'all'))
+                stats = bike_investigation.analyze_city_parallel('chicago', 'june', 'all', workers=2, partitions=3)
+            for key in ('time_stats', 'station_stats', 'trip_duration_stats'):
+                self.assertEqual(stats[key], expected[key])
+            self.assertEqual(stats['user_stats']['user_types'].to_dict(), expected['user_stats']['user_types'].to_dict())
+            self.assertEqual(stats['null_counts'].to_dict(), expected['null_counts'].to_dict())
+
+        stats = bike_investigation.analyze_cities(['chicago'], workers=1)
+        self.assertEqual(stats['chicago']['station_stats']['most_common_trip'], ('Station A', 'Station B'))
+
+    def test_compact_profile(self):
+        """
+        Test that the compact profile uses smaller dtypes and gives the same statistics.
+        """
+        df = load_data('chicago', 'all', 'all')
+        compact = load_data('chicago', 'all', 'all', compact=True)
+        self.assertEqual(compact['month'].dtype, 'Int8')
+        self.assertEqual(compact['Trip Duration'].dtype, 'float32')
+        self.assertEqual(compact['Birth Year'].dtype, 'Int16')
+        self.assertIsInstance(compact['User Type'].dtype, pd.CategoricalDtype)
+
+        expected, stats = compute_stats(df), compute_stats(compact)
+        for key in ('time_stats', 'station_stats', 'trip_duration_stats'):
+            self.assertEqual(stats[key], expected[key])
+        self.assertEqual(stats['user_stats']['most_common_year'], expected['user_stats']['most_common_year'])
+
+        report = bike_investigation.memory_report(df, compact)
+        self.assertLess(report.loc['Total', 'after'], report.loc['Total', 'before'])
+        self.assertEqual(report.loc['month', 'saved'], report.loc['month', 'before'] - report.loc['month', 'after'])
+
+    def test_load_data_filters_without_cache(self):
+        """
+        Test that the month filter gives the same trips when the CSV is read chunk by chunk.
+        """
+        with mock.patch.object(bike_investigation, 'USE_CACHE', False), \
+             mock.patch.object(bike_investigation, 'CSV_CHUNK_SIZE', 2):
+            df = load_data('chicago', 'june', 'friday')
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df['Start Station'].tolist(), ['Station A', 'Station C'])
+
+    def test_invalid_timestamps_are_reported(self):
+        """
+        Test that the timestamps that cannot be parsed are counted and reported.
+        """
+        with open(self.csv_path, 'a') as file:
+            file.write("6,2017-02-30 10:00:00,2017-03-01 10:10:00,600,Station B,Station A,Subscriber,Male,1990\n")
+        with mock.patch('builtins.print') as print_:
+            df = load_data('chicago', 'all', 'all')
+        self.assertEqual(df.attrs['invalid_timestamps'], {'Start Time': 1, 'End Time': 0})
+        print_.assert_any_call("Warning: invalid timestamps were set to missing: 1 in `Start Time`")
+        self.assertEqual(df['Start Time'].isna().sum(), 1)
+
+        # Read chunk by chunk, the counts of the chunks are added up and reported once
+        with open(self.csv_path, 'a') as file:
+            file.write("7,2017-01-05 10:00:00,05/01/2017 10:10,600,Station B,Station A,Subscriber,Male,1990\n")
+        with mock.patch.object(bike_investigation, 'CSV_CHUNK_SIZE', 1), mock.patch('builtins.print') as print_:
+            df = bike_investigation.read_city_csv(self.csv_path, month=1)
+        self.assertEqual(df.attrs['invalid_timestamps'], {'Start Time': 1, 'End Time': 1})
+        self.assertEqual(len(df), 3)
+        print_.assert_called_once_with("Warning: invalid timestamps were set to missing: 1 in `Start Time`, "
+                                       "1 in `End Time`")
+
+    def test_loaded_cities_are_kept_in_memory(self):
+        """
+        Test that loading a city again, with any filter, is answered from memory.
+        """
+        df = load_data('chicago', 'all', 'all')
+        with mock.patch.object(bike_investigation, 'load_city_data') as load_city:
+            again = load_data('chicago', 'all', 'all')
+            friday = load_data('chicago', 'june', 'friday')
+            load_city.assert_not_called()
+        pd.testing.assert_frame_equal(again, df)
+        self.assertEqual(len(friday), 2)
+        self.assertTrue((friday['day_of_week'] == 'Friday').all())
+
+        # Modifying a returned DataFrame, even in place, does not change the cached one
+        again['Trip Duration'] = 0
+        stations = friday['Start Station'].tolist()
+        friday.loc[friday.index[0], 'Start Station'] = 'Station C'
+        self.assertEqual(load_data('chicago', 'june', 'friday')['Start Station'].tolist(), stations)
+        self.assertEqual(load_data('chicago', 'all', 'all')['Trip Duration'].tolist(), df['Trip Duration'].tolist())
+
+    def test_month_lookup_counts_one_miss(self):
+        """
+        Test that a month missing from memory, along with its whole city, counts a single miss.
+        """
+        cache = bike_investigation.FRAME_CACHE
+        hits, misses = cache.hits, cache.misses
+        load_data('chicago', 'june', 'all')
+        load_data('chicago', 'june', 'friday')
+        load_data('chicago', 'all', 'all')
+        self.assertEqual((cache.hits - hits, cache.misses - misses), (1, 2))
+
+    def test_prefetch_is_reused_by_load_data(self):
+        """
+        Test that load_data waits for a running prefetch instead of reading the file again.
+        """
+        with mock.patch.object(bike_investigation, 'load_city_data', wraps=load_city_data) as load_city:
+            future = bike_investigation.prefetch_city('chicago')
+            df = load_data('chicago', 'june', 'friday')
+            self.assertTrue(future.done())
+            self.assertEqual(load_city.call_count, 1)
+        self.assertEqual(len(df), 2)
+
+    def test_prefetch_is_handed_over_when_too_large_to_cache(self):
+        """
+        Test that a city too large for FRAME_CACHE is read once, and the prefetch warnings wait for load_data.
+        """
+        with open(self.csv_path, 'a') as file:
+            file.write("6,2017-02-30 10:00:00,2017-03-01 10:10:00,600,Station B,Station A,Subscriber,Male,1990\n")
+        with mock.patch.object(bike_investigation, 'load_city_data', wraps=load_city_data) as load_city, \
+                mock.patch.object(bike_investigation.FRAME_CACHE, 'max_bytes', 1), \
+                mock.patch('builtins.print') as print_:
+            bike_investigation.prefetch_city('chicago').result()
+            print_.assert_not_called()
+            df = load_data('chicago', 'june', 'all')
+            self.assertEqual(load_city.call_count, 1)
+        self.assertEqual(len(bike_investigation.FRAME_CACHE), 0)
+        print_.assert_any_call("Warning: invalid timestamps were set to missing: 1 in `Start Time`")
+        self.assertEqual(len(df), 3)
+
+    def test_get_filters_reports_the_city_first(self):
+        """
+        Test that the city callback runs before the month and day prompts.
+        """
+        events = []
+        answers = iter(['Chicago', 'june', 'friday'])
+        def answer(prompt):
+            events.append('prompt')
+            return next(answers)
+        with mock.patch('builtins.input', side_effect=answer), mock.patch('builtins.print'):
+            filters = bike_investigation.get_filters(on_city=lambda city: events.append(city))
+        self.assertEqual(filters, ('chicago', 'june', 'friday'))
+        self.assertEqual(events, ['prompt', 'chicago', 'prompt', 'prompt'])
+
+    def test_memory_cache_is_invalidated_when_source_changes(self):
+        """
+        Test that the trips kept in memory are reloaded when the source file changes.
+        """
+        self.assertEqual(len(load_data('chicago', 'all', 'all')), 5)
+        with open(self.csv_path, 'a') as file:
+            file.write("6,2017-03-01 10:00:00,2017-03-01 10:10:00,600,Station B,Station A,Subscriber,Male,1990\n")
+        self.assertEqual(len(load_data('chicago', 'all', 'all')), 6)
+        self.assertEqual(len(load_data('chicago', 'march', 'all')), 1)
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        """
+        Test that the cache keeps its total size within its budget, evicting the oldest entries.
+        """
+        df = load_data('chicago', 'all', 'all')
+        size = int(df.memory_usage(deep=True).sum())
+        cache = bike_investigation.FrameCache(max_bytes=2 * size)
+        fingerprint = {'size': 1}
+        for key in ('a', 'b'):
+            cache.put(key, fingerprint, df)
+        self.assertIs(cache.get('a', fingerprint), df)
+        cache.put('c', fingerprint, df)
+        self.assertIsNone(cache.get('b', fingerprint))
+        self.assertIs(cache.get('c', fingerprint), df)
+        self.assertEqual((len(cache), cache.size), (2, 2 * size))
+        self.assertIsNone(cache.get('a', {'size': 2}))
+        self.assertEqual(len(cache), 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import contextlib
+import io
+import json
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import trip_duration_stats
+from bike_metrics import REGISTRY, MetricsRegistry, instrument, measure
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Start every test with an empty registry.
+        """
+        self.registry = MetricsRegistry()
+        REGISTRY.reset()
+
+    def test_measure_and_instrument(self):
+        """
+        Test that measured blocks and instrumented functions are recorded with their rows.
+        """
+        with measure('block', rows=10, registry=self.registry) as measurement:
+            measurement.rows = 12
+        self.assertGreaterEqual(measurement.duration_ns, 0)
+        with measure('numpy', rows=np.int64(5), registry=self.registry) as measurement:
+            pass
+        self.assertEqual(measurement.rows, 5)
+
+        @instrument('double', registry=self.registry)
+        def double(df):
+            return pd.concat([df, df])
+
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        double(df)
+        double(df)
+        metrics = self.registry.to_dict()
+        self.assertEqual(metrics['block']['rows'], 12)
+        self.assertEqual(metrics['double']['calls'], 2)
+        self.assertEqual(metrics['double']['rows'], 6)
+        self.assertEqual(json.loads(self.registry.to_json())['double']['calls'], 2)
+
+    def test_prometheus_export(self):
+        """
+        Test the Prometheus text format of the metrics.
+        """
+        with measure('load "data"', rows=5, registry=self.registry):
+            pass
+        text = self.registry.to_prometheus()
+        self.assertIn('# TYPE bike_operation_calls_total counter', text)
+        self.assertIn('bike_operation_calls_total{operation="load \\"data\\""} 1', text)
+        self.assertIn('bike_operation_rows_total{operation="load \\"data\\""} 5', text)
+
+    def test_stat_functions_are_recorded_and_quiet(self):
+        """
+        Test that the stat functions record their timing and print nothing in quiet mode.
+        """
+        output = io.StringIO()
+        with mock.patch.object(bike_investigation, 'QUIET', True), contextlib.redirect_stdout(output):
+            result = trip_duration_stats(pd.DataFrame({'Trip Duration': [60, 60]}))
+        self.assertEqual(output.getvalue(), '')
+        self.assertEqual(result['total_travel_time'], "2 minutes")
+        metrics = REGISTRY.to_dict()
+        self.assertEqual(metrics['trip_duration_stats']['calls'], 1)
+        self.assertEqual(metrics['trip_duration_stats']['rows'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
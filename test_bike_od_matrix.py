@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+import pandas as pd
+from bike_investigation import station_stats
+from bike_od_matrix import ODMatrix, build_od_matrices, station_index
+
+class TestODMatrix(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build trips between three stations, with one incomplete trip.
+        """
+        data = {
+            'Start Station': ['Station A', 'Station B', 'Station A', 'Station C', 'Station B', 'Station A'],
+            'End Station': ['Station B', 'Station C', 'Station B', 'Station A', 'Station C', None],
+            'hour': [9, 9, 18, 18, 9, 9],
+        }
+        self.df = pd.DataFrame(data)
+        self.df['hour'] = self.df['hour'].astype('Int64')
+
+    def test_station_index(self):
+        """
+        Test that stations get IDs in alphabetical order.
+        """
+        self.assertEqual(station_index(self.df).tolist(), ['Station A', 'Station B', 'Station C'])
+
+    def test_top_trips_and_stations(self):
+        """
+        Test the top-k queries and their agreement with station_stats.
+        """
+        matrix = ODMatrix.from_trips(self.df)
+        top = matrix.top_trips(2)
+        self.assertEqual(list(zip(top['Start Station'], top['End Station'])),
+                         [('Station A', 'Station B'), ('Station B', 'Station C')])
+        self.assertEqual(top['trips'].tolist(), [2, 2])
+        self.assertEqual(matrix.total_trips, 5)
+
+        self.assertEqual(matrix.top_start_stations(1).to_dict(), {'Station A': 3})
+        self.assertEqual(matrix.top_end_stations(3).to_dict(), {'Station B': 2, 'Station C': 2, 'Station A': 1})
+
+        result = station_stats(self.df)
+        self.assertEqual(result['most_common_trip'], tuple(top.iloc[0, :2]))
+        self.assertEqual(result['most_common_start_station'], matrix.top_start_stations(1).index[0])
+        self.assertEqual(result['most_common_end_station'], matrix.top_end_stations(1).index[0])
+
+    def test_flow_balance(self):
+        """
+        Test the departures, arrivals and net flow of each station.
+        """
+        balance = ODMatrix.from_trips(self.df).flow_balance()
+        self.assertEqual(balance.loc['Station A'].tolist(), [3, 1, -2])
+        self.assertEqual(balance['net'].sum(), balance['arrivals'].sum() - balance['departures'].sum())
+
+    def test_slices(self):
+        """
+        Test that the matrices built per hour add up to the matrix of all the trips.
+        """
+        matrices = build_od_matrices(self.df, by='hour')
+        self.assertEqual(sorted(matrices), [9, 18])
+        self.assertEqual(matrices[18].top_trips(1)['Start Station'].tolist(), ['Station A'])
+        total = matrices[9].to_dense() + matrices[18].to_dense()
+        np.testing.assert_array_equal(total, ODMatrix.from_trips(self.df).to_dense())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+import os
+import unittest
+import numpy as np
+import pandas as pd
+import bike_investigation
+from bike_investigation import compute_stats, load_data
+from bike_report import main, run_report, to_serializable, write_csv
+from test_bike_investigation import CityFilesTestCase
+
+class TestBikeReport(CityFilesTestCase):
+
+    def test_run_report_matches_load_data(self):
+        """
+        Test that each combination gives the statistics of load_data with the same filters.
+        """
+        records = run_report(['chicago'], ['all', 'june'], ['all', 'friday'])
+        self.assertEqual([(r['month'], r['day']) for r in records],
+                         [('all', 'all'), ('all', 'friday'), ('june', 'all'), ('june', 'friday')])
+        for record in records:
+            df = load_data('chicago', record['month'], record['day'])
+            expected = to_serializable(compute_stats(df))
+            self.assertEqual(record['trips'], len(df))
+            for key, value in expected.items():
+                self.assertEqual(record[key], value)
+
+    def test_to_serializable(self):
+        """
+        Test that Series, tuples and numpy values are converted into JSON types.
+        """
+        value = {'counts': pd.Series([3, 1], index=['Subscriber', 'Customer']),
+                 'trip': ('Station A', 'Station B'), 'year': np.int64(1985), 'missing': np.nan}
+        self.assertEqual(to_serializable(value), {'counts': {'Subscriber': 3, 'Customer': 1},
+                                                  'trip': ['Station A', 'Station B'],
+                                                  'year': 1985, 'missing': None})
+        json.dumps(to_serializable(compute_stats(load_data('chicago', 'all', 'all'))))
+
+    def test_main_writes_json_and_csv(self):
+        """
+        Test that the command line writes one record per combination in both formats.
+        """
+        json_path = os.path.join(self.tmp_dir.name, 'report.json')
+        main(['--cities', 'chicago', '--all-combinations', '--output', json_path])
+        with open(json_path) as file:
+            records = json.load(file)
+        self.assertEqual(len(records), 7 * 8)
+
+        output = io.StringIO()
+        write_csv(records, output)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(len(rows), 7 * 8)
+        self.assertEqual(rows[0]['time_stats.most_common_month'], records[0]['time_stats']['most_common_month'])
+        self.assertEqual(rows[0]['user_stats.user_types.subscriber'], str(records[0]['user_stats']['user_types']['subscriber']))
+
+if __name__ == '__main__':
+    unittest.main()
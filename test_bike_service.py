@@ -0,0 +1,105 @@
+import json
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import urlopen
+import bike_investigation
+from bike_investigation import compute_stats, load_data
+from bike_report import to_serializable
+from bike_service import create_server
+from test_bike_investigation import CityFilesTestCase
+
+class TestStatsService(CityFilesTestCase):
+
+    def setUp(self):
+        """
+        Serve the sample city on a free port of this machine.
+        """
+        super().setUp()
+        self.start_patch(mock.patch.object(bike_investigation, 'QUIET', True))
+        self.server = create_server(port=0, quiet=True)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def get(self, path):
+        """Sends a GET request to the service and gives the status and the body."""
+        try:
+            with urlopen(self.url + path, timeout=10) as response:
+                return response.status, response.read().decode('utf-8')
+        except HTTPError as error:
+            return error.code, error.read().decode('utf-8')
+
+    def test_stats(self):
+        """
+        Test that the service answers the statistics of load_data, then from its cache.
+        """
+        status, body = self.get('/stats?city=chicago&month=june&day=friday')
+        self.assertEqual(status, 200)
+        record = json.loads(body)
+        expected = to_serializable(compute_stats(load_data('chicago', 'june', 'friday')))
+        self.assertEqual(record['trips'], 2)
+        for key, value in expected.items():
+            self.assertEqual(record[key], value)
+
+        self.assertEqual(json.loads(self.get('/stats?city=Chicago&month=june&day=friday')[1]), record)
+        self.assertEqual((self.server.service.hits, self.server.service.misses), (1, 1))
+
+    def test_concurrent_requests(self):
+        """
+        Test that concurrent requests for several filters get the same answers as sequential ones.
+        """
+        paths = [f"/stats?city=chicago&month={month}&day={day}"
+                 for month in ('all', 'january', 'june') for day in ('all', 'monday', 'friday')]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(self.get, paths * 3))
+        self.assertTrue(all(status == 200 for status, _ in responses))
+        for index, path in enumerate(paths):
+            self.assertEqual(json.loads(responses[index][1]), self.server.service.stats(*[
+                value.split('=')[1] for value in path.split('?')[1].split('&')]))
+
+    def test_concurrent_misses_compute_once(self):
+        """
+        Test that concurrent requests for a filter that is not cached are computed once.
+        """
+        release = threading.Event()
+
+        def slow_compute_stats(df):
+            release.wait(5)
+            return compute_stats(df)
+
+        with mock.patch('bike_service.compute_stats', side_effect=slow_compute_stats) as compute, \
+                ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.server.service.stats, 'chicago', 'june', 'all') for _ in range(4)]
+            release.set()
+            records = [future.result() for future in futures]
+        self.assertEqual(compute.call_count, 1)
+        self.assertTrue(all(record == records[0] for record in records))
+        self.assertEqual((self.server.service.hits, self.server.service.misses), (3, 1))
+
+    def test_errors_and_metrics(self):
+        """
+        Test the invalid requests and the metrics endpoint.
+        """
+        self.assertEqual(self.get('/stats?city=paris')[0], 400)
+        self.assertEqual(self.get('/stats?city=chicago&month=july')[0], 400)
+        self.assertEqual(self.get('/stats')[0], 400)
+        self.assertEqual(self.get('/unknown')[0], 404)
+        with mock.patch('bike_service.filter_data', side_effect=OSError("unreadable")):
+            status, body = self.get('/stats?city=chicago&month=june')
+        self.assertEqual(status, 500)
+        self.assertIn("unreadable", json.loads(body)['error'])
+        self.assertEqual(self.get('/stats?city=chicago&month=june')[0], 200)  # The failure is not cached
+
+        self.get('/stats?city=chicago')
+        status, body = self.get('/metrics')
+        self.assertEqual(status, 200)
+        self.assertIn('bike_operation_calls_total{operation="service.stats"}', body)
+        self.assertIn('bike_service_cache_misses_total 3', body)
+
+if __name__ == '__main__':
+    unittest.main()
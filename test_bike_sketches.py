@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+import pandas as pd
+from bike_investigation import station_stats
+from bike_sketches import (CountMinSketch, SpaceSaving, StationSketch, approximate_station_stats, sketch_stations,
+                           validation_report)
+
+class TestSketches(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build skewed trips between 200 stations, the popularity of the stations following a Zipf law.
+        """
+        rng = np.random.default_rng(0)
+        stations = np.array([f"Station {index:03d}" for index in range(200)], dtype=object)
+        popularity = 1 / np.arange(1, 201)
+        popularity /= popularity.sum()
+        self.df = pd.DataFrame({
+            'Start Station': rng.choice(stations, 20_000, p=popularity),
+            'End Station': rng.choice(stations, 20_000, p=popularity),
+        })
+        self.df.loc[::500, 'End Station'] = None  # Incomplete trips are not counted as trips
+
+    def test_space_saving_bounds(self):
+        """
+        Test that the Space-Saving counts are upper bounds within their error, in batches.
+        """
+        summary = SpaceSaving(capacity=20)
+        for start in range(0, len(self.df), 3000):
+            summary.update(self.df['Start Station'].iloc[start:start + 3000].value_counts())
+        exact = self.df['Start Station'].value_counts()
+        counters = summary.counters
+        self.assertEqual(len(counters), 20)
+        self.assertEqual(summary.total, len(self.df))
+        true_counts = exact.reindex(counters.index, fill_value=0)
+        self.assertTrue((counters['count'] >= true_counts).all())
+        self.assertTrue((counters['count'] - counters['error'] <= true_counts).all())
+        self.assertLessEqual(counters['error'].max(), summary.total / summary.capacity)
+        self.assertEqual(counters.index[0], exact.index[0])
+
+    def test_count_min_never_underestimates(self):
+        """
+        Test that the Count-Min estimates are upper bounds within epsilon times the total.
+        """
+        sketch = CountMinSketch.from_error(epsilon=0.01, delta=0.01)
+        exact = self.df['End Station'].value_counts()
+        sketch.update(exact)
+        estimates = sketch.estimate(exact.index)
+        self.assertTrue((estimates >= exact.to_numpy()).all())
+        self.assertLessEqual((estimates - exact.to_numpy()).max(), 0.01 * sketch.total)
+
+    def test_approximate_station_stats(self):
+        """
+        Test that the approximate most common stations and trip match the exact ones.
+        """
+        self.assertEqual(approximate_station_stats(self.df, chunksize=4000), station_stats(self.df))
+
+    def test_merged_sketches(self):
+        """
+        Test that the sketches of two halves merge into a sketch of the whole.
+        """
+        half = len(self.df) // 2
+        merged = sketch_stations(self.df.iloc[:half], epsilon=0.01)
+        merged.merge(sketch_stations(self.df.iloc[half:], epsilon=0.01))
+        whole = sketch_stations(self.df, epsilon=0.01)
+        self.assertEqual(merged.station_stats(), whole.station_stats())
+        self.assertEqual(merged.summaries['trip'].total, whole.summaries['trip'].total)
+        self.assertIsInstance(merged, StationSketch)
+
+    def test_validation_report(self):
+        """
+        Test that the report compares the approximate top-k with the exact one.
+        """
+        report = validation_report(self.df, k=5, epsilon=0.01)
+        self.assertEqual(list(report.index), ['start_station', 'end_station', 'trip'])
+        self.assertTrue(report['within_bound'].all())
+        self.assertTrue(report['top_matches'].all())
+        self.assertEqual(report.loc['start_station', 'recall'], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import unittest
+from unittest import mock
+import bike_investigation
+from bike_investigation import compute_stats, load_data
+from bike_store import TripStore
+from test_bike_investigation import SAMPLE_CSV, CityFilesTestCase
+
+class TestTripStore(CityFilesTestCase):
+
+    def setUp(self):
+        """
+        Split the sample city file into two daily batches, next to the whole file.
+        """
+        super().setUp()
+        header, *lines = SAMPLE_CSV.strip().split("\n")
+        self.batches = []
+        for index, batch_lines in enumerate([lines[:2], lines[2:]]):
+            path = os.path.join(self.tmp_dir.name, f'batch_{index}.csv')
+            with open(path, 'w') as file:
+                file.write("\n".join([header] + batch_lines) + "\n")
+            self.batches.append(path)
+        self.store_path = os.path.join(self.tmp_dir.name, 'store')
+
+    def assert_same_stats(self, stats, expected):
+        for key in ('time_stats', 'station_stats', 'trip_duration_stats'):
+            self.assertEqual(stats[key], expected[key])
+        for key in ('user_types', 'gender_counts'):
+            self.assertEqual(stats['user_stats'][key].to_dict(), expected['user_stats'][key].to_dict())
+        for key in ('earliest_year', 'most_recent_year', 'most_common_year'):
+            self.assertEqual(stats['user_stats'][key], expected['user_stats'][key])
+        self.assertEqual(stats['null_counts'].to_dict(), expected['null_counts'].to_dict())
+
+    def test_appended_batches_match_whole_file(self):
+        """
+        Test that the running aggregates give the statistics of the whole file, also once reopened.
+        """
+        store = TripStore(self.store_path)
+        self.assertIsNone(store.stats())
+        for path in self.batches:
+            store.append(path)
+        expected = compute_stats(load_data('chicago', 'all', 'all'))
+        self.assert_same_stats(store.stats(), expected)
+        self.assert_same_stats(TripStore(self.store_path).stats(), expected)
+        self.assertEqual([batch['rows'] for batch in store.batches], [2, 3])
+
+        # The trips can be read back for the filtered statistics
+        self.assertEqual(len(store.load_trips('june', 'friday')), len(load_data('chicago', 'june', 'friday')))
+
+    def test_append_only_reads_the_batch(self):
+        """
+        Test that appending a batch does not read the batches already ingested.
+        """
+        store = TripStore(self.store_path)
+        store.append(self.batches[0])
+        with mock.patch('bike_store.read_city_csv', wraps=bike_investigation.read_city_csv) as read_csv:
+            TripStore(self.store_path).append(self.batches[1])
+        read_csv.assert_called_once_with(self.batches[1])
+
+    def test_same_batch_is_rejected(self):
+        """
+        Test that ingesting the same file twice is refused, leaving the aggregates unchanged.
+        """
+        store = TripStore(self.store_path)
+        store.append(self.batches[0])
+        with self.assertRaises(ValueError):
+            store.append(self.batches[0])
+        self.assertEqual(store.aggregate['rows'], 2)
+        self.assertEqual(len(TripStore(self.store_path).batches), 1)
+
+if __name__ == '__main__':
+    unittest.main()